@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Alert Log - Sink JSONL streaming untuk alert serangan
+    - Tulis ter-buffer: flush setiap FLUSH_EVERY alert atau FLUSH_INTERVAL detik
+    - Rotasi segmen berdasarkan ukuran dan umur, segmen tertutup opsional di-gzip
+    - Tail terbatas di memori (untuk dashboard) + hitungan per tipe
+    - Index kecil (alerts_index.json): rentang waktu + tipe per segmen, sehingga query
+      berdasarkan waktu/tipe hanya membuka segmen yang relevan. Rentang/tipe segmen yang
+      belum ditutup (aktif, atau ditinggal proses yang crash) bisa basi, jadi selalu dibaca penuh
+"""
+
+import os
+import sys
+import json
+import gzip
+import time
+import shutil
+import argparse
+import threading
+from collections import Counter, deque
+from datetime import datetime
+
+# ===== KONFIGURASI =====
+ALERT_DIR = "alerts"
+INDEX_FILE = "alerts_index.json"
+FLUSH_EVERY = 50                  # Alert per flush
+FLUSH_INTERVAL = 1.0              # Detik maksimum alert tertahan di buffer
+MAX_SEGMENT_BYTES = 5 * 1024 * 1024
+MAX_SEGMENT_AGE_S = 3600
+COMPRESS = True                   # gzip segmen yang sudah ditutup
+TAIL_SIZE = 100
+
+def segment_name(t):
+    return f"alerts_{datetime.fromtimestamp(t).strftime('%Y%m%d_%H%M%S')}_{int(t * 1000) % 1000:03d}.jsonl"
+
+def open_segment(path):
+    return gzip.open(path, 'rt') if path.endswith(".gz") else open(path)
+
+# ===== SINK =====
+class AlertLog:
+    """Thread-safe: append() dari thread network, maybe_flush() dari loop utama"""
+
+    def __init__(self, directory=ALERT_DIR, flush_every=FLUSH_EVERY, flush_interval=FLUSH_INTERVAL,
+                 max_bytes=MAX_SEGMENT_BYTES, max_age=MAX_SEGMENT_AGE_S, compress=COMPRESS,
+                 tail_size=TAIL_SIZE):
+        self.directory = directory
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.compress = compress
+        self.tail = deque(maxlen=tail_size)
+        self.counts = Counter()
+        self.total = 0
+        self.lock = threading.Lock()
+        self.buffer = []
+        self.last_flush = time.time()
+        self.file = None
+        self.segment = None       # Entry index segmen aktif
+        self.index = None         # Dimuat saat segmen pertama dibuka
+        self.compressors = []
+
+    def append(self, alert):
+        """alert: dict dengan minimal 'type'; 't' (epoch) diisi bila belum ada"""
+        if 't' not in alert:
+            alert['t'] = time.time()
+        with self.lock:
+            self.tail.append(alert)
+            self.counts[alert['type']] += 1
+            self.total += 1
+            self.buffer.append(alert)
+            if len(self.buffer) >= self.flush_every or alert['t'] - self.last_flush >= self.flush_interval:
+                self._flush()
+
+    def maybe_flush(self, now=None):
+        """Flush buffer yang sudah tertahan lebih dari flush_interval (dipanggil periodik)"""
+        now = time.time() if now is None else now
+        if self.buffer and now - self.last_flush >= self.flush_interval:
+            with self.lock:
+                self._flush(now)
+
+    def flush(self):
+        with self.lock:
+            self._flush()
+
+    def _flush(self, now=None):
+        self.last_flush = time.time() if now is None else now
+        if not self.buffer:
+            return
+        alerts, self.buffer = self.buffer, []
+        if self.file is None:
+            self._open(alerts[0]['t'])
+        elif self.file.tell() >= self.max_bytes or alerts[0]['t'] - self.segment['start'] >= self.max_age:
+            self._rotate(alerts[0]['t'])
+
+        self.file.write("".join(json.dumps(alert) + "\n" for alert in alerts))
+        self.file.flush()
+        segment = self.segment
+        segment['end'] = max(segment['end'] or 0, alerts[-1]['t'])
+        segment['count'] += len(alerts)
+        for alert in alerts:
+            segment['types'][alert['type']] = segment['types'].get(alert['type'], 0) + 1
+
+    # ----- segmen & index -----
+    def _open(self, t):
+        os.makedirs(self.directory, exist_ok=True)
+        if self.index is None:
+            self.index = load_index(self.directory)
+        name = segment_name(t)
+        self.file = open(os.path.join(self.directory, name), 'a')
+        self.segment = {'file': name, 'start': t, 'end': None, 'count': 0, 'types': {}, 'closed': False}
+        self.index['segments'].append(self.segment)
+        self._save_index()
+
+    def _rotate(self, t):
+        self._close_segment()
+        self._open(t)
+
+    def _close_segment(self):
+        self.file.close()
+        self.file = None
+        self.segment['closed'] = True
+        if self.compress and self.segment['count']:
+            self.segment['file'] += ".gz"
+            worker = threading.Thread(target=compress_segment,
+                                      args=(os.path.join(self.directory, self.segment['file'][:-3]),))
+            worker.start()
+            self.compressors.append(worker)
+        self._save_index()
+
+    def _save_index(self):
+        path = os.path.join(self.directory, INDEX_FILE)
+        with open(path + ".tmp", 'w') as f:
+            json.dump(self.index, f, indent=2)
+        os.replace(path + ".tmp", path)
+
+    def close(self):
+        with self.lock:
+            self._flush()
+            if self.file is not None:
+                self._close_segment()
+        for worker in self.compressors:
+            worker.join()
+        self.compressors = []
+
+    def print_breakdown(self):
+        for alert_type, count in self.counts.most_common():
+            print(f"   • {alert_type}: {count}")
+
+def compress_segment(path):
+    """
+    gzip segmen tertutup lalu hapus aslinya (dijalankan di thread terpisah).
+    Ditulis ke .tmp lalu os.replace: .gz yang terlihat reader selalu lengkap, crash di
+    tengah kompresi hanya meninggalkan .tmp dan .jsonl asli.
+    """
+    tmp_path = path + ".gz.tmp"
+    with open(path, 'rb') as src, gzip.open(tmp_path, 'wb') as dst:
+        shutil.copyfileobj(src, dst)
+    os.replace(tmp_path, path + ".gz")
+    os.remove(path)
+
+def load_index(directory):
+    try:
+        with open(os.path.join(directory, INDEX_FILE)) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {'segments': []}
+
+# ===== READER =====
+class AlertReader:
+    """Query alert berdasarkan rentang waktu dan tipe memakai index segmen"""
+
+    def __init__(self, directory=ALERT_DIR):
+        self.directory = directory
+        self.segments = self._segments()
+
+    def _segments(self):
+        index = load_index(self.directory)
+        known = {}
+        for segment in index['segments']:
+            # Segmen yang gagal di-gzip (crash) tetap dibaca dari versi .jsonl
+            name = segment['file']
+            if not os.path.exists(os.path.join(self.directory, name)) and name.endswith(".gz"):
+                segment = dict(segment, file=name[:-3])
+            if not segment.get('closed'):
+                # Segmen belum ditutup: rentang/tipe di index bisa basi (crash setelah flush)
+                segment = dict(segment, end=None, types=None)
+            known[segment['file']] = segment
+        # Segmen tanpa entry index (mis. proses crash sebelum index ditulis) dibaca penuh
+        if os.path.isdir(self.directory):
+            for name in sorted(os.listdir(self.directory)):
+                if not (name.startswith("alerts_") and name.endswith((".jsonl", ".jsonl.gz"))):
+                    continue
+                # Crash antara os.replace dan os.remove: .jsonl dan .gz berisi alert yang sama
+                twin = name[:-3] if name.endswith(".gz") else name + ".gz"
+                if name not in known and twin not in known:
+                    known[name] = {'file': name, 'start': None, 'end': None, 'count': None, 'types': None}
+        return [s for s in known.values() if os.path.exists(os.path.join(self.directory, s['file']))]
+
+    def _relevant(self, segment, start, end, types):
+        if segment['types'] is not None and types and not any(t in segment['types'] for t in types):
+            return False
+        if start is not None and segment['end'] is not None and segment['end'] < start:
+            return False
+        if end is not None and segment['start'] is not None and segment['start'] >= end:
+            return False
+        return True
+
+    def query(self, start=None, end=None, types=None):
+        """Yield alert dengan start <= t < end dan type di types (None = semua)"""
+        types = set(types) if types else None
+        for segment in self.segments:
+            if not self._relevant(segment, start, end, types):
+                continue
+            with open_segment(os.path.join(self.directory, segment['file'])) as f:
+                for line in f:
+                    try:
+                        alert = json.loads(line)
+                    except ValueError:
+                        continue   # Baris terakhir terpotong saat crash
+                    t = alert.get('t', 0)
+                    if start is not None and t < start:
+                        continue
+                    if end is not None and t >= end:
+                        continue
+                    if types is not None and alert.get('type') not in types:
+                        continue
+                    yield alert
+
+# ===== CLI =====
+def main():
+    from reading_store import parse_time, format_time
+
+    parser = argparse.ArgumentParser(description="Query log alert serangan (JSONL)")
+    parser.add_argument("--dir", default=ALERT_DIR)
+    parser.add_argument("--start", help="Waktu mulai (epoch atau ISO)")
+    parser.add_argument("--end", help="Waktu akhir (epoch atau ISO)")
+    parser.add_argument("--type", nargs="+", help="Filter tipe alert")
+    parser.add_argument("--summary", action="store_true", help="Hanya hitungan per tipe")
+    parser.add_argument("--limit", type=int, default=100)
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.dir):
+        print(f"❌ Directory not found: {args.dir}")
+        sys.exit(1)
+    reader = AlertReader(args.dir)
+    alerts = reader.query(parse_time(args.start), parse_time(args.end), args.type)
+
+    if args.summary:
+        counts = Counter(alert['type'] for alert in alerts)
+        print(f"🔍 {sum(counts.values())} alerts in {len(reader.segments)} segments")
+        for alert_type, count in counts.most_common():
+            print(f"   • {alert_type}: {count}")
+        return
+
+    print("Time                | Type                      | Severity | Topic")
+    print("-"*90)
+    for i, alert in enumerate(alerts):
+        if i >= args.limit:
+            break
+        print(f"{format_time(alert['t'])} | {alert['type']:25.25} | {alert.get('severity', ''):8} | "
+              f"{alert.get('topic', '')}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""
+Streaming Anomaly Detector - Model statistik online per device untuk nilai sensor
+Tidak bergantung pada nama topic: setiap pembacaan dinilai terhadap riwayat device-nya.
+
+Per device (semua update O(1)):
+    EWMA mean + variansi      → z-score
+    median + MAD streaming    → robust z-score (tahan outlier, outlier di-winsorize saat update)
+    nilai & waktu terakhir    → rate of change (unit/detik)
+    EWMA inter-arrival        → burst (flood/DoS) dan gap (device diam)
+
+State disimpan kolumnar di array NumPy sehingga score_batch() menilai banyak pembacaan
+sekaligus secara tervektorisasi; update() adalah jalur satu pembacaan dengan aritmetika
+float Python biasa (operasi vektor NumPy untuk satu elemen jauh lebih mahal).
+Nilai yang bukan angka hingga (NaN, inf, int di luar jangkauan float) tidak dinilai.
+"""
+
+import math
+import time
+import argparse
+
+import numpy as np
+
+# ===== KONFIGURASI =====
+EWMA_ALPHA = 0.1
+VAR_ALPHA = 0.01            # Variansi diestimasi lebih lambat dari mean (estimasi cepat → ekor z terlalu berat)
+WARMUP = 30                 # Pembacaan per device sebelum alert boleh muncul
+Z_THRESHOLD = 4.0
+ROBUST_Z_THRESHOLD = 5.0
+RATE_THRESHOLD = 200.0      # unit/detik (cm/s untuk distance)
+BURST_RATIO = 0.2           # inter-arrival < 20% rata-rata → burst
+GAP_RATIO = 5.0             # inter-arrival > 5x rata-rata → gap
+MIN_SCALE = 1.0             # Skala minimum (resolusi sensor) supaya data konstan tidak membagi nol
+INITIAL_CAPACITY = 64       # Slot device awal, tumbuh 2x bila penuh
+MAD_TO_SIGMA = 1.2533       # Mean absolute deviation → sigma (distribusi normal)
+
+# ===== FLAGS =====
+FLAG_Z = 1
+FLAG_ROBUST_Z = 2
+FLAG_RATE = 4
+FLAG_BURST = 8
+FLAG_GAP = 16
+
+FLAG_NAMES = {
+    FLAG_Z: "z-score",
+    FLAG_ROBUST_Z: "robust z-score",
+    FLAG_RATE: "rate of change",
+    FLAG_BURST: "burst",
+    FLAG_GAP: "gap",
+}
+
+SCORE_DTYPE = np.dtype([
+    ('slot', np.int32),
+    ('value', np.float64),
+    ('z', np.float64),
+    ('robust_z', np.float64),
+    ('rate', np.float64),           # unit/detik terhadap pembacaan sebelumnya
+    ('inter_arrival', np.float64),  # detik (NaN untuk pembacaan pertama)
+    ('flags', np.uint8),
+])
+
+STATE_FIELDS = ('mean', 'var', 'median', 'mad', 'last_value', 'last_time', 'dt_mean')
+
+def finite_float(value):
+    """float(value) bila angka hingga, selain itu None (payload bisa berisi apa saja)"""
+    if isinstance(value, (bool, str, bytes)):
+        return None
+    try:
+        value = float(value)
+    except (TypeError, ValueError, OverflowError):
+        return None
+    return value if math.isfinite(value) else None
+
+def describe(flags):
+    """Nama alasan alert dari bitmask flags"""
+    return [name for flag, name in FLAG_NAMES.items() if flags & flag]
+
+def as_float_array(values):
+    """Array float64; elemen yang tidak bisa dikonversi (None, str, int raksasa) menjadi NaN"""
+    if isinstance(values, np.ndarray) and values.dtype.kind in 'fiu':
+        return values.astype(np.float64, copy=False)
+    return np.fromiter((math.nan if (v := finite_float(value)) is None else v for value in values),
+                       dtype=np.float64)
+
+# ===== DETECTOR =====
+class AnomalyDetector:
+    """Model online untuk banyak device dalam array kolumnar (satu slot per device)"""
+
+    def __init__(self, alpha=EWMA_ALPHA, var_alpha=VAR_ALPHA, warmup=WARMUP, z_threshold=Z_THRESHOLD,
+                 robust_z_threshold=ROBUST_Z_THRESHOLD, rate_threshold=RATE_THRESHOLD,
+                 burst_ratio=BURST_RATIO, gap_ratio=GAP_RATIO, min_scale=MIN_SCALE,
+                 capacity=INITIAL_CAPACITY):
+        self.alpha = alpha
+        self.var_alpha = var_alpha
+        self.warmup = warmup
+        self.z_threshold = z_threshold
+        self.robust_z_threshold = robust_z_threshold
+        self.rate_threshold = rate_threshold
+        self.burst_ratio = burst_ratio
+        self.gap_ratio = gap_ratio
+        self.min_scale = min_scale
+
+        self.index = {}       # device -> slot
+        self.devices = []     # slot -> device
+        self.n = np.zeros(capacity, dtype=np.int64)
+        self.alert_counts = np.zeros(capacity, dtype=np.int64)
+        for field in STATE_FIELDS:
+            setattr(self, field, np.zeros(capacity, dtype=np.float64))
+        self.scored = 0
+
+    def __len__(self):
+        return len(self.devices)
+
+    def _grow(self, needed):
+        capacity = len(self.n)
+        while capacity < needed:
+            capacity *= 2
+        for field in ('n', 'alert_counts') + STATE_FIELDS:
+            old = getattr(self, field)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, field, new)
+
+    def slot(self, device):
+        if not isinstance(device, str):
+            device = str(device)   # id dari payload bisa list/dict (tidak hashable)
+        slot = self.index.get(device)
+        if slot is None:
+            slot = self.index[device] = len(self.devices)
+            self.devices.append(device)
+            if slot >= len(self.n):
+                self._grow(slot + 1)
+        return slot
+
+    # ----- scoring -----
+    def update(self, device, value, t=None):
+        """
+        Nilai dan pelajari satu pembacaan; kembalikan satu baris SCORE_DTYPE, atau None
+        bila value bukan angka hingga. Logika sama dengan _step, versi skalar.
+        """
+        x = finite_float(value)
+        t = finite_float(time.time() if t is None else t)
+        if x is None or t is None:
+            return None
+        s = self.slot(device)
+        n = int(self.n[s])
+        mean, var = float(self.mean[s]), float(self.var[s])
+        median, mad = float(self.median[s]), float(self.mad[s])
+        last_value, last_time, dt_mean = float(self.last_value[s]), float(self.last_time[s]), float(self.dt_mean[s])
+        first = n == 0
+        warm = n >= self.warmup
+
+        std = max(math.sqrt(var), self.min_scale)
+        scale = max(mad * MAD_TO_SIGMA, self.min_scale)
+        z = (x - mean) / std
+        robust_z = (x - median) / scale
+        dt = math.nan if first else t - last_time
+        rate = (x - last_value) / dt if dt > 0 else 0.0
+
+        flags = 0
+        if warm:
+            if abs(z) > self.z_threshold:
+                flags |= FLAG_Z
+            if abs(robust_z) > self.robust_z_threshold:
+                flags |= FLAG_ROBUST_Z
+            if abs(rate) > self.rate_threshold:
+                flags |= FLAG_RATE
+            if dt_mean > 0:
+                if dt < self.burst_ratio * dt_mean:
+                    flags |= FLAG_BURST
+                if dt > self.gap_ratio * dt_mean:
+                    flags |= FLAG_GAP
+
+        if first:
+            self.mean[s], self.var[s], self.median[s], self.mad[s] = x, 0.0, x, 0.0
+        else:
+            limit = self.robust_z_threshold * scale
+            learn = min(max(x, median - limit), median + limit) if warm else x
+            diff = learn - mean
+            beta = max(self.var_alpha, 1.0 / n)
+            self.mean[s] = mean + self.alpha * diff
+            self.var[s] = (1 - beta) * (var + beta * diff * diff)
+            deviation = learn - median
+            self.median[s] = median + self.alpha * scale * ((deviation > 0) - (deviation < 0))
+            self.mad[s] = mad + self.alpha * (abs(deviation) - mad)
+            if dt > 0:
+                self.dt_mean[s] = dt_mean + self.alpha * (dt - dt_mean) if dt_mean > 0 else dt
+        self.last_value[s] = x
+        self.last_time[s] = t
+        self.n[s] = n + 1
+        if flags:
+            self.alert_counts[s] += 1
+        self.scored += 1
+        return np.array([(s, x, z, robust_z, rate, dt, flags)], dtype=SCORE_DTYPE)[0]
+
+    def score_batch(self, devices, values, times):
+        """
+        Nilai banyak pembacaan sekaligus (urut waktu per device). Pembacaan dibagi menjadi
+        putaran di mana setiap device muncul paling banyak sekali, jadi tiap putaran satu
+        operasi vektor; untuk traffic fleet biasa satu batch = satu putaran.
+        """
+        slots = np.fromiter((self.slot(d) for d in devices), dtype=np.int32, count=len(devices))
+        values = as_float_array(values)
+        times = as_float_array(times)
+        out = np.zeros(len(slots), dtype=SCORE_DTYPE)
+        out['slot'] = slots
+        out['value'] = values
+        # Pembacaan non-finite tidak dinilai dan tidak mengubah state (flags 0)
+        keep = np.flatnonzero(np.isfinite(values) & np.isfinite(times))
+        if len(keep) < len(slots):
+            slots, values, times = slots[keep], values[keep], times[keep]
+        count = len(slots)
+        if count == 0:
+            return out
+
+        # Urutan kemunculan setiap pembacaan di dalam device-nya (0, 1, 2, ...)
+        order = np.argsort(slots, kind='stable')
+        sorted_slots = slots[order]
+        starts = np.r_[True, sorted_slots[1:] != sorted_slots[:-1]]
+        positions = np.arange(count)
+        group_start = np.maximum.accumulate(np.where(starts, positions, 0))
+        rank = np.empty(count, dtype=np.int64)
+        rank[order] = positions - group_start
+
+        by_rank = np.argsort(rank, kind='stable')
+        bounds = np.cumsum(np.bincount(rank))
+        begin = 0
+        for end in bounds:
+            idx = by_rank[begin:end]
+            self._step(keep[idx], slots[idx], values[idx], times[idx], out)
+            begin = end
+        self.scored += count
+        return out
+
+    def _step(self, idx, s, x, t, out):
+        """Satu putaran: slot s unik, jadi state bisa dibaca-tulis dengan fancy indexing"""
+        n = self.n[s]
+        mean, var = self.mean[s], self.var[s]
+        median, mad = self.median[s], self.mad[s]
+        last_value, last_time, dt_mean = self.last_value[s], self.last_time[s], self.dt_mean[s]
+        first = n == 0
+        warm = n >= self.warmup
+
+        std = np.maximum(np.sqrt(var), self.min_scale)
+        scale = np.maximum(mad * MAD_TO_SIGMA, self.min_scale)
+        z = (x - mean) / std
+        robust_z = (x - median) / scale
+        dt = np.where(first, np.nan, t - last_time)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rate = np.where(dt > 0, (x - last_value) / dt, 0.0)
+
+        flags = np.zeros(len(s), dtype=np.uint8)
+        flags |= np.where(warm & (np.abs(z) > self.z_threshold), FLAG_Z, 0).astype(np.uint8)
+        flags |= np.where(warm & (np.abs(robust_z) > self.robust_z_threshold), FLAG_ROBUST_Z, 0).astype(np.uint8)
+        flags |= np.where(warm & (np.abs(rate) > self.rate_threshold), FLAG_RATE, 0).astype(np.uint8)
+        has_rhythm = warm & (dt_mean > 0)
+        flags |= np.where(has_rhythm & (dt < self.burst_ratio * dt_mean), FLAG_BURST, 0).astype(np.uint8)
+        flags |= np.where(has_rhythm & (dt > self.gap_ratio * dt_mean), FLAG_GAP, 0).astype(np.uint8)
+
+        # Update model; setelah warmup outlier di-winsorize supaya tidak meracuni baseline
+        learn = np.where(warm, np.clip(x, median - self.robust_z_threshold * scale,
+                                       median + self.robust_z_threshold * scale), x)
+        diff = learn - mean
+        incr = self.alpha * diff
+        self.mean[s] = np.where(first, x, mean + incr)
+        # Bobot variansi 1/n di awal (rata-rata kumulatif) lalu turun ke var_alpha
+        beta = np.maximum(self.var_alpha, 1.0 / np.maximum(n, 1))
+        self.var[s] = np.where(first, 0.0, (1 - beta) * (var + beta * diff * diff))
+        deviation = learn - median
+        self.median[s] = np.where(first, x, median + self.alpha * scale * np.sign(deviation))
+        self.mad[s] = np.where(first, 0.0, mad + self.alpha * (np.abs(deviation) - mad))
+        valid_dt = ~first & (dt > 0)
+        self.dt_mean[s] = np.where(valid_dt & (dt_mean > 0), dt_mean + self.alpha * (dt - dt_mean),
+                                   np.where(valid_dt, dt, dt_mean))
+        self.last_value[s] = x
+        self.last_time[s] = t
+        self.n[s] = n + 1
+        self.alert_counts[s] += flags > 0
+
+        for field, column in (('slot', s), ('value', x), ('z', z), ('robust_z', robust_z),
+                              ('rate', rate), ('inter_arrival', dt), ('flags', flags)):
+            out[field][idx] = column
+
+    # ----- laporan -----
+    def alerts(self, scores):
+        """Baris yang ter-flag sebagai list dict (device, value, alasan, skor)"""
+        result = []
+        for row in scores[scores['flags'] > 0]:
+            result.append({
+                'device': self.devices[row['slot']],
+                'value': float(row['value']),
+                'reasons': describe(int(row['flags'])),
+                'z': round(float(row['z']), 2),
+                'robust_z': round(float(row['robust_z']), 2),
+                'rate': round(float(row['rate']), 2),
+                'inter_arrival': None if np.isnan(row['inter_arrival']) else round(float(row['inter_arrival']), 3),
+            })
+        return result
+
+    def print_summary(self):
+        print(f"\n🧪 ANOMALY DETECTOR ({self.scored} readings, {len(self.devices)} devices)")
+        print(f"   {'Device':<24} | {'N':>7} | {'EWMA':>9} | {'Median':>9} | {'Interval s':>10} | {'Alerts':>6}")
+        for slot, device in enumerate(self.devices):
+            print(f"   {str(device):<24.24} | {self.n[slot]:7d} | {self.mean[slot]:9.1f} | "
+                  f"{self.median[slot]:9.1f} | {self.dt_mean[slot]:10.3f} | {self.alert_counts[slot]:6d}")
+
+# ===== CLI =====
+def synthetic_fleet(devices, readings, interval=1.0, seed=0):
+    """Traffic fleet sintetis (urut waktu) dengan beberapa spike, untuk benchmark"""
+    rng = np.random.default_rng(seed)
+    device_ids = np.tile(np.arange(devices), readings)
+    times = np.repeat(np.arange(readings) * interval, devices) + rng.uniform(0, interval * 0.1, devices * readings)
+    base = rng.uniform(20, 300, devices)
+    values = base[device_ids] + rng.normal(0, 2, devices * readings)
+    spikes = rng.choice(devices * readings, size=max(1, devices * readings // 1000), replace=False)
+    values[spikes] = 999
+    return [f"ESP32_{i:04d}" for i in device_ids], values, times
+
+def main():
+    parser = argparse.ArgumentParser(description="Deteksi anomali statistik untuk pembacaan sensor")
+    parser.add_argument("--db", help="Nilai semua pembacaan dari ReadingStore SQLite")
+    parser.add_argument("--device", help="Filter device ID (dengan --db)")
+    parser.add_argument("--synthetic", type=int, nargs=2, metavar=("DEVICES", "READINGS"),
+                        help="Benchmark dengan fleet sintetis")
+    parser.add_argument("--batch", type=int, default=5000, help="Ukuran batch untuk scoring")
+    parser.add_argument("--show", type=int, default=20, help="Jumlah alert yang ditampilkan")
+    args = parser.parse_args()
+
+    if args.db:
+        from reading_store import ReadingStore
+        store = ReadingStore(args.db)
+        try:
+            rows = [r for r in store.query_range(args.device) if r[2] is not None]
+        finally:
+            store.close()
+        devices = [r[0] for r in rows]
+        values = np.array([r[2] for r in rows], dtype=np.float64)
+        times = np.array([r[4] for r in rows], dtype=np.float64)
+    elif args.synthetic:
+        devices, values, times = synthetic_fleet(*args.synthetic)
+    else:
+        parser.error("use --db or --synthetic")
+
+    detector = AnomalyDetector()
+    alerts = []
+    start = time.perf_counter()
+    for i in range(0, len(devices), args.batch):
+        scores = detector.score_batch(devices[i:i + args.batch], values[i:i + args.batch], times[i:i + args.batch])
+        alerts.extend(detector.alerts(scores))
+    elapsed = time.perf_counter() - start
+
+    print("="*70)
+    print("🧪 STREAMING ANOMALY DETECTION")
+    print("="*70)
+    print(f"   Readings: {len(devices):,} | Devices: {len(detector)} | Alerts: {len(alerts):,}")
+    print(f"   Throughput: {len(devices) / elapsed:,.0f} readings/s (batch {args.batch})")
+    for alert in alerts[:args.show]:
+        print(f"   🚨 {alert['device']}: {alert['value']:.1f} ({', '.join(alert['reasons'])}) "
+              f"z={alert['z']} robust_z={alert['robust_z']} rate={alert['rate']}")
+    if len(detector) <= 50:
+        detector.print_summary()
+
+if __name__ == "__main__":
+    main()
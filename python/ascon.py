@@ -5,10 +5,41 @@ Implementation of Ascon v1.2, an authenticated cipher and hash function
 http://ascon.iaik.tugraz.at/
 """
 
+from functools import lru_cache
+
 
 debug = False
 debugpermutation = False
 
+
+# === Ascon counters (always on) ===
+
+permutation_calls = [0] * 13   # permutation calls, indexed by number of rounds
+counters = {
+    "encryptions": 0,
+    "decryptions": 0,
+    "bytes_absorbed": 0,   # padded associated data + plaintext/ciphertext blocks
+    "bytes_squeezed": 0,   # ciphertext/plaintext output + tags
+    "tag_failures": 0,
+}
+
+def get_counters():
+    """
+    Returns a snapshot of the operation counters as a dict:
+    encryptions, decryptions, bytes_absorbed, bytes_squeezed, tag_failures,
+    and permutation_calls ({rounds: calls}, only round counts that were used)
+    """
+    snapshot = dict(counters)
+    snapshot["permutation_calls"] = {r: n for r, n in enumerate(permutation_calls) if n}
+    return snapshot
+
+def reset_counters():
+    """Sets all operation counters back to zero."""
+    for name in counters:
+        counters[name] = 0
+    for r in range(len(permutation_calls)):
+        permutation_calls[r] = 0
+
 # === Ascon AEAD encryption and decryption ===
 
 def ascon_encrypt(key, nonce, associateddata, plaintext, variant="Ascon-128"): 
@@ -24,15 +55,16 @@ def ascon_encrypt(key, nonce, associateddata, plaintext, variant="Ascon-128"):
     assert variant in ["Ascon-128", "Ascon-128a", "Ascon-80pq"]
     assert(len(nonce) == 16 and (len(key) == 16 or (len(key) == 20 and variant == "Ascon-80pq")))
     S = [0, 0, 0, 0, 0]
-    k = len(key) * 8   # bits
-    a = 12   # rounds
-    b = 8 if variant == "Ascon-128a" else 6   # rounds
-    rate = 16 if variant == "Ascon-128a" else 8   # bytes
+    ctx = ascon_key_context(bytes(key), variant)
+    b = ctx.b
+    rate = ctx.rate
 
-    ascon_initialize(S, k, rate, a, b, key, nonce)
+    ascon_initialize_with_context(S, ctx, nonce)
     ascon_process_associated_data(S, b, rate, associateddata)
     ciphertext = ascon_process_plaintext(S, b, rate, plaintext)
-    tag = ascon_finalize(S, rate, a, key)
+    tag = ascon_finalize_with_context(S, ctx)
+    counters["encryptions"] += 1
+    counters["bytes_squeezed"] += len(ciphertext) + len(tag)
     return ciphertext + tag
 
 
@@ -50,21 +82,67 @@ def ascon_decrypt(key, nonce, associateddata, ciphertext, variant="Ascon-128"):
     assert(len(nonce) == 16 and (len(key) == 16 or (len(key) == 20 and variant == "Ascon-80pq")))
     assert(len(ciphertext) >= 16)
     S = [0, 0, 0, 0, 0]
-    k = len(key) * 8 # bits
-    a = 12 # rounds
-    b = 8 if variant == "Ascon-128a" else 6   # rounds
-    rate = 16 if variant == "Ascon-128a" else 8   # bytes
+    ctx = ascon_key_context(bytes(key), variant)
+    b = ctx.b
+    rate = ctx.rate
 
-    ascon_initialize(S, k, rate, a, b, key, nonce)
+    ascon_initialize_with_context(S, ctx, nonce)
     ascon_process_associated_data(S, b, rate, associateddata)
     plaintext = ascon_process_ciphertext(S, b, rate, ciphertext[:-16])
-    tag = ascon_finalize(S, rate, a, key)
+    tag = ascon_finalize_with_context(S, ctx)
+    counters["decryptions"] += 1
+    counters["bytes_squeezed"] += len(plaintext) + len(tag)
     if tag == ciphertext[-16:]:
         return plaintext
     else:
+        counters["tag_failures"] += 1
         return None
 
 
+# === Ascon key contexts ===
+
+class AsconKeyContext:
+    """
+    Pre-expanded, key-dependent constants for one (key, variant) pair.
+    k, rate, a, b: key size in bits, rate in bytes, and round numbers
+    iv_key_words: the first 3 state words (IV || zero padding || key), which do not depend on the nonce
+    zero_key_words: the 5 words XORed into the state after initialization
+    final_key_words: the 3 words XORed into the state before finalization
+    tag_key_words: the 2 words XORed into S[3], S[4] to form the tag
+    """
+    __slots__ = ("key", "variant", "k", "rate", "a", "b",
+                 "iv_key_words", "zero_key_words", "final_key_words", "tag_key_words")
+
+    def __init__(self, key, variant):
+        self.key = key
+        self.variant = variant
+        self.k = len(key) * 8   # bits
+        self.a = 12   # rounds
+        self.b = 8 if variant == "Ascon-128a" else 6   # rounds
+        self.rate = 16 if variant == "Ascon-128a" else 8   # bytes
+        iv_key = to_bytes([self.k, self.rate * 8, self.a, self.b] + (20-len(key))*[0]) + key
+        self.iv_key_words = bytes_to_state(iv_key + zero_bytes(16))[:3]
+        self.zero_key_words = bytes_to_state(zero_bytes(40-len(key)) + key)
+        self.final_key_words = (bytes_to_int(key[0:8]), bytes_to_int(key[8:16]), bytes_to_int(key[16:]))
+        self.tag_key_words = (bytes_to_int(key[-16:-8]), bytes_to_int(key[-8:]))
+
+
+KEY_CONTEXT_CACHE_SIZE = 32
+
+@lru_cache(maxsize=KEY_CONTEXT_CACHE_SIZE)
+def ascon_key_context(key, variant="Ascon-128"):
+    """
+    Returns the (cached) AsconKeyContext for key and variant.
+    key: a bytes object of size 16 or 20 (must be hashable, i.e. bytes and not bytearray)
+    variant: "Ascon-128", "Ascon-128a", or "Ascon-80pq"
+    Contexts of the most recently used keys stay cached (LRU), so several keys can be
+    active at the same time (e.g. during key rotation) without recomputing them per message.
+    """
+    assert variant in ["Ascon-128", "Ascon-128a", "Ascon-80pq"]
+    assert(len(key) == 16 or (len(key) == 20 and variant == "Ascon-80pq"))
+    return AsconKeyContext(key, variant)
+
+
 # === Ascon AEAD building blocks ===
 
 def ascon_initialize(S, k, rate, a, b, key, nonce):
@@ -94,6 +172,30 @@ def ascon_initialize(S, k, rate, a, b, key, nonce):
     if debug: printstate(S, "initialization:")
 
 
+def ascon_initialize_with_context(S, ctx, nonce):
+    """
+    Ascon initialization phase using a pre-expanded key context - internal helper function.
+    S: Ascon state, a list of 5 64-bit integers
+    ctx: an AsconKeyContext (see ascon_key_context)
+    nonce: a bytes object of size 16
+    returns nothing, updates S
+    """
+    S[0], S[1], S[2] = ctx.iv_key_words
+    S[3] = bytes_to_int(nonce[0:8])
+    S[4] = bytes_to_int(nonce[8:16])
+    if debug: printstate(S, "initial value:")
+
+    ascon_permutation(S, ctx.a)
+
+    zero_key = ctx.zero_key_words
+    S[0] ^= zero_key[0]
+    S[1] ^= zero_key[1]
+    S[2] ^= zero_key[2]
+    S[3] ^= zero_key[3]
+    S[4] ^= zero_key[4]
+    if debug: printstate(S, "initialization:")
+
+
 def ascon_process_associated_data(S, b, rate, associateddata):
     """
     Ascon associated data processing phase - internal helper function.
@@ -107,6 +209,7 @@ def ascon_process_associated_data(S, b, rate, associateddata):
         a_zeros = rate - (len(associateddata) % rate) - 1
         a_padding = to_bytes([0x80] + [0 for i in range(a_zeros)])
         a_padded = associateddata + a_padding
+        counters["bytes_absorbed"] += len(a_padded)
 
         for block in range(0, len(a_padded), rate):
             S[0] ^= bytes_to_int(a_padded[block:block+8])
@@ -131,6 +234,7 @@ def ascon_process_plaintext(S, b, rate, plaintext):
     p_lastlen = len(plaintext) % rate
     p_padding = to_bytes([0x80] + (rate-p_lastlen-1)*[0x00])
     p_padded = plaintext + p_padding
+    counters["bytes_absorbed"] += len(p_padded)
 
     # first t-1 blocks
     ciphertext = to_bytes([])
@@ -169,6 +273,7 @@ def ascon_process_ciphertext(S, b, rate, ciphertext):
     """
     c_lastlen = len(ciphertext) % rate
     c_padded = ciphertext + zero_bytes(rate - c_lastlen)
+    counters["bytes_absorbed"] += len(c_padded)
 
     # first t-1 blocks
     plaintext = to_bytes([])
@@ -231,6 +336,27 @@ def ascon_finalize(S, rate, a, key):
     return tag
 
 
+def ascon_finalize_with_context(S, ctx):
+    """
+    Ascon finalization phase using a pre-expanded key context - internal helper function.
+    S: Ascon state, a list of 5 64-bit integers
+    ctx: an AsconKeyContext (see ascon_key_context)
+    returns the tag, updates S
+    """
+    rate = ctx.rate
+    S[rate//8+0] ^= ctx.final_key_words[0]
+    S[rate//8+1] ^= ctx.final_key_words[1]
+    S[rate//8+2] ^= ctx.final_key_words[2]
+
+    ascon_permutation(S, ctx.a)
+
+    S[3] ^= ctx.tag_key_words[0]
+    S[4] ^= ctx.tag_key_words[1]
+    tag = int_to_bytes(S[3], 8) + int_to_bytes(S[4], 8)
+    if debug: printstate(S, "finalization:")
+    return tag
+
+
 # === Ascon permutation ===
 
 def ascon_permutation(S, rounds=1):
@@ -241,6 +367,7 @@ def ascon_permutation(S, rounds=1):
     returns nothing, updates S
     """
     assert(rounds <= 12)
+    permutation_calls[rounds] += 1
     if debugpermutation: printwords(S, "permutation input:")
     for r in range(12-rounds, 12):
         # --- add round constants ---
@@ -0,0 +1,416 @@
+#!/usr/bin/env python3
+"""
+Attack Campaign Runner - Serangan terjadwal non-interaktif dari file skenario JSON/YAML
+Versi otomatis dari interact_attack_simulator: beberapa tipe serangan berjalan bersamaan,
+masing-masing dengan rate, durasi, jumlah client dan jumlah proses sendiri. Pesan target
+ditangkap lewat notifikasi event (Condition), bukan polling sleep. Di akhir campaign rate
+yang tercapai dibandingkan dengan alert yang dicatat defender (alert_log / attack_monitor).
+
+Contoh skenario (lihat campaign_example.json):
+    {
+      "name": "mixed-stress",
+      "settle": 3,
+      "attacks": [
+        {"type": "dos", "rate": 2000, "duration": 20, "clients": 4, "processes": 2},
+        {"type": "raw_tampered", "rate": 5, "duration": 20, "distance": 999},
+        {"type": "enc_tampered", "rate": 5, "duration": 20, "start": 5},
+        {"type": "replayed", "rate": 10, "duration": 10, "start": 10}
+      ]
+    }
+
+rate = pesan/detik total untuk satu serangan (0 = secepat mungkin), dibagi rata ke
+processes × clients. Mode --loopback menjalankan broker, publisher dan attack_monitor
+in-process (tanpa jaringan) sehingga deteksi bisa diukur di satu mesin.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+import contextlib
+from collections import Counter
+from datetime import datetime
+
+# ===== KONFIGURASI =====
+BROKER = "broker.hivemq.com"
+PORT = 1883
+TOPIC_RAW = "iot/sensor/distance/raw"
+TOPIC_ENCRYPTED = "iot/sensor/distance/enc"
+CLIENT_PREFIX = "Campaign_Attacker"
+
+CAPTURE_TIMEOUT = 10.0      # Detik menunggu pesan target sebelum serangan dibatalkan
+SETTLE_S = 3.0              # Detik menunggu defender memproses sisa pesan sebelum laporan
+DEVICE_RATE = 5.0           # Pembacaan/detik device sintetis pada mode loopback
+MAX_BURST = 100             # Pesan per putaran pada rate 0 (secepat mungkin)
+
+# type: topic tujuan, topic yang harus ditangkap dulu (None = tidak perlu)
+ATTACKS = {
+    "dos": {"topic": TOPIC_RAW + "/dos", "source": None},
+    "raw_tampered": {"topic": TOPIC_RAW + "/tampered", "source": TOPIC_RAW},
+    "enc_tampered": {"topic": TOPIC_ENCRYPTED + "/tampered", "source": TOPIC_ENCRYPTED},
+    "replayed": {"topic": TOPIC_ENCRYPTED + "/replayed", "source": TOPIC_ENCRYPTED},
+}
+
+# ===== SKENARIO =====
+def load_scenario(path):
+    """Baca skenario JSON atau YAML (PyYAML opsional, hanya di-import untuk .yaml/.yml)"""
+    with open(path) as f:
+        if path.endswith((".yaml", ".yml")):
+            try:
+                import yaml
+            except ImportError:
+                raise SystemExit("❌ PyYAML is not installed (pip install pyyaml); use a JSON scenario")
+            scenario = yaml.safe_load(f)
+        else:
+            scenario = json.load(f)
+    return validate_scenario(scenario)
+
+def validate_scenario(scenario):
+    attacks = scenario.get("attacks") if isinstance(scenario, dict) else None
+    if not attacks:
+        raise ValueError("Scenario needs a non-empty 'attacks' list")
+    for i, attack in enumerate(attacks):
+        if attack.get("type") not in ATTACKS:
+            raise ValueError(f"attacks[{i}]: unknown type {attack.get('type')!r} "
+                             f"(expected one of {', '.join(ATTACKS)})")
+        if attack.get("rate", 10) < 0 or attack.get("duration", 10) <= 0:
+            raise ValueError(f"attacks[{i}]: rate must be >= 0 and duration > 0")
+        if attack.get("clients", 1) < 1 or attack.get("processes", 1) < 1:
+            raise ValueError(f"attacks[{i}]: clients and processes must be >= 1")
+    return scenario
+
+# ===== CAPTURE (event-driven) =====
+class Capture:
+    """Pesan terbaru per topic; wait() bangun begitu on_message menerima topic yang diminta"""
+
+    def __init__(self):
+        self.latest = {}
+        self.condition = threading.Condition()
+
+    def on_message(self, client, userdata, msg):
+        with self.condition:
+            self.latest[msg.topic] = msg.payload
+            self.condition.notify_all()
+
+    def wait(self, topic, timeout=CAPTURE_TIMEOUT):
+        with self.condition:
+            self.condition.wait_for(lambda: topic in self.latest, timeout)
+            return self.latest.get(topic)
+
+    def get(self, topic):
+        return self.latest.get(topic)
+
+# ===== PAYLOAD SERANGAN =====
+def build_payload(kind, spec, captured, seq):
+    """Payload bytes untuk pesan serangan ke-seq (captured: payload target terbaru)"""
+    if kind == "dos":
+        return json.dumps({"id": "ATTACKER", "distance": spec.get("distance", 999), "count": seq,
+                           "timestamp": time.time(), "FAKE": True}).encode('utf-8')
+    if kind == "replayed":
+        return captured   # Ciphertext valid dikirim ulang apa adanya
+    data = json.loads(captured)
+    if kind == "raw_tampered":
+        data['distance'] = spec.get("distance", 999)
+        data['TAMPERED'] = True
+        data['attack_time'] = datetime.now().isoformat()
+    elif kind == "enc_tampered":
+        ciphertext = bytearray(bytes.fromhex(data.get('encrypted_data', '')))
+        for position, mask in spec.get("flips", [[0, 0xFF], [5, 0xAA]]):
+            if position < len(ciphertext):
+                ciphertext[position] ^= mask
+        data['encrypted_data'] = ciphertext.hex()
+        data['TAMPERED'] = True
+    return json.dumps(data).encode('utf-8')
+
+# ===== TRANSPORT =====
+def make_client(client_id, loopback=None):
+    if loopback is not None:
+        from loopback import LoopbackClient
+        return LoopbackClient(loopback, client_id)
+    import paho.mqtt.client as mqtt
+    return mqtt.Client(client_id)
+
+def connect(client, scenario):
+    client.connect(scenario.get("broker", BROKER), scenario.get("port", PORT), 60)
+    client.loop_start()
+
+# ===== SATU SERANGAN =====
+def pace(rate, duration, stop, send):
+    """
+    Kirim dengan jadwal absolut (pesan ke-n pada n/rate detik) sehingga keterlambatan
+    tidak menumpuk; rate 0 = secepat mungkin. Mengembalikan (terkirim, gagal, detik aktif).
+    """
+    sent = failed = 0
+    start = time.perf_counter()
+    while not stop.is_set():
+        elapsed = time.perf_counter() - start
+        if elapsed >= duration:
+            break
+        due = min(int(elapsed * rate) + 1, max(1, int(duration * rate))) if rate else sent + failed + MAX_BURST
+        while sent + failed < due:
+            if send(sent + failed):
+                sent += 1
+            else:
+                failed += 1
+        if rate:
+            stop.wait(max(0.0, (sent + failed) / rate - (time.perf_counter() - start)))
+    return sent, failed, min(time.perf_counter() - start, duration)
+
+def run_attack(scenario, spec, worker_id=0, start_at=None, loopback=None, stop=None):
+    """
+    Jalankan satu bagian serangan (satu proses): `clients` client paralel, masing-masing
+    rate / (processes × clients). Fungsi top-level supaya bisa dijalankan di process pool.
+    """
+    kind = spec["type"]
+    attack = ATTACKS[kind]
+    stop = stop or threading.Event()
+    clients_n = spec.get("clients", 1)
+    share = spec.get("rate", 10) / (spec.get("processes", 1) * clients_n)
+    result = {"type": kind, "worker": worker_id, "sent": 0, "failed": 0, "active_s": 0.0,
+              "captured": attack["source"] is None}
+
+    capture = None
+    if attack["source"] is not None:
+        capture = Capture()
+        listener = make_client(f"{CLIENT_PREFIX}_{kind}_{worker_id}_capture", loopback)
+        listener.on_message = capture.on_message
+        connect(listener, scenario)
+        listener.subscribe(attack["source"])
+
+    if start_at is not None:
+        stop.wait(max(0.0, start_at - time.time()))
+    if capture is not None:
+        result["captured"] = capture.wait(attack["source"], scenario.get("capture_timeout", CAPTURE_TIMEOUT)) is not None
+        if not result["captured"]:
+            listener.loop_stop()
+            listener.disconnect()
+            return result
+
+    def attacker(index):
+        client = make_client(f"{CLIENT_PREFIX}_{kind}_{worker_id}_{index}", loopback)
+        connect(client, scenario)
+
+        def send(seq):
+            payload = build_payload(kind, spec, capture.get(attack["source"]) if capture else None, seq)
+            return client.publish(attack["topic"], payload).rc == 0
+
+        sent, failed, active = pace(share, spec.get("duration", 10), stop, send)
+        with lock:
+            result["sent"] += sent
+            result["failed"] += failed
+            result["active_s"] = max(result["active_s"], active)
+        client.loop_stop()
+        client.disconnect()
+
+    lock = threading.Lock()
+    threads = [threading.Thread(target=attacker, args=(i,), daemon=True) for i in range(clients_n)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if capture is not None:
+        listener.loop_stop()
+        listener.disconnect()
+    return result
+
+# ===== LOOPBACK (broker + publisher + monitor in-process) =====
+class LoopbackTarget:
+    """Device sintetis → mqtt_publisher → attack_monitor di broker loopback"""
+
+    def __init__(self, device_rate=DEVICE_RATE):
+        from loopback import LoopbackBroker
+        import mqtt_publisher
+        import attack_monitor
+
+        self.broker = LoopbackBroker()
+        self.monitor = attack_monitor
+        mqtt_publisher.THINGSPEAK_ENABLED = False
+        self.device_rate = device_rate
+        self.stop = threading.Event()
+        self.clients = []
+        for name, module in (("mqtt_publisher", mqtt_publisher), ("attack_monitor", attack_monitor)):
+            client = make_client(name, self.broker)
+            client.on_connect = module.on_connect
+            client.on_message = module.on_message
+            self.clients.append(client)
+        self.device = make_client("device", self.broker)
+        self.thread = None
+
+    def start(self):
+        for client in self.clients:
+            client.connect()
+            client.loop_start()
+        self.device.connect()
+        self.thread = threading.Thread(target=self._device_loop, daemon=True)
+        self.thread.start()
+
+    def _device_loop(self):
+        start = time.time()
+        count = 0
+        while not self.stop.is_set():
+            reading = {"id": "campaign-device", "count": count, "distance": 80 + count % 7,
+                       "timestamp": int((time.time() - start) * 1000), "unit": "cm"}
+            self.device.publish(TOPIC_RAW, json.dumps(reading))
+            count += 1
+            self.stop.wait(1.0 / self.device_rate)
+
+    def drain(self, timeout):
+        """Tunggu antrean publisher/monitor kosong (maksimal timeout detik)"""
+        deadline = time.time() + timeout
+        while time.time() < deadline and any(client.pending() for client in self.clients):
+            time.sleep(0.05)
+
+    def close(self):
+        self.stop.set()
+        if self.thread is not None:
+            self.thread.join()
+        for client in self.clients:
+            client.loop_stop()
+            client.disconnect()
+        if self.monitor.verifier is not None:
+            self.monitor.verifier.close()
+        self.monitor.alert_log.close()
+
+# ===== CAMPAIGN =====
+def run_campaign(scenario, loopback=False):
+    """Jalankan semua serangan bersamaan; kembalikan (hasil per serangan, t0, t_end)"""
+    target = LoopbackTarget(scenario.get("device_rate", DEVICE_RATE)) if loopback else None
+    attacks = scenario["attacks"]
+    if target is not None:
+        # Broker in-process tidak bisa dibagi antar proses: semua bagian jalan sebagai thread
+        attacks = [dict(spec, processes=1) for spec in attacks]
+
+    results = [[] for _ in attacks]
+    stop = threading.Event()
+    pool = None
+    futures = []
+    threads = []
+    sink = open(os.devnull, 'w') if target is not None else None
+    with contextlib.redirect_stdout(sink) if sink else contextlib.nullcontext():
+        if target is not None:
+            target.start()
+        t0 = time.time()
+        for index, spec in enumerate(attacks):
+            start_at = t0 + spec.get("start", 0)
+            processes = spec.get("processes", 1)
+            if processes > 1:
+                if pool is None:
+                    from concurrent.futures import ProcessPoolExecutor
+                    pool = ProcessPoolExecutor(sum(s.get("processes", 1) for s in attacks if s.get("processes", 1) > 1))
+                for worker_id in range(processes):
+                    futures.append((index, pool.submit(run_attack, scenario, spec, worker_id, start_at)))
+            else:
+                def local(index=index, spec=spec, start_at=start_at):
+                    results[index].append(run_attack(scenario, spec, 0, start_at,
+                                                     target.broker if target else None, stop))
+                thread = threading.Thread(target=local, daemon=True)
+                thread.start()
+                threads.append(thread)
+        try:
+            for thread in threads:
+                thread.join()
+            for index, future in futures:
+                results[index].append(future.result())
+        except KeyboardInterrupt:
+            stop.set()
+            for thread in threads:
+                thread.join()
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+        t_end = time.time()
+        settle = scenario.get("settle", SETTLE_S)
+        if target is not None:
+            target.drain(settle + 30)
+            target.close()
+        else:
+            time.sleep(settle)
+    if sink is not None:
+        sink.close()
+    return [merge_results(spec, parts) for spec, parts in zip(attacks, results)], t0, t_end + settle
+
+def merge_results(spec, parts):
+    merged = {"type": spec["type"], "topic": ATTACKS[spec["type"]]["topic"], "rate": spec.get("rate", 10),
+              "duration": spec.get("duration", 10), "clients": spec.get("clients", 1),
+              "processes": spec.get("processes", 1), "sent": 0, "failed": 0, "active_s": 0.0,
+              "captured": bool(parts) and all(part["captured"] for part in parts)}
+    for part in parts:
+        merged["sent"] += part["sent"]
+        merged["failed"] += part["failed"]
+        merged["active_s"] = max(merged["active_s"], part["active_s"])
+    merged["achieved_rate"] = merged["sent"] / merged["active_s"] if merged["active_s"] else 0.0
+    return merged
+
+# ===== DETEKSI =====
+def count_detections(alert_dir, start, end):
+    """Alert defender dalam jendela campaign: Counter per (topic, type)"""
+    from alert_log import AlertReader
+    return Counter((alert.get('topic', ''), alert['type']) for alert in AlertReader(alert_dir).query(start, end))
+
+def print_report(name, results, detections, elapsed):
+    print(f"\n🎯 CAMPAIGN REPORT: {name} ({elapsed:.1f} s)")
+    print("="*100)
+    print(f"{'Attack':<14} {'Clients':>9} {'Target/s':>9} {'Achieved/s':>11} {'Sent':>9} {'Failed':>7} "
+          f"{'Detected':>9}  Alert types")
+    print("-"*100)
+    attributed = set()
+    for result in results:
+        by_type = {alert_type: count for (topic, alert_type), count in detections.items()
+                   if topic == result["topic"]}
+        attributed.update((result["topic"], alert_type) for alert_type in by_type)
+        target = f"{result['rate']:g}" if result["rate"] else "max"
+        clients = f"{result['processes']}×{result['clients']}"
+        types = ", ".join(f"{alert_type} {count}" for alert_type, count in by_type.items())
+        if not result["captured"]:
+            types = "⚠️  no target message captured"
+        print(f"{result['type']:<14} {clients:>9} {target:>9} {result['achieved_rate']:>11,.1f} "
+              f"{result['sent']:>9,} {result['failed']:>7,} {sum(by_type.values()):>9,}  {types}")
+    other = {key: count for key, count in detections.items() if key not in attributed}
+    if other:
+        print("-"*100)
+        print("Other alerts in the campaign window:")
+        for (topic, alert_type), count in sorted(other.items(), key=lambda item: -item[1]):
+            print(f"   • {alert_type}: {count} ({topic})")
+    print("="*100)
+
+# ===== CLI =====
+def main():
+    parser = argparse.ArgumentParser(description="Jalankan campaign serangan dari file skenario JSON/YAML")
+    parser.add_argument("scenario", help="File skenario (.json / .yaml)")
+    parser.add_argument("--loopback", action="store_true",
+                        help="Broker, publisher dan attack_monitor in-process (tanpa jaringan)")
+    parser.add_argument("--alerts", help="Directory log alert defender (default: alerts/ atau skenario)")
+    parser.add_argument("--output", help="Simpan hasil sebagai JSON")
+    args = parser.parse_args()
+
+    try:
+        scenario = load_scenario(args.scenario)
+    except (OSError, ValueError) as e:
+        print(f"❌ Invalid scenario: {e}")
+        sys.exit(1)
+    name = scenario.get("name", os.path.basename(args.scenario))
+    from alert_log import ALERT_DIR
+    alert_dir = args.alerts or scenario.get("alert_dir", ALERT_DIR)
+
+    print(f"🦹 Campaign '{name}': {len(scenario['attacks'])} attacks "
+          f"({'loopback' if args.loopback else scenario.get('broker', BROKER)})")
+    for spec in scenario["attacks"]:
+        rate = f"{spec.get('rate', 10):g} msg/s" if spec.get("rate", 10) else "max rate"
+        print(f"   → {spec['type']}: {rate} for {spec.get('duration', 10):g} s, "
+              f"{spec.get('processes', 1)}×{spec.get('clients', 1)} clients, start +{spec.get('start', 0):g} s")
+
+    results, start, end = run_campaign(scenario, loopback=args.loopback)
+    detections = count_detections(alert_dir, start, end)
+    print_report(name, results, detections, end - start)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({"name": name, "start": start, "end": end, "results": results,
+                       "detections": [{"topic": topic, "type": alert_type, "count": count}
+                                      for (topic, alert_type), count in detections.items()]}, f, indent=2)
+        print(f"💾 Results saved to: {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -2,35 +2,271 @@
 """
 Real-time Attack Monitor
 Menampilkan SEMUA aktivitas: data normal, data terenkripsi, dan SERANGAN
-Monitor ini subscribe ke SEMUA topic untuk mendeteksi anomali
+Monitor ini subscribe ke SEMUA topic untuk mendeteksi anomali; nilai sensor juga
+dinilai per device oleh anomaly_detector sehingga serangan di topic "normal" tetap terlihat
 """
 
 import paho.mqtt.client as mqtt
+import sys
 import json
 import time
+import argparse
 from datetime import datetime
 from collections import deque
 import os
+import math
+from message_bus import Record
+from topic_router import TopicRouter
+from rollups import RunningStats
+from rate_limiter import RateLimiter, report_recover, sender_key, describe
+from alert_log import AlertLog, ALERT_DIR
+from replay_filter import ReplayFilter
+from history import History
+import dashboard
+import profiling
 
 # ===== KONFIGURASI =====
 BROKER = "broker.hivemq.com"
 PORT = 1883
 
-# Subscribe ke SEMUA topic yang relevan
-TOPICS = [
-    ("iot/sensor/distance/raw", 0),           # Data normal
-    ("iot/sensor/distance/enc", 0),           # Data encrypted
-    ("iot/sensor/distance/raw/tampered", 0),  # Data yang dimodifikasi attacker
-    ("iot/sensor/distance/enc/tampered", 0),  # Encrypted yang dimodifikasi
-    ("iot/sensor/distance/enc/replayed", 0),  # Replay attack
-    ("iot/sensor/distance/raw/dos", 0),       # DoS attack
+# Subscribe ke SEMUA topic yang relevan. Setiap filter (boleh pakai wildcard + / #)
+# dipetakan ke jenis pesan; topic/serangan baru cukup ditambahkan di sini.
+#   kind: "raw" / "enc" untuk data normal, "attack" untuk serangan
+#   attack: nama tipe serangan di ATTACK_TYPES
+ROUTES = [
+    {"filter": "iot/sensor/distance/raw", "kind": "raw"},                                    # Data normal
+    {"filter": "iot/sensor/distance/enc", "kind": "enc"},                                    # Data encrypted
+    {"filter": "iot/sensor/distance/raw/tampered", "kind": "attack", "attack": "raw_tampered"},  # Data yang dimodifikasi attacker
+    {"filter": "iot/sensor/distance/enc/tampered", "kind": "attack", "attack": "enc_tampered"},  # Encrypted yang dimodifikasi
+    {"filter": "iot/sensor/distance/enc/replayed", "kind": "attack", "attack": "replayed"},      # Replay attack
+    {"filter": "iot/sensor/distance/raw/dos", "kind": "attack", "attack": "dos"},                # DoS attack
 ]
 
+# encrypted: serangan terhadap data terenkripsi. "status" hanya dugaan dari nama topic; untuk
+# payload terenkripsi saat VERIFY_ENABLED status diambil dari vonis verifier (VERDICT_STATUS)
+ATTACK_TYPES = {
+    "raw_tampered": {"type": "DATA MODIFICATION ATTACK", "severity": "HIGH", "status": "SUCCESSFUL",
+                     "color": "RED", "encrypted": False},
+    "enc_tampered": {"type": "DATA MODIFICATION ATTACK", "severity": "MEDIUM", "status": "BLOCKED BY ASCON",
+                     "color": "YELLOW", "encrypted": True},
+    "replayed": {"type": "REPLAY ATTACK", "severity": "MEDIUM", "status": "SUCCESSFUL",
+                 "color": "YELLOW", "encrypted": True},
+    "dos": {"type": "DENIAL OF SERVICE", "severity": "HIGH", "status": "IN PROGRESS",
+            "color": "RED", "encrypted": False},
+    "unknown": {"type": "UNKNOWN ATTACK", "severity": "UNKNOWN", "status": "UNKNOWN",
+                "color": "RED", "encrypted": False},
+}
+
+TOPICS = [(route["filter"], 0) for route in ROUTES]
+
+# Status serangan berdasarkan vonis tag ASCON (tag_verifier), bukan nama topic
+VERDICT_STATUS = {
+    "forged": "BLOCKED BY ASCON (tag rejected)",
+    "replayed": "REPLAY (valid tag, already seen)",
+    "verified": "NOT BLOCKED (valid tag, fresh message)",
+    "malformed": "REJECTED (no ciphertext / unknown key)",
+    "unverified": "UNVERIFIED (verifier queue full)",
+}
+
+NORMAL_WINDOW = 10   # Jumlah pembacaan normal terakhir yang diingat per device
+
+# Verifikasi tag ASCON (batch, di worker) untuk semua payload terenkripsi; vonis
+# verified/forged/replayed diambil dari kriptografi, bukan dari nama topic
+VERIFY_ENABLED = True
+
+# Tanpa verifikasi: replay ditebak dari ciphertext duplikat (Bloom filter berotasi). Filter ini
+# tidak bisa membedakan junk dari ciphertext asli, jadi saat VERIFY_ENABLED replay diambil dari
+# vonis verifier (hanya ciphertext yang tag-nya valid yang diingat)
+REPLAY_FILTER_ENABLED = True
+
+# Rate limit per (topic, device) sebelum decode: pengirim yang flood hanya disampel,
+# device lain di topic yang sama tetap diproses penuh
+RATE_LIMIT_ENABLED = True
+RATE_LIMIT = {"rate": 50, "burst": 200, "action": "sample", "sample_every": 100}
+
+HISTORY_CAPACITY = 50   # Record pesan terakhir yang disimpan (payload bytes, waktu epoch, id topic)
+
 # ===== STORAGE =====
-message_history = deque(maxlen=50)  # Keep last 50 messages
-attack_detected = []
+message_history = History(HISTORY_CAPACITY)   # Record __slots__, string dibuat saat ditampilkan
+alert_log = AlertLog(ALERT_DIR)     # JSONL ter-rotasi di alerts/ (lihat alert_log.py)
+attack_detected = alert_log.tail     # Tail terbatas untuk dashboard/statistik
 normal_messages = 0
 attack_messages = 0
+anomaly_alerts = 0
+detector = None            # AnomalyDetector, dibuat saat pembacaan pertama (import NumPy tertunda)
+replay_filter = ReplayFilter()
+replays_detected = 0
+verifier = None            # TagVerifier, worker dimulai saat payload terenkripsi pertama
+normal_index = {}          # device -> DeviceBaseline (hanya pembacaan normal dengan distance)
+last_normal_device = None
+
+# ===== FLOOD DETECTION =====
+def on_flood(key, rate):
+    """Dipanggil sekali per episode flood (per topic + device) oleh rate limiter"""
+    topic, device = key
+    print_colored(f"\n🚦 [ALERT] FLOOD on {describe(key)}: ~{rate:.0f} msg/s, "
+                  f"processing 1 of every {limiter.sample_every} messages from this sender", Colors.RED)
+    alert_log.append({
+        'timestamp': datetime.now().strftime('%H:%M:%S.%f')[:-3],
+        'type': "MESSAGE FLOOD",
+        'topic': topic,
+        'device': device,
+        'severity': "HIGH",
+        'rate': round(rate, 1)
+    })
+
+limiter = RateLimiter(on_flood=on_flood, on_recover=report_recover, **RATE_LIMIT)
+
+# ===== TAG VERIFICATION =====
+def log_attack(topic, attack, t, verdict):
+    """Alert serangan terenkripsi dengan status dari vonis verifier (satu alert per pesan)"""
+    status = VERDICT_STATUS[verdict]
+    color = Colors.RED if verdict == "verified" else getattr(Colors, attack["color"])
+    print_colored(f"🔏 Verdict for {attack['type']} on {topic}: {status}", color)
+    alert_log.append({
+        't': t,
+        'timestamp': datetime.fromtimestamp(t).strftime('%H:%M:%S.%f')[:-3],
+        'type': attack["type"],
+        'topic': topic,
+        'severity': "HIGH" if verdict == "verified" else attack["severity"],
+        'verdict': verdict,
+        'status': status
+    })
+
+def on_verdict(topic, status, t):
+    """
+    Dipanggil dari thread verifier. Topic serangan: alert serangan dicatat di sini dengan
+    vonisnya (handle_attack_message menunda alert). Topic normal: hanya vonis negatif
+    yang menjadi alert. Vonis tetap dihitung di statistik verifier.
+    """
+    global replays_detected
+    if status == "replayed":
+        replays_detected += 1
+    kind, attack = classify(topic)
+    if kind == "attack":
+        log_attack(topic, attack or ATTACK_TYPES["unknown"], t, status)
+        return
+    if status not in ("forged", "replayed"):
+        return
+    alert_log.append({
+        't': t,
+        'timestamp': datetime.fromtimestamp(t).strftime('%H:%M:%S.%f')[:-3],
+        'type': "FORGED CIPHERTEXT" if status == "forged" else "VERIFIED REPLAY",
+        'topic': topic,
+        'severity': "MEDIUM" if status == "forged" else "HIGH"
+    })
+
+def check_replay(topic, encrypted_hex, t, is_attack):
+    """
+    Fingerprint ciphertext (hanya saat verifikasi nonaktif); duplikat di topic 'normal'
+    juga dicatat sebagai alert. Tanpa cek tag, junk ikut dicatat: best effort.
+    """
+    global replays_detected
+    try:
+        ciphertext = bytes.fromhex(encrypted_hex)
+    except (TypeError, ValueError):
+        return
+    if not replay_filter.check_and_add(ciphertext):
+        return
+    replays_detected += 1
+    print_colored(f"🔁 REPLAY DETECTED: ciphertext already seen (filter, {topic})", Colors.RED)
+    if not is_attack:
+        alert_log.append({
+            't': t,
+            'timestamp': datetime.fromtimestamp(t).strftime('%H:%M:%S.%f')[:-3],
+            'type': "DUPLICATE CIPHERTEXT",
+            'topic': topic,
+            'severity': "HIGH"
+        })
+
+def verify_encrypted(topic, data, t):
+    """False bila pesan tidak terverifikasi (antrian verifier penuh)"""
+    global verifier
+    if verifier is None:
+        from tag_verifier import TagVerifier
+        verifier = TagVerifier(on_verdict=on_verdict)
+    return verifier.submit(topic, data, t)
+
+# ===== LAST-KNOWN-GOOD INDEX =====
+class DeviceBaseline:
+    """N pembacaan normal terakhir satu device + statistik baseline (Welford) sejak awal"""
+    __slots__ = ('recent', 'stats')
+
+    def __init__(self, size=NORMAL_WINDOW):
+        self.recent = deque(maxlen=size)   # distance, terbaru di kanan
+        self.stats = RunningStats()
+
+    def add(self, distance):
+        self.recent.append(distance)
+        self.stats.add(distance)
+
+    def last(self):
+        return self.recent[-1]
+
+def device_id(data):
+    """id device dari payload; hanya str yang dipakai sebagai key (id dari attacker bisa list/dict)"""
+    device = data.get('id') if hasattr(data, 'get') else None
+    return device if isinstance(device, str) else 'unknown'
+
+def reading_value(data):
+    """distance sebagai float hingga, atau None (bool, NaN/inf, int di luar jangkauan float)"""
+    distance = data.get('distance') if hasattr(data, 'get') else None
+    if not isinstance(distance, (int, float)) or isinstance(distance, bool):
+        return None
+    try:
+        distance = float(distance)
+    except OverflowError:
+        return None
+    return distance if math.isfinite(distance) else None
+
+def index_normal(data):
+    """Update index dari payload normal yang sudah di-parse; O(1), tanpa json.loads ulang"""
+    global last_normal_device
+    distance = reading_value(data)
+    if distance is None:
+        return
+    device = device_id(data)
+    baseline = normal_index.get(device)
+    if baseline is None:
+        baseline = normal_index[device] = DeviceBaseline()
+    baseline.add(distance)
+    last_normal_device = device
+
+def check_anomaly(device, value, t, is_attack):
+    """Nilai pembacaan dengan detektor statistik, apapun topic-nya"""
+    global detector, anomaly_alerts
+    if detector is None:
+        from anomaly_detector import AnomalyDetector
+        detector = AnomalyDetector()
+    score = detector.update(device, value, t)   # None untuk nilai non-finite / di luar jangkauan float
+    if score is None or not score['flags']:
+        return
+    from anomaly_detector import describe
+    anomaly_alerts += 1
+    reasons = ", ".join(describe(int(score['flags'])))
+    print_colored(f"🧪 STATISTICAL ANOMALY ({reasons})", Colors.RED)
+    print(f"   Device: {device} | Value: {value} | z={score['z']:.1f} robust z={score['robust_z']:.1f} "
+          f"| rate={score['rate']:.1f}/s | interval={score['inter_arrival']:.3f} s")
+    if not is_attack:
+        # Topic terlihat normal, tapi nilainya tidak
+        alert_log.append({
+            't': t,
+            'timestamp': datetime.fromtimestamp(t).strftime('%H:%M:%S.%f')[:-3],
+            'type': "STATISTICAL ANOMALY",
+            'topic': f"{device}: {reasons}",
+            'severity': "MEDIUM",
+            'device': device,
+            'value': value
+        })
+
+def baseline_for(device):
+    """
+    (device, baseline) untuk device yang sama. Pesan tanpa id atau dengan id yang belum
+    pernah mengirim data normal (mis. "ATTACKER") dibandingkan dengan device normal terakhir.
+    """
+    if not isinstance(device, str) or device not in normal_index:
+        device = last_normal_device
+    return device, normal_index.get(device)
 
 # ===== COLORS FOR TERMINAL =====
 class Colors:
@@ -44,8 +280,23 @@ class Colors:
     UNDERLINE = '\033[4m'
     END = '\033[0m'
 
+# ===== TOPIC ROUTING =====
+def build_router(routes=ROUTES):
+    """Kompilasi ROUTES menjadi trie; nilai = (kind, info serangan atau None)"""
+    router = TopicRouter()
+    for route in routes:
+        attack = ATTACK_TYPES[route.get("attack", "unknown")] if route["kind"] == "attack" else None
+        router.add(route["filter"], (route["kind"], attack))
+    return router
+
+router = build_router()
+UNROUTED = (None, None)   # Topic di luar ROUTES diperlakukan sebagai pesan normal
+
+def classify(topic):
+    return router.lookup(topic, UNROUTED)
+
 def clear_screen():
-    os.system('cls' if os.name == 'nt' else 'clear')
+    dashboard.clear_screen()   # ANSI, tanpa spawn proses 'clear'/'cls'
 
 def print_colored(text, color):
     print(f"{color}{text}{Colors.END}")
@@ -63,40 +314,60 @@ def on_connect(client, userdata, flags, rc):
         print_colored(f"❌ Connection failed with code {rc}", Colors.RED)
 
 def on_message(client, userdata, msg):
+    if RATE_LIMIT_ENABLED and not limiter.allow(sender_key(msg.topic, msg.payload)):
+        return   # Flood: dibuang sebelum decode
+    handle_record(client, Record.from_message(msg))
+
+def handle_record(client, record):
+    """Klasifikasi satu Record yang sudah di-decode (dipakai juga oleh gateway)"""
     global normal_messages, attack_messages
     
-    timestamp = datetime.now().strftime('%H:%M:%S.%f')[:-3]
-    topic = msg.topic
-    payload = msg.payload.decode('utf-8')
+    timestamp = datetime.fromtimestamp(record.receive_time).strftime('%H:%M:%S.%f')[:-3]
+    topic = record.topic
+    payload = record.text
     
     # Detect attack based on topic
-    is_attack = any(keyword in topic for keyword in ['tampered', 'replayed', 'dos'])
+    route = classify(topic)
+    is_attack = route[0] == "attack"
+    encrypted_hex = record.get('encrypted_data')
+    # Payload terenkripsi di topic serangan: status & alert menunggu vonis verifier
+    verify = is_attack and VERIFY_ENABLED and encrypted_hex is not None
     
     if is_attack:
         attack_messages += 1
-        handle_attack_message(timestamp, topic, payload)
+        handle_attack_message(timestamp, topic, payload, record.data, route, verify)
     else:
         normal_messages += 1
-        handle_normal_message(timestamp, topic, payload)
+        handle_normal_message(timestamp, topic, payload, record.data, route)
+    
+    if encrypted_hex is not None:
+        if VERIFY_ENABLED:
+            # Replay & status serangan terenkripsi dari vonis
+            if not verify_encrypted(topic, record.data, record.receive_time) and verify:
+                log_attack(topic, route[1] or ATTACK_TYPES["unknown"], record.receive_time, "unverified")
+        elif REPLAY_FILTER_ENABLED:
+            check_replay(topic, encrypted_hex, record.receive_time, is_attack)
+    
+    distance = reading_value(record)
+    if distance is not None:
+        check_anomaly(device_id(record), distance, record.receive_time, is_attack)
     
     # Store in history
-    message_history.append({
-        'timestamp': timestamp,
-        'topic': topic,
-        'payload': payload,
-        'is_attack': is_attack
-    })
+    message_history.append(record.receive_time, topic, record.payload, is_attack)
 
-def handle_normal_message(timestamp, topic, payload):
+def handle_normal_message(timestamp, topic, payload, data=None, route=None):
     """Handle normal legitimate messages"""
+    kind = (route or classify(topic))[0]
     print(f"\n{Colors.CYAN}{'='*80}{Colors.END}")
     print_colored(f"[{timestamp}] 📨 NORMAL MESSAGE #{normal_messages}", Colors.GREEN)
     print(f"📍 Topic: {topic}")
     
     try:
-        data = json.loads(payload)
+        if data is None:
+            data = json.loads(payload)
         
-        if topic.endswith('/raw'):
+        if kind == "raw":
+            index_normal(data)
             # Unencrypted data
             print_colored("🔓 Type: UNENCRYPTED DATA", Colors.YELLOW)
             print(f"   Device: {data.get('id', 'N/A')}")
@@ -104,7 +375,7 @@ def handle_normal_message(timestamp, topic, payload):
             print(f"   Count: {data.get('count', 'N/A')}")
             print_colored("   ⚠️  Warning: This data is NOT protected!", Colors.YELLOW)
             
-        elif topic.endswith('/enc'):
+        elif kind == "enc":
             # Encrypted data
             print_colored("🔐 Type: ENCRYPTED DATA", Colors.CYAN)
             encrypted_hex = data.get('encrypted_data', '')
@@ -115,47 +386,38 @@ def handle_normal_message(timestamp, topic, payload):
             
     except json.JSONDecodeError:
         print(f"   Payload (raw): {payload[:100]}...")
+    except (TypeError, ValueError, AttributeError, OverflowError) as e:
+        print(f"   Malformed payload ({e}): {payload[:100]}...")
 
-def handle_attack_message(timestamp, topic, payload):
-    """Handle attack messages with alert"""
+def handle_attack_message(timestamp, topic, payload, data=None, route=None, verify=False):
+    """
+    Handle attack messages with alert. verify=True: payload terenkripsi yang sedang
+    diverifikasi; status dan alert dicatat on_verdict dari vonis tag, bukan dari topic.
+    """
     print(f"\n{Colors.RED}{'='*80}{Colors.END}")
     print_colored(f"🚨 [ALERT] ATTACK DETECTED! #{attack_messages}", Colors.RED)
     print_colored(f"[{timestamp}]", Colors.RED)
     print(f"📍 Topic: {Colors.RED}{topic}{Colors.END}")
     
     # Determine attack type
-    if 'tampered' in topic:
-        attack_type = "DATA MODIFICATION ATTACK"
-        if 'raw' in topic:
-            attack_severity = "HIGH"
-            attack_status = "SUCCESSFUL"
-            color = Colors.RED
-        else:
-            attack_severity = "MEDIUM"
-            attack_status = "BLOCKED BY ASCON"
-            color = Colors.YELLOW
-    elif 'replayed' in topic:
-        attack_type = "REPLAY ATTACK"
-        attack_severity = "MEDIUM"
-        attack_status = "SUCCESSFUL"
-        color = Colors.YELLOW
-    elif 'dos' in topic:
-        attack_type = "DENIAL OF SERVICE"
-        attack_severity = "HIGH"
-        attack_status = "IN PROGRESS"
-        color = Colors.RED
-    else:
-        attack_type = "UNKNOWN ATTACK"
-        attack_severity = "UNKNOWN"
-        attack_status = "UNKNOWN"
-        color = Colors.RED
+    attack = (route or classify(topic))[1] or ATTACK_TYPES["unknown"]
+    attack_type = attack["type"]
+    attack_severity = attack["severity"]
+    attack_status = attack["status"]
+    color = getattr(Colors, attack["color"])
     
     print_colored(f"🔨 Attack Type: {attack_type}", color)
     print_colored(f"⚠️  Severity: {attack_severity}", color)
-    print_colored(f"📊 Status: {attack_status}", color)
+    if verify:
+        print_colored("📊 Status: PENDING ASCON TAG VERIFICATION", color)
+    elif attack["encrypted"]:
+        print_colored(f"📊 Status: {attack_status} (assumed from topic, not verified)", color)
+    else:
+        print_colored(f"📊 Status: {attack_status}", color)
     
     try:
-        data = json.loads(payload)
+        if data is None:
+            data = json.loads(payload)
         
         # Show what was modified
         if data.get('TAMPERED'):
@@ -175,46 +437,50 @@ def handle_attack_message(timestamp, topic, payload):
             if 'FAKE' in data:
                 print(f"   {Colors.RED}⚠️  This is a FAKE message from attacker!{Colors.END}")
         
-        # Compare with recent normal messages
-        if message_history:
-            recent_normals = [m for m in message_history if not m['is_attack']]
-            if recent_normals:
-                last_normal = recent_normals[-1]
-                try:
-                    last_data = json.loads(last_normal['payload'])
-                    if 'distance' in last_data and 'distance' in data:
-                        normal_distance = last_data.get('distance')
-                        attack_distance = data.get('distance')
-                        diff = abs(attack_distance - normal_distance)
-                        
-                        print_colored("\n📊 COMPARISON WITH NORMAL DATA:", Colors.YELLOW)
-                        print(f"   Normal value: {normal_distance} cm")
-                        print(f"   Attacked value: {Colors.RED}{attack_distance} cm{Colors.END}")
-                        print(f"   Difference: {Colors.RED}{diff} cm{Colors.END}")
-                        
-                        if diff > 50:
-                            print(f"   {Colors.RED}🚨 ANOMALY: Huge difference detected!{Colors.END}")
-                except:
-                    pass
+        # Compare with recent normal messages dari device yang sama
+        device, baseline = baseline_for(device_id(data))
+        attack_distance = reading_value(data)
+        if baseline is not None and attack_distance is not None:
+            normal_distance = baseline.last()
+            diff = abs(attack_distance - normal_distance)
+            stats = baseline.stats
+            
+            print_colored("\n📊 COMPARISON WITH NORMAL DATA:", Colors.YELLOW)
+            print(f"   Normal value: {normal_distance} cm (device {device})")
+            print(f"   Baseline: {stats.mean:.1f} ± {stats.std():.1f} cm "
+                  f"(n={stats.n}, range {stats.min}-{stats.max} cm)")
+            print(f"   Attacked value: {Colors.RED}{attack_distance} cm{Colors.END}")
+            print(f"   Difference: {Colors.RED}{diff} cm{Colors.END}")
+            
+            if diff > 50:
+                print(f"   {Colors.RED}🚨 ANOMALY: Huge difference detected!{Colors.END}")
     
     except json.JSONDecodeError:
         print(f"   Payload: {payload[:100]}...")
+    except (TypeError, ValueError, AttributeError, OverflowError) as e:
+        # Field dengan tipe tak terduga (mis. distance string, payload list) tidak boleh
+        # menjatuhkan thread network paho
+        print(f"   Malformed attack payload ({e}): {payload[:100]}...")
     
-    # Log attack
-    attack_detected.append({
-        'timestamp': timestamp,
-        'type': attack_type,
-        'topic': topic,
-        'severity': attack_severity
-    })
+    # Log attack (langsung ke JSONL, tidak menunggu exit); payload terenkripsi dicatat
+    # on_verdict setelah tag diverifikasi
+    if not verify:
+        alert_log.append({
+            'timestamp': timestamp,
+            'type': attack_type,
+            'topic': topic,
+            'severity': attack_severity
+        })
     
     print_colored("\n💡 RECOMMENDATION:", Colors.YELLOW)
-    if 'raw' in topic:
+    if not attack["encrypted"]:
         print("   → Use encryption to prevent data modification!")
         print("   → ASCON can protect against this attack")
+    elif verify:
+        print("   → ASCON tag verification decides whether this message is rejected")
+        print("   → The verdict is logged with the alert")
     else:
-        print("   → ASCON detected and blocked this attack")
-        print("   → Encrypted data integrity is maintained")
+        print("   → Enable tag verification (VERIFY_ENABLED) to confirm ASCON rejected it")
 
 def print_statistics():
     """Print monitoring statistics"""
@@ -225,60 +491,123 @@ def print_statistics():
     print(f"\n📨 Total Messages: {normal_messages + attack_messages}")
     print_colored(f"   ✅ Normal: {normal_messages}", Colors.GREEN)
     print_colored(f"   🚨 Attacks: {attack_messages}", Colors.RED)
+    print_colored(f"   🧪 Statistical anomalies: {anomaly_alerts}", Colors.YELLOW)
+    print_colored(f"   🔁 Replays: {replays_detected}", Colors.YELLOW)
     
     if attack_messages > 0:
         attack_rate = (attack_messages / (normal_messages + attack_messages)) * 100
         print(f"\n⚠️  Attack Rate: {Colors.RED}{attack_rate:.1f}%{Colors.END}")
     
-    if attack_detected:
+    if alert_log.total:
         print(f"\n🔍 ATTACK BREAKDOWN:")
-        attack_types = {}
-        for attack in attack_detected:
-            attack_type = attack['type']
-            attack_types[attack_type] = attack_types.get(attack_type, 0) + 1
-        
-        for attack_type, count in attack_types.items():
-            print(f"   • {attack_type}: {count}")
+        alert_log.print_breakdown()
+    
+    if detector is not None:
+        detector.print_summary()
+    if limiter.limited:
+        limiter.print_statistics()
+    if verifier is not None:
+        verifier.print_report()
+    if replay_filter.checked:
+        replay_filter.print_report()
     
     print(f"\n{Colors.CYAN}{'='*80}{Colors.END}")
 
-def print_live_dashboard():
-    """Print live dashboard (updated periodically)"""
-    clear_screen()
-    
-    print(f"{Colors.BOLD}{Colors.CYAN}{'='*80}{Colors.END}")
-    print(f"{Colors.BOLD}{'  🔍 REAL-TIME ATTACK MONITOR - IoT Security Dashboard':^80}{Colors.END}")
-    print(f"{Colors.CYAN}{'='*80}{Colors.END}\n")
-    
-    # Status
-    print(f"{Colors.GREEN}🟢 MONITORING ACTIVE{Colors.END} | Broker: {BROKER}:{PORT}")
-    print(f"⏰ Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+# ===== LIVE DASHBOARD =====
+def dashboard_snapshot():
+    """
+    Snapshot tanpa lock untuk thread dashboard: counter int dibaca langsung dan container
+    kecil di-copy dengan satu operasi C (slice list / list(deque)) yang atomic di bawah GIL
+    """
+    total = normal_messages + attack_messages
+    version = (total, alert_log.total, anomaly_alerts, limiter.limited)
+    return version, {
+        'time': time.monotonic(),
+        'normal': normal_messages,
+        'attack': attack_messages,
+        'anomalies': anomaly_alerts,
+        'limited': limiter.limited,
+        'attacks': list(attack_detected)[-5:],
+        'history': message_history.recent(5),
+        'verdicts': verifier.snapshot() if verifier is not None else {},
+    }
+
+_rate_state = {'total': 0, 'time': None, 'rate': 0.0}   # Hanya disentuh thread renderer
+
+def dashboard_lines(state, elapsed=0.0):
+    """Render satu frame dashboard menjadi list baris"""
+    total = state['normal'] + state['attack']
+    if _rate_state['time'] is not None and state['time'] - _rate_state['time'] >= 1.0:
+        _rate_state['rate'] = (total - _rate_state['total']) / (state['time'] - _rate_state['time'])
+    if _rate_state['time'] is None or state['time'] - _rate_state['time'] >= 1.0:
+        _rate_state['total'] = total
+        _rate_state['time'] = state['time']
     
-    # Stats boxes
-    print(f"┌{'─'*25}┬{'─'*25}┬{'─'*25}┐")
-    print(f"│ {'NORMAL MESSAGES':^23} │ {'ATTACK MESSAGES':^23} │ {'TOTAL MESSAGES':^23} │")
-    print(f"│ {Colors.GREEN}{normal_messages:^23}{Colors.END} │ {Colors.RED}{attack_messages:^23}{Colors.END} │ {normal_messages + attack_messages:^23} │")
-    print(f"└{'─'*25}┴{'─'*25}┴{'─'*25}┘\n")
+    lines = [
+        f"{Colors.BOLD}{Colors.CYAN}{'='*80}{Colors.END}",
+        f"{Colors.BOLD}{'  🔍 REAL-TIME ATTACK MONITOR - IoT Security Dashboard':^80}{Colors.END}",
+        f"{Colors.CYAN}{'='*80}{Colors.END}",
+        "",
+        # Status
+        f"{Colors.GREEN}🟢 MONITORING ACTIVE{Colors.END} | Broker: {BROKER}:{PORT}",
+        f"⏰ Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} | Rate: {_rate_state['rate']:,.0f} msg/s",
+        "",
+        # Stats boxes
+        f"┌{'─'*25}┬{'─'*25}┬{'─'*25}┐",
+        f"│ {'NORMAL MESSAGES':^23} │ {'ATTACK MESSAGES':^23} │ {'TOTAL MESSAGES':^23} │",
+        f"│ {Colors.GREEN}{state['normal']:^23}{Colors.END} │ {Colors.RED}{state['attack']:^23}{Colors.END} │ {total:^23} │",
+        f"└{'─'*25}┴{'─'*25}┴{'─'*25}┘",
+        f"🧪 Statistical anomalies: {state['anomalies']} | 🚦 Rate-limited: {state['limited']}",
+        "🔏 Tag verification: " + (" | ".join(f"{status} {count}" for status, count in state['verdicts'].items())
+                                  or "no encrypted traffic"),
+        "",
+    ]
     
     # Recent attacks
-    if attack_detected:
-        print(f"{Colors.RED}🚨 RECENT ATTACKS:{Colors.END}")
-        for attack in list(attack_detected)[-5:]:
-            print(f"   [{attack['timestamp']}] {attack['type']} - Severity: {attack['severity']}")
-        print()
+    if state['attacks']:
+        lines.append(f"{Colors.RED}🚨 RECENT ATTACKS:{Colors.END}")
+        for attack in state['attacks']:
+            lines.append(f"   [{attack['timestamp']}] {attack['type']} - Severity: {attack['severity']}")
+        lines.append("")
     
     # Recent messages
-    print(f"{Colors.CYAN}📨 RECENT ACTIVITY (Last 5 messages):{Colors.END}")
-    for msg in list(message_history)[-5:]:
-        icon = "🚨" if msg['is_attack'] else "📨"
-        color = Colors.RED if msg['is_attack'] else Colors.GREEN
-        topic_short = msg['topic'].split('/')[-1]
-        print(f"   {color}{icon} [{msg['timestamp']}] {topic_short}{Colors.END}")
+    lines.append(f"{Colors.CYAN}📨 RECENT ACTIVITY (Last 5 messages):{Colors.END}")
+    for msg in state['history']:
+        icon = "🚨" if msg.is_attack else "📨"
+        color = Colors.RED if msg.is_attack else Colors.GREEN
+        topic_short = message_history.topic(msg).split('/')[-1]
+        lines.append(f"   {color}{icon} [{msg.clock()}] {topic_short}{Colors.END}")
     
-    print(f"\n{Colors.YELLOW}💡 Watching all topics... Press Ctrl+C to stop{Colors.END}")
+    lines.append("")
+    lines.append(f"{Colors.YELLOW}💡 Watching all topics... Press Ctrl+C to stop{Colors.END}")
+    return lines
+
+def print_live_dashboard():
+    """Print live dashboard sekali (mode dashboard memakai dashboard.Dashboard)"""
+    clear_screen()
+    print("\n".join(dashboard_lines(dashboard_snapshot()[1])))
+
+def save_attack_log():
+    """Flush dan tutup log alert (alert sudah ditulis bertahap selama monitoring)"""
+    alert_log.close()
+    if alert_log.total:
+        print_colored(f"\n💾 {alert_log.total} alerts logged to: {alert_log.directory}/ "
+                      f"(query: python alert_log.py --summary)", Colors.GREEN)
+
+def shutdown():
+    if verifier is not None:
+        verifier.close()   # Selesaikan antrian verifikasi sebelum statistik dicetak
+    print_statistics()
+    save_attack_log()
 
 # ===== MAIN PROGRAM =====
 def main():
+    parser = argparse.ArgumentParser(description="Real-time attack monitor")
+    parser.add_argument("--dashboard", action="store_true",
+                        help="Tampilkan live dashboard (detail per pesan disembunyikan)")
+    parser.add_argument("--fps", type=float, default=dashboard.FPS, help="Frame rate dashboard")
+    args = parser.parse_args()
+    
     clear_screen()
     print_colored("="*80, Colors.CYAN)
     print_colored("  🔍 REAL-TIME ATTACK MONITOR", Colors.BOLD)
@@ -292,52 +621,56 @@ def main():
     
     input("\nPress ENTER to start monitoring...")
     
+    # Pesan diproses di thread network (loop_start), jadi pakai stack sampling semua thread
+    profiling.install("monitor", mode="sample")
+    
     # Setup MQTT client
     client = mqtt.Client("Attack_Monitor")
     client.on_connect = on_connect
     client.on_message = on_message
     
+    live = None
+    console = sys.stdout
     try:
         print("\n🔌 Connecting to MQTT broker...")
         client.connect(BROKER, PORT, 60)
         
+        if args.dashboard:
+            # Output per pesan dibuang; dashboard menulis langsung ke terminal
+            sys.stdout = open(os.devnull, 'w')
+            live = dashboard.Dashboard(dashboard_snapshot, dashboard_lines, fps=args.fps, stream=console)
+            live.start()
+        
         # Start monitoring
         client.loop_start()
         
-        # Keep running and show live stats every 5 seconds
-        last_update = time.time()
         while True:
             time.sleep(0.5)
-            
-            # Update dashboard every 5 seconds if there's activity
-            if time.time() - last_update > 5 and (normal_messages + attack_messages) > 0:
-                # Don't clear if recent messages to avoid missing info
-                # print_live_dashboard()
-                last_update = time.time()
+            alert_log.maybe_flush()
         
     except KeyboardInterrupt:
+        stop_dashboard(live, console)
         print_colored("\n\n🛑 Stopping monitor...", Colors.YELLOW)
-        print_statistics()
-        
-        # Save log to file
-        if attack_detected:
-            filename = f"attack_log_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
-            with open(filename, 'w') as f:
-                f.write("ATTACK LOG\n")
-                f.write("="*80 + "\n\n")
-                for attack in attack_detected:
-                    f.write(f"[{attack['timestamp']}] {attack['type']}\n")
-                    f.write(f"  Topic: {attack['topic']}\n")
-                    f.write(f"  Severity: {attack['severity']}\n\n")
-            
-            print_colored(f"\n💾 Attack log saved to: {filename}", Colors.GREEN)
         
+    except Exception as e:
+        stop_dashboard(live, console)
+        print_colored(f"\n❌ Error: {e}", Colors.RED)
+    
+    finally:
+        # Semua jalur keluar: hentikan network dulu, lalu selesaikan antrian verifier dan
+        # flush alert yang masih di-buffer (crash path paling butuh log lengkap)
+        stop_dashboard(live, console)
         client.loop_stop()
         client.disconnect()
+        shutdown()
         print_colored("\n👋 Monitor stopped. Goodbye!", Colors.CYAN)
-        
-    except Exception as e:
-        print_colored(f"\n❌ Error: {e}", Colors.RED)
+
+def stop_dashboard(live, console):
+    if live is not None and not live.stopped.is_set():
+        live.stop()
+    if sys.stdout is not console:
+        sys.stdout.close()
+        sys.stdout = console
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
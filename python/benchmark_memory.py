@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Memory Benchmark - Alokasi per pesan dengan tracemalloc
+Mengukur peak memory sementara (churn) dan memory yang tertahan per operasi untuk
+encrypt, decrypt, satu pesan publisher dan satu pesan subscriber, lalu membandingkan
+dengan budget di memory_budget.json (gagal bila melewati budget).
+"""
+
+import os
+import sys
+import json
+import argparse
+import contextlib
+import tracemalloc
+from array import array
+
+# ===== KONFIGURASI =====
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+BUDGET_FILE = os.path.join(SCRIPT_DIR, "memory_budget.json")
+ITERATIONS = 500
+WARMUP = 200
+TOLERANCE = 0.10          # Toleransi relatif terhadap budget
+RETAINED_SLACK = 64       # Byte/op toleransi absolut untuk memory tertahan (noise allocator)
+
+SAMPLE_READING = {"id": "ESP32_001", "count": 1234, "distance": 82, "timestamp": 5123456, "unit": "cm"}
+
+# ===== OPERASI =====
+def build_operations():
+    """Kembalikan {nama: fungsi tanpa argumen} untuk setiap operasi yang diukur"""
+    import ascon
+    import mqtt_publisher
+    import mqtt_subscriber
+    from loopback import LoopbackBroker, LoopbackClient, LoopbackMessage
+
+    mqtt_publisher.THINGSPEAK_ENABLED = False
+    mqtt_subscriber.TRACE_ENABLED = False   # Tanpa file trace saat benchmark
+    mqtt_publisher.RATE_LIMIT_ENABLED = False
+    mqtt_subscriber.RATE_LIMIT_ENABLED = False
+    mqtt_subscriber.REPLAY_FILTER_ENABLED = False   # Pesan yang sama diukur berulang kali
+
+    key = mqtt_publisher.KEY
+    nonce = mqtt_publisher.NONCE
+    ad = mqtt_publisher.ASSOCIATED_DATA
+    variant = mqtt_publisher.VARIANT
+    plaintext = json.dumps(SAMPLE_READING).encode('utf-8')
+    ciphertext = ascon.ascon_encrypt(key, nonce, ad, plaintext, variant)
+
+    # Satu pesan publisher yang ditangkap menjadi input subscriber; setelah capture dilepas,
+    # publish() tetap sukses tapi tidak dikirim ke mana-mana
+    broker = LoopbackBroker()
+    client = LoopbackClient(broker, "bench_memory")
+    client.connect()
+    captured = []
+    capture = LoopbackClient(broker, "bench_capture")
+    capture.on_message = lambda c, userdata, msg: captured.append(msg.payload)
+    capture.connect()
+    capture.subscribe(mqtt_subscriber.TOPIC_ENCRYPTED)
+
+    raw_msg = LoopbackMessage(mqtt_publisher.TOPIC_RAW, plaintext)
+    mqtt_publisher.on_message(client, None, raw_msg)
+    capture.disconnect()
+    enc_msg = LoopbackMessage(mqtt_subscriber.TOPIC_ENCRYPTED, captured[0])
+
+    return {
+        "encrypt": lambda: ascon.ascon_encrypt(key, nonce, ad, plaintext, variant),
+        "decrypt": lambda: ascon.ascon_decrypt(key, nonce, ad, ciphertext, variant),
+        "publisher_message": lambda: mqtt_publisher.on_message(client, None, raw_msg),
+        "subscriber_message": lambda: mqtt_subscriber.on_message(client, None, enc_msg),
+    }
+
+# ===== PENGUKURAN =====
+def measure(operation, iterations=ITERATIONS, warmup=WARMUP, top=0):
+    """
+    peak_bytes: median dan max dari memory puncak di atas baseline selama satu operasi (churn)
+    retained_bytes_per_op: pertumbuhan memory tertahan dibagi jumlah operasi (indikasi leak)
+    """
+    for _ in range(warmup):
+        operation()
+
+    # Buffer hasil dialokasikan sebelum tracing supaya tidak ikut terhitung sebagai memory tertahan
+    peaks = array('q', bytes(8 * iterations))
+    tracemalloc.start(25 if top else 1)
+    baseline = tracemalloc.take_snapshot() if top else None
+    start_current, _ = tracemalloc.get_traced_memory()
+    for i in range(iterations):
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        operation()
+        _, peak = tracemalloc.get_traced_memory()
+        peaks[i] = peak - before
+    end_current, _ = tracemalloc.get_traced_memory()
+    sites = []
+    if top:
+        ignore = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+        diff = tracemalloc.take_snapshot().filter_traces(ignore).compare_to(baseline.filter_traces(ignore), "lineno")
+        sites = [(str(stat.traceback[0]), stat.size_diff, stat.count_diff) for stat in diff[:top]]
+    tracemalloc.stop()
+
+    peaks = sorted(peaks)
+    return {
+        "peak_bytes": peaks[len(peaks) // 2],
+        "peak_bytes_max": peaks[-1],
+        "retained_bytes_per_op": max(end_current - start_current, 0) / iterations,
+        "top_sites": sites,
+    }
+
+def check_budget(name, result, budget):
+    """Daftar pelanggaran budget (kosong bila lolos)"""
+    failures = []
+    if budget is None:
+        return failures
+    limit = budget["peak_bytes"] * (1 + TOLERANCE)
+    if result["peak_bytes"] > limit:
+        failures.append(f"peak {result['peak_bytes']:,} B > {limit:,.0f} B")
+    limit = budget["retained_bytes_per_op"] * (1 + TOLERANCE) + RETAINED_SLACK
+    if result["retained_bytes_per_op"] > limit:
+        failures.append(f"retained {result['retained_bytes_per_op']:,.1f} B/op > {limit:,.1f} B/op")
+    return failures
+
+# ===== MAIN =====
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark alokasi memory per pesan (tracemalloc)")
+    parser.add_argument("operations", nargs="*", help="Subset operasi (default: semua)")
+    parser.add_argument("--iterations", type=int, default=ITERATIONS)
+    parser.add_argument("--budget", default=BUDGET_FILE)
+    parser.add_argument("--record", action="store_true", help="Simpan hasil sekarang sebagai budget baru")
+    parser.add_argument("--top", type=int, default=0, metavar="N",
+                        help="Tampilkan N lokasi alokasi dengan pertumbuhan terbesar")
+    parser.add_argument("--json", help="Simpan hasil ke file JSON")
+    args = parser.parse_args()
+
+    sys.path.insert(0, SCRIPT_DIR)
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        operations = build_operations()
+    names = args.operations or list(operations)
+
+    budgets = {}
+    if os.path.exists(args.budget):
+        with open(args.budget) as f:
+            budgets = json.load(f)
+
+    print("="*70)
+    print("🧠 MEMORY BENCHMARK (tracemalloc)")
+    print("="*70)
+    print(f"   {'Operation':<20} | {'Peak B':>9} | {'Peak max B':>10} | {'Retained B/op':>13} | Budget")
+
+    results = {}
+    failed = False
+    for name in names:
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            result = measure(operations[name], args.iterations, top=args.top)
+        results[name] = result
+        failures = [] if args.record else check_budget(name, result, budgets.get(name))
+        if args.record:
+            status = "recorded"
+        elif name not in budgets:
+            status = "no budget"
+        else:
+            status = "❌ " + "; ".join(failures) if failures else "✅"
+        print(f"   {name:<20} | {result['peak_bytes']:9,} | {result['peak_bytes_max']:10,} | "
+              f"{result['retained_bytes_per_op']:13,.1f} | {status}")
+        for site, size, count in result["top_sites"]:
+            print(f"      {size:+10,} B {count:+6} blocks  {site}")
+        failed = failed or bool(failures)
+
+    if args.record:
+        budgets.update({name: {"peak_bytes": r["peak_bytes"],
+                               "retained_bytes_per_op": round(r["retained_bytes_per_op"], 1)}
+                        for name, r in results.items()})
+        with open(args.budget, 'w') as f:
+            json.dump(budgets, f, indent=2)
+        print(f"\n✅ Budget saved as: {args.budget}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"✅ Results saved as: {args.json}")
+
+    print("\n" + "="*70)
+    print("❌ MEMORY REGRESSION" if failed else "✅ All memory budgets met")
+    print("="*70)
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
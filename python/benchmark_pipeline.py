@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+Pipeline Benchmark - Throughput dan tail latency end-to-end publisher → subscriber
+Trafik device sintetis dikirim lewat transport loopback (tanpa broker) pada rate bertingkat,
+untuk setiap konfigurasi (variant, ukuran payload, batch, jumlah worker).
+Hasil: JSON + ringkasan HTML (dan PNG bila matplotlib tersedia).
+"""
+
+import os
+import json
+import time
+import argparse
+import itertools
+import contextlib
+import multiprocessing
+from collections import deque
+from datetime import datetime
+
+# ===== KONFIGURASI =====
+VARIANTS = ["Ascon-128", "Ascon-128a", "Ascon-80pq"]
+PAYLOAD_SIZES = [64, 256]          # Ukuran JSON plaintext (byte) per pesan device
+BATCH_SIZES = [1]                  # Pesan yang dikirim berurutan per tick (burst)
+WORKERS = [1]                      # Proses pipeline paralel (masing-masing loopback sendiri)
+RATES = [50, 100, 200, 400, 0]     # msg/s total per langkah; 0 = secepat mungkin
+STEP_DURATION = 3.0                # Detik per langkah rate
+MAX_IN_FLIGHT = 64                 # Batas pesan belum selesai pada langkah "max"
+DRAIN_TIMEOUT = 10.0
+OUTPUT_DIR = "benchmark_results"
+
+BENCH_KEYS = {
+    "Ascon-128": b"asconciphertest1",
+    "Ascon-128a": b"asconciphertest1",
+    "Ascon-80pq": b"asconciphertest1ascn",   # 20 byte
+}
+
+# ===== SATU PIPELINE =====
+def max_rss_kb():
+    try:
+        import resource  # Tidak tersedia di Windows
+    except ImportError:
+        return 0
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+def make_reading(device, count, payload_size, start):
+    reading = {"id": device, "count": count, "distance": 80 + count % 7,
+               "timestamp": int((time.perf_counter() - start) * 1000), "unit": "cm"}
+    text = json.dumps(reading)
+    if len(text) < payload_size:
+        reading["pad"] = "x" * (payload_size - len(text) - 10)
+        text = json.dumps(reading)
+    return text
+
+def run_pipeline(config, rates, duration, worker_id=0):
+    """
+    Jalankan publisher + subscriber di transport loopback (masing-masing thread loop sendiri)
+    dan ukur setiap langkah rate. Urutan pipeline FIFO, jadi pesan selesai ke-n di subscriber
+    adalah pesan terkirim ke-n.
+    """
+    import ascon
+    import mqtt_publisher
+    import mqtt_subscriber
+    from key_store import KeyStore
+    from loopback import LoopbackBroker, LoopbackClient
+    from quantile_sketch import SketchSet
+
+    variant = config["variant"]
+    key = BENCH_KEYS[variant]
+    for module in (mqtt_publisher, mqtt_subscriber):
+        module.VARIANT = variant
+        module.KEY = key
+        module.key_store = KeyStore(None, default_key=key, variant=variant)
+    mqtt_publisher.THINGSPEAK_ENABLED = False
+    mqtt_subscriber.TRACE_ENABLED = False
+    # Benchmark sengaja melebihi batas rate; yang diukur pipeline-nya, bukan limiter
+    mqtt_publisher.RATE_LIMIT_ENABLED = False
+    mqtt_subscriber.RATE_LIMIT_ENABLED = False
+    mqtt_subscriber.REPLAY_FILTER_ENABLED = False   # Nonce tetap: bacaan yang sama antar konfigurasi = ciphertext sama
+
+    sent_at = deque()      # (langkah, waktu kirim) urut FIFO
+    step = [0]
+    completed = [0]
+    latencies = SketchSet(["latency_ms"])
+
+    def on_subscriber_message(client, userdata, msg):
+        mqtt_subscriber.on_message(client, userdata, msg)
+        try:
+            sent_step, sent_time = sent_at.popleft()
+        except IndexError:
+            return   # Tidak ada pesan yang ditunggu
+        if sent_step != step[0]:
+            return   # Selesai terlambat dari langkah sebelumnya: tidak ikut diukur
+        latencies.add("latency_ms", (time.perf_counter() - sent_time) * 1000)
+        completed[0] += 1
+
+    broker = LoopbackBroker()
+    publisher = LoopbackClient(broker, "bench_publisher")
+    publisher.on_connect = mqtt_publisher.on_connect
+    publisher.on_message = mqtt_publisher.on_message
+    subscriber = LoopbackClient(broker, "bench_subscriber")
+    subscriber.on_connect = mqtt_subscriber.on_connect
+    subscriber.on_message = on_subscriber_message
+    device = LoopbackClient(broker, f"bench_device_{worker_id}")
+
+    results = []
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        for client in (publisher, subscriber, device):
+            client.connect()
+        publisher.loop_start()
+        subscriber.loop_start()
+
+        count = 0
+        start = time.perf_counter()
+        for rate in rates:
+            step[0] += 1
+            latencies = SketchSet(["latency_ms"])
+            completed[0] = 0
+            sent = 0
+            batch = config["batch"]
+            interval = batch / rate if rate else 0.0
+            ascon.reset_counters()
+            cpu_start = time.process_time()
+            step_start = time.perf_counter()
+            next_tick = step_start
+            while time.perf_counter() - step_start < duration:
+                if rate:
+                    delay = next_tick - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                    next_tick += interval
+                elif sent - completed[0] >= MAX_IN_FLIGHT:
+                    time.sleep(0.0005)
+                    continue
+                for _ in range(batch):
+                    text = make_reading(f"BENCH{worker_id}", count, config["payload_size"], start)
+                    sent_at.append((step[0], time.perf_counter()))
+                    device.publish("iot/sensor/distance/raw", text)
+                    count += 1
+                    sent += 1
+
+            deadline = time.perf_counter() + DRAIN_TIMEOUT
+            while completed[0] < sent and time.perf_counter() < deadline:
+                time.sleep(0.001)
+            elapsed = time.perf_counter() - step_start
+            cpu = time.process_time() - cpu_start
+            done = completed[0]
+            results.append({
+                "offered_rate": rate,
+                "sent": sent,
+                "completed": done,
+                "elapsed_s": elapsed,
+                "achieved_rate": done / elapsed if elapsed > 0 else 0.0,
+                "cpu_ms_per_msg": cpu * 1000 / done if done else None,
+                "max_rss_kb": max_rss_kb(),
+                "latency": latencies.sketches["latency_ms"].to_dict(),
+                "ascon": ascon.get_counters(),
+            })
+
+        publisher.loop_stop()
+        subscriber.loop_stop()
+    return results
+
+def _worker(args):
+    config, rates, duration, worker_id = args
+    return run_pipeline(config, rates, duration, worker_id)
+
+def run_config(config, rates, duration):
+    """Jalankan konfigurasi di N proses (rate dibagi rata) dan gabungkan hasil per langkah"""
+    from quantile_sketch import TDigest
+
+    workers = config["workers"]
+    per_worker = [r / workers if r else 0 for r in rates]
+    if workers == 1:
+        runs = [run_pipeline(config, per_worker, duration)]
+    else:
+        with multiprocessing.Pool(workers) as pool:
+            runs = pool.map(_worker, [(config, per_worker, duration, i) for i in range(workers)])
+
+    steps = []
+    for i, rate in enumerate(rates):
+        parts = [run[i] for run in runs]
+        digest = TDigest()
+        for part in parts:
+            digest.merge(TDigest.from_dict(part["latency"]))
+        done = sum(p["completed"] for p in parts)
+        cpu = [p["cpu_ms_per_msg"] * p["completed"] for p in parts if p["cpu_ms_per_msg"] is not None]
+        steps.append({
+            "offered_rate": rate,
+            "sent": sum(p["sent"] for p in parts),
+            "completed": done,
+            "achieved_rate": sum(p["achieved_rate"] for p in parts),
+            "cpu_ms_per_msg": sum(cpu) / done if done else None,
+            "max_rss_kb": max(p["max_rss_kb"] for p in parts),
+            "latency_ms": {
+                "p50": digest.quantile(0.5) if digest.count else None,
+                "p99": digest.quantile(0.99) if digest.count else None,
+                "p999": digest.quantile(0.999) if digest.count else None,
+                "max": digest.max if digest.count else None,
+            },
+        })
+    return steps
+
+# ===== LAPORAN =====
+def config_label(config):
+    return f"{config['variant']} / {config['payload_size']}B / batch {config['batch']} / {config['workers']}w"
+
+def print_steps(config, steps):
+    print(f"\n📦 {config_label(config)}")
+    print(f"   {'Offered':>8} | {'Achieved':>9} | {'CPU/msg':>8} | {'RSS MB':>7} | "
+          f"{'p50 ms':>8} | {'p99 ms':>8} | {'p999 ms':>8}")
+    for s in steps:
+        offered = f"{s['offered_rate']:g}" if s['offered_rate'] else "max"
+        lat = s["latency_ms"]
+        fmt = lambda v: f"{v:8.2f}" if v is not None else f"{'-':>8}"
+        cpu = f"{s['cpu_ms_per_msg']:8.3f}" if s['cpu_ms_per_msg'] is not None else f"{'-':>8}"
+        print(f"   {offered:>8} | {s['achieved_rate']:9.1f} | {cpu} | {s['max_rss_kb'] / 1024:7.1f} | "
+              f"{fmt(lat['p50'])} | {fmt(lat['p99'])} | {fmt(lat['p999'])}")
+
+def render_png(results, path):
+    """Achieved rate dan p99 terhadap offered rate per konfigurasi; None bila matplotlib tidak ada"""
+    try:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+    except ImportError:
+        return None
+
+    fig, axes = plt.subplots(1, 2, figsize=(14, 5))
+    for entry in results:
+        steps = [s for s in entry["steps"] if s["offered_rate"]]
+        offered = [s["offered_rate"] for s in steps]
+        label = config_label(entry["config"])
+        axes[0].plot(offered, [s["achieved_rate"] for s in steps], marker='o', label=label)
+        axes[1].plot(offered, [s["latency_ms"]["p99"] or 0 for s in steps], marker='o', label=label)
+    axes[0].set_xlabel('Offered rate (msg/s)')
+    axes[0].set_ylabel('Achieved rate (msg/s)')
+    axes[0].set_title('Throughput')
+    axes[1].set_xlabel('Offered rate (msg/s)')
+    axes[1].set_ylabel('p99 latency (ms)')
+    axes[1].set_title('Tail latency')
+    for ax in axes:
+        ax.grid(True, alpha=0.3)
+        ax.legend(fontsize=7)
+    plt.tight_layout()
+    plt.savefig(path, dpi=100)
+    plt.close(fig)
+    return path
+
+def write_html(results, meta, path, png=None):
+    rows = []
+    for entry in results:
+        for s in entry["steps"]:
+            lat = s["latency_ms"]
+            cell = lambda v: f"{v:.2f}" if v is not None else "-"
+            rows.append(
+                f"<tr><td>{config_label(entry['config'])}</td>"
+                f"<td>{s['offered_rate'] or 'max'}</td><td>{s['achieved_rate']:.1f}</td>"
+                f"<td>{cell(s['cpu_ms_per_msg'])}</td><td>{s['max_rss_kb'] / 1024:.1f}</td>"
+                f"<td>{cell(lat['p50'])}</td><td>{cell(lat['p99'])}</td><td>{cell(lat['p999'])}</td></tr>"
+            )
+    image = f'<img src="{os.path.basename(png)}" style="max-width:100%">' if png else ""
+    with open(path, 'w') as f:
+        f.write(f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Pipeline Benchmark</title>
+<style>body{{font-family:sans-serif}} table{{border-collapse:collapse}}
+td,th{{border:1px solid #ccc;padding:4px 8px;text-align:right}} td:first-child{{text-align:left}}</style>
+</head><body>
+<h1>Pipeline Benchmark</h1>
+<p>{meta['generated']} &middot; Python {meta['python']} &middot; {meta['platform']} &middot;
+{meta['step_duration_s']} s per step</p>
+{image}
+<table>
+<tr><th>Configuration</th><th>Offered msg/s</th><th>Achieved msg/s</th><th>CPU ms/msg</th>
+<th>RSS MB</th><th>p50 ms</th><th>p99 ms</th><th>p999 ms</th></tr>
+{chr(10).join(rows)}
+</table>
+</body></html>
+""")
+
+# ===== MAIN =====
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark throughput & latency pipeline publisher → subscriber")
+    parser.add_argument("--variants", nargs="+", default=VARIANTS, choices=VARIANTS)
+    parser.add_argument("--payload-sizes", nargs="+", type=int, default=PAYLOAD_SIZES)
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=BATCH_SIZES)
+    parser.add_argument("--workers", nargs="+", type=int, default=WORKERS)
+    parser.add_argument("--rates", nargs="+", type=float, default=RATES, help="msg/s per langkah, 0 = max")
+    parser.add_argument("--duration", type=float, default=STEP_DURATION, help="Detik per langkah")
+    parser.add_argument("--output-dir", default=OUTPUT_DIR)
+    args = parser.parse_args()
+
+    import platform
+    os.makedirs(args.output_dir, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    meta = {
+        "generated": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "step_duration_s": args.duration,
+        "rates": args.rates,
+    }
+
+    print("="*70)
+    print("🏁 PIPELINE BENCHMARK (loopback transport)")
+    print("="*70)
+
+    results = []
+    for variant, size, batch, workers in itertools.product(
+            args.variants, args.payload_sizes, args.batch_sizes, args.workers):
+        config = {"variant": variant, "payload_size": size, "batch": batch, "workers": workers}
+        steps = run_config(config, args.rates, args.duration)
+        print_steps(config, steps)
+        results.append({"config": config, "steps": steps})
+
+    json_path = os.path.join(args.output_dir, f"pipeline_{stamp}.json")
+    with open(json_path, 'w') as f:
+        json.dump({"meta": meta, "results": results}, f, indent=2)
+    png = render_png(results, os.path.join(args.output_dir, f"pipeline_{stamp}.png"))
+    html_path = os.path.join(args.output_dir, f"pipeline_{stamp}.html")
+    write_html(results, meta, html_path, png)
+
+    print(f"\n✅ Results saved as: {json_path}")
+    print(f"✅ Summary saved as: {html_path}" + (f" (+ {png})" if png else ""))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Startup Benchmark - Waktu import dan time-to-first-message untuk setiap script
+Menjalankan `python -X importtime` dan satu pesan sintetis di proses baru, lalu membandingkan dengan budget
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+# ===== KONFIGURASI =====
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+MODULES = ["mqtt_publisher", "mqtt_subscriber", "energy_analyzer", "attack_monitor"]
+
+# Budget (ms) untuk time-to-first-message, termasuk start interpreter
+STARTUP_BUDGET_MS = {
+    "mqtt_publisher": 400,
+    "mqtt_subscriber": 400,
+    "energy_analyzer": 500,
+    "attack_monitor": 400,
+}
+
+# Modul opsional yang TIDAK boleh ikut ter-import saat startup
+FORBIDDEN_AT_IMPORT = ["matplotlib", "requests", "sqlite3"]
+
+# Kode yang dijalankan di proses anak: import modul, kirim satu pesan sintetis ke on_message
+CHILD_CODE = r'''
+import sys, json, time, io, contextlib
+t_start = time.perf_counter()
+import {module} as mod
+t_import = time.perf_counter()
+
+class FakeResult:
+    rc = 0
+
+class FakeClient:
+    def publish(self, topic, payload=None, *args, **kwargs):
+        return FakeResult()
+    def subscribe(self, *args, **kwargs):
+        return (0, 1)
+
+class FakeMsg:
+    def __init__(self, topic, payload):
+        self.topic = topic
+        self.payload = payload.encode() if isinstance(payload, str) else payload
+
+reading = {{"id": "BENCH", "count": 1, "distance": 42, "timestamp": 1000, "unit": "cm"}}
+name = "{module}"
+if name == "mqtt_publisher":
+    mod.THINGSPEAK_ENABLED = False
+    msg = FakeMsg(mod.TOPIC_RAW, json.dumps(reading))
+elif name == "mqtt_subscriber":
+    import ascon
+    ct = ascon.ascon_encrypt(mod.KEY, mod.NONCE, mod.ASSOCIATED_DATA, json.dumps(reading).encode(), mod.VARIANT)
+    msg = FakeMsg(mod.TOPIC_ENCRYPTED, json.dumps({{"encrypted_data": ct.hex()}}))
+elif name == "energy_analyzer":
+    msg = FakeMsg(mod.TOPIC_ENERGY, json.dumps({{"cycle": 1, "sensor_time_us": 7000, "mqtt_time_us": 900,
+                                              "total_energy_mj": 2.1, "cumulative_energy_mj": 2.1,
+                                              "avg_power_mw": 250.0}}))
+else:
+    msg = FakeMsg("iot/sensor/distance/raw", json.dumps(reading))
+
+with contextlib.redirect_stdout(io.StringIO()):
+    mod.on_message(FakeClient(), None, msg)
+t_first = time.perf_counter()
+
+def max_rss_kb():
+    try:
+        import resource  # Tidak tersedia di Windows
+    except ImportError:
+        return 0
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+print("RESULT " + json.dumps({{
+    "import_ms": (t_import - t_start) * 1000,
+    "first_message_ms": (t_first - t_import) * 1000,
+    "max_rss_kb": max_rss_kb(),
+    "loaded": sorted(m for m in sys.modules if "." not in m),
+}}))
+'''
+
+# ===== IMPORTTIME =====
+def importtime_profile(module, top=8):
+    """Jalankan `python -X importtime -c 'import module'` dan ambil import terberat (cumulative)"""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=SCRIPT_DIR, capture_output=True, text=True
+    )
+    entries = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        self_us, cumulative_us, name = int(parts[0]), int(parts[1]), parts[2]
+        entries.append((cumulative_us, self_us, name.rstrip()))
+    total = next((c for c, _, n in entries if n.strip() == module), None)
+    top_level = sorted((e for e in entries if e[2].startswith("  ") and not e[2].startswith("    ")),
+                       reverse=True)[:top]
+    return total, top_level
+
+# ===== TIME-TO-FIRST-MESSAGE =====
+def first_message(module):
+    t0 = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-c", CHILD_CODE.format(module=module)],
+        cwd=SCRIPT_DIR, capture_output=True, text=True
+    )
+    wall_ms = (time.perf_counter() - t0) * 1000
+    for line in proc.stdout.splitlines():
+        if line.startswith("RESULT "):
+            result = json.loads(line[len("RESULT "):])
+            result["wall_ms"] = wall_ms
+            return result
+    raise RuntimeError(f"{module} failed:\n{proc.stderr[-2000:]}")
+
+# ===== MAIN =====
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark waktu startup script IoT ASCON")
+    parser.add_argument("modules", nargs="*", default=MODULES)
+    parser.add_argument("--runs", type=int, default=3, help="Jumlah pengulangan (ambil median)")
+    parser.add_argument("--json", help="Simpan hasil ke file JSON")
+    args = parser.parse_args()
+
+    print("="*70)
+    print("🚀 STARTUP BENCHMARK")
+    print("="*70)
+
+    results = {}
+    failed = False
+    for module in args.modules:
+        total_us, heaviest = importtime_profile(module)
+        runs = sorted((first_message(module) for _ in range(args.runs)), key=lambda r: r["wall_ms"])
+        median = runs[len(runs) // 2]
+        forbidden = [m for m in FORBIDDEN_AT_IMPORT if m in median["loaded"]]
+        budget = STARTUP_BUDGET_MS.get(module)
+        over_budget = budget is not None and median["wall_ms"] > budget
+
+        print(f"\n📦 {module}")
+        print(f"   ⏱️  Import (importtime): {total_us / 1000 if total_us else float('nan'):.1f} ms")
+        print(f"   ⏱️  Import (in-process): {median['import_ms']:.1f} ms")
+        print(f"   ⏱️  First message:       {median['first_message_ms']:.1f} ms")
+        print(f"   ⏱️  Time-to-first-msg:   {median['wall_ms']:.1f} ms (budget {budget} ms)"
+              f" {'❌' if over_budget else '✅'}")
+        print(f"   💾 Max RSS:             {median['max_rss_kb'] / 1024:.1f} MB")
+        print("   🔍 Heaviest imports:")
+        for cumulative_us, _, name in heaviest:
+            print(f"      {cumulative_us / 1000:8.1f} ms  {name.strip()}")
+        if forbidden:
+            print(f"   ❌ Optional modules loaded at startup: {', '.join(forbidden)}")
+
+        failed = failed or over_budget or bool(forbidden)
+        results[module] = {
+            "importtime_ms": total_us / 1000 if total_us else None,
+            "import_ms": median["import_ms"],
+            "first_message_ms": median["first_message_ms"],
+            "time_to_first_message_ms": median["wall_ms"],
+            "max_rss_kb": median["max_rss_kb"],
+            "budget_ms": budget,
+            "forbidden_loaded": forbidden,
+            "heaviest_imports": [(name.strip(), c / 1000) for c, _, name in heaviest],
+        }
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\n✅ Results saved as: {args.json}")
+
+    print("\n" + "="*70)
+    print("❌ STARTUP REGRESSION" if failed else "✅ All startup budgets met")
+    print("="*70)
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
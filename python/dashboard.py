@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Terminal Dashboard - Renderer di thread sendiri dengan frame rate tetap
+Setiap frame: ambil snapshot state (tanpa lock), render menjadi baris teks, lalu tulis
+HANYA baris yang berubah memakai ANSI cursor positioning (tanpa os.system / subprocess).
+Update yang datang lebih cepat dari frame rate digabung menjadi satu frame.
+"""
+
+import sys
+import time
+import threading
+
+# ===== KONFIGURASI =====
+FPS = 10
+IDLE_REFRESH_S = 1.0    # Render ulang walau state tidak berubah (jam, rate) setiap sekian detik
+
+# ===== ANSI =====
+CSI = "\033["
+HIDE_CURSOR = CSI + "?25l"
+SHOW_CURSOR = CSI + "?25h"
+CLEAR_SCREEN = CSI + "2J" + CSI + "H"
+CLEAR_LINE = CSI + "K"
+CLEAR_BELOW = CSI + "J"
+
+def move_to(row, col=1):
+    return f"{CSI}{row};{col}H"
+
+def clear_screen(stream=None):
+    stream = stream or sys.stdout
+    stream.write(CLEAR_SCREEN)
+    stream.flush()
+
+# ===== RENDERER =====
+class Dashboard:
+    """
+    snapshot() → (version, state): dipanggil dari thread renderer, harus cukup membaca
+    atribut/copy container kecil tanpa lock. version yang sama berarti tidak ada perubahan.
+    render(state, elapsed) → list baris teks untuk satu frame.
+    """
+
+    def __init__(self, snapshot, render, fps=FPS, stream=None):
+        self.snapshot = snapshot
+        self.render = render
+        self.interval = 1.0 / fps
+        self.stream = stream or sys.__stdout__   # Tetap ke terminal walau sys.stdout dialihkan
+        self.previous = []
+        self.last_version = None
+        self.last_render = 0.0
+        self.frames = 0
+        self.lines_written = 0
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.stream.write(HIDE_CURSOR + CLEAR_SCREEN)
+        self.stream.flush()
+        self.thread = threading.Thread(target=self._run, name="dashboard", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+        self.stream.write(move_to(len(self.previous) + 1) + SHOW_CURSOR + "\n")
+        self.stream.flush()
+
+    def _run(self):
+        started = time.monotonic()
+        while not self.stopped.is_set():
+            frame_start = time.monotonic()
+            try:
+                self.frame(frame_start - started)
+            except Exception as e:
+                # Renderer tidak boleh menjatuhkan monitor
+                self.stream.write(move_to(len(self.previous) + 2) + f"dashboard error: {e}" + CLEAR_LINE)
+            self.stopped.wait(max(0.0, self.interval - (time.monotonic() - frame_start)))
+
+    def frame(self, elapsed=0.0):
+        now = time.monotonic()
+        version, state = self.snapshot()
+        if version == self.last_version and now - self.last_render < IDLE_REFRESH_S:
+            return False
+        self.last_version = version
+        self.last_render = now
+        self.write_diff(self.render(state, elapsed))
+        self.frames += 1
+        return True
+
+    def write_diff(self, lines):
+        out = []
+        for row, line in enumerate(lines):
+            if row < len(self.previous) and self.previous[row] == line:
+                continue
+            out.append(move_to(row + 1) + line + CLEAR_LINE)
+        if len(lines) < len(self.previous):
+            out.append(move_to(len(lines) + 1) + CLEAR_BELOW)
+        self.previous = list(lines)
+        if out:
+            self.lines_written += len(out)
+            self.stream.write("".join(out))
+            self.stream.flush()
@@ -5,11 +5,14 @@ Menerima data energi dari ESP32 via MQTT dan membuat analisis
 """
 
 import paho.mqtt.client as mqtt
-import json
 import time
 from datetime import datetime
-import matplotlib.pyplot as plt
-from collections import deque
+import argparse
+from quantile_sketch import SketchSet
+from ring_buffer import RingBuffer, ENERGY_DTYPE
+from rollups import RollupEngine, JsonlSink, ROLLUP_PATH
+from message_bus import Record
+import profiling
 
 # ===== KONFIGURASI =====
 BROKER = "broker.hivemq.com"
@@ -18,15 +21,8 @@ TOPIC_ENERGY = "iot/sensor/energy"
 CLIENT_ID = "Energy_Analyzer"
 
 # ===== DATA STORAGE =====
-energy_data = {
-    'cycles': deque(maxlen=100),
-    'sensor_time': deque(maxlen=100),
-    'mqtt_time': deque(maxlen=100),
-    'total_energy': deque(maxlen=100),
-    'cumulative_energy': deque(maxlen=100),
-    'avg_power': deque(maxlen=100),
-    'timestamps': deque(maxlen=100)
-}
+ENERGY_CAPACITY = 1_000_000  # Jumlah cycle yang disimpan (~36 byte per cycle)
+energy_data = RingBuffer(ENERGY_DTYPE, ENERGY_CAPACITY)
 
 stats = {
     'total_cycles': 0,
@@ -34,6 +30,23 @@ stats = {
     'start_time': time.time()
 }
 
+# ===== PERSENTIL (t-digest) =====
+SKETCH_PATH = "sketch_energy.json"  # Disimpan saat shutdown (bisa di-merge antar worker)
+sketches = SketchSet(['energy_mj', 'power_mw', 'sensor_us', 'mqtt_us'])
+SKETCH_UNITS = {'energy_mj': 'mJ', 'power_mw': 'mW', 'sensor_us': 'μs', 'mqtt_us': 'μs'}
+
+# ===== ROLLUPS (window 1m / 5m / 1h per device) =====
+ROLLUPS_ENABLED = True
+DEFAULT_DEVICE = "ESP32"  # Payload energi dari firmware belum membawa device ID
+rollup_sink = None
+rollups = RollupEngine(['energy_mj', 'power_mw', 'sensor_us', 'mqtt_us'])
+
+# ===== PLOT SNAPSHOT (live, background) =====
+SNAPSHOT_INTERVAL = 0            # Detik antar snapshot; 0 = nonaktif
+SNAPSHOT_FILE = "energy_snapshot.png"
+renderer = None          # Dibuat saat snapshot pertama (modul plotting di-import lazy)
+last_snapshot = 0
+
 # ===== CALLBACKS =====
 def on_connect(client, userdata, flags, rc):
     if rc == 0:
@@ -44,9 +57,14 @@ def on_connect(client, userdata, flags, rc):
         print(f"❌ Failed to connect, code {rc}")
 
 def on_message(client, userdata, msg):
+    handle_record(client, Record.from_message(msg))
+
+def handle_record(client, record):
+    """Proses satu Record energi yang sudah di-decode (dipakai juga oleh gateway)"""
     try:
-        payload = msg.payload.decode('utf-8')
-        data = json.loads(payload)
+        data = record.data
+        if data is None:
+            raise record.error
         
         # Extract data
         cycle = data.get('cycle', 0)
@@ -56,14 +74,31 @@ def on_message(client, userdata, msg):
         cumulative_energy = data.get('cumulative_energy_mj', 0)
         avg_power = data.get('avg_power_mw', 0)
         
+        receive_time = record.receive_time
+        
         # Store data
-        energy_data['cycles'].append(cycle)
-        energy_data['sensor_time'].append(sensor_time)
-        energy_data['mqtt_time'].append(mqtt_time)
-        energy_data['total_energy'].append(total_energy)
-        energy_data['cumulative_energy'].append(cumulative_energy)
-        energy_data['avg_power'].append(avg_power)
-        energy_data['timestamps'].append(time.time())
+        energy_data.append((
+            cycle,
+            sensor_time,
+            mqtt_time,
+            total_energy,
+            cumulative_energy,
+            avg_power,
+            receive_time
+        ))
+        
+        if ROLLUPS_ENABLED:
+            rollups.add(data.get('id', DEFAULT_DEVICE), receive_time, {
+                'energy_mj': total_energy,
+                'power_mw': avg_power,
+                'sensor_us': sensor_time,
+                'mqtt_us': mqtt_time,
+            })
+        
+        sketches.add('energy_mj', total_energy)
+        sketches.add('power_mw', avg_power)
+        sketches.add('sensor_us', sensor_time)
+        sketches.add('mqtt_us', mqtt_time)
         
         # Update stats
         stats['total_cycles'] = cycle
@@ -83,12 +118,14 @@ def on_message(client, userdata, msg):
         if cycle % 10 == 0:
             print_statistics()
         
+        maybe_snapshot(receive_time)
+        
     except Exception as e:
         print(f"❌ Error processing message: {e}")
 
 # ===== STATISTICS =====
 def print_statistics():
-    runtime = time.time() - stats['start_time']
+    runtime = (stats.get('end_time') or time.time()) - stats['start_time']
     
     print(f"\n{'='*70}")
     print("📊 ENERGY CONSUMPTION STATISTICS")
@@ -107,60 +144,42 @@ def print_statistics():
         energy_per_cycle = stats['total_energy_mj'] / stats['total_cycles']
         print(f"⚡ Average energy per cycle: {energy_per_cycle:.3f} mJ")
     
+    sketches.print_report("PER-CYCLE PERCENTILES", SKETCH_UNITS)
+    if ROLLUPS_ENABLED:
+        rollups.print_summary(SKETCH_UNITS, now=stats.get('end_time') or time.time())
+    
     print(f"{'='*70}")
 
-def generate_plots():
+def generate_plots(headless=False):
     """Generate energy consumption plots"""
-    if len(energy_data['cycles']) < 2:
+    if len(energy_data) < 2:
         print("⚠️  Not enough data for plotting")
         return
     
     print("\n📈 Generating plots...")
+    import plotting  # Lazy: matplotlib hanya dimuat bila plot benar-benar dibuat
     
-    fig, axes = plt.subplots(2, 2, figsize=(14, 10))
-    fig.suptitle('ESP32 Energy Consumption Analysis', fontsize=16)
-    
-    cycles = list(energy_data['cycles'])
-    
-    # Plot 1: Energy per cycle
-    axes[0, 0].plot(cycles, list(energy_data['total_energy']), 'b-', linewidth=2)
-    axes[0, 0].set_xlabel('Cycle')
-    axes[0, 0].set_ylabel('Energy (mJ)')
-    axes[0, 0].set_title('Energy Consumption per Cycle')
-    axes[0, 0].grid(True, alpha=0.3)
-    
-    # Plot 2: Cumulative energy
-    axes[0, 1].plot(cycles, list(energy_data['cumulative_energy']), 'g-', linewidth=2)
-    axes[0, 1].set_xlabel('Cycle')
-    axes[0, 1].set_ylabel('Cumulative Energy (mJ)')
-    axes[0, 1].set_title('Cumulative Energy Consumption')
-    axes[0, 1].grid(True, alpha=0.3)
-    
-    # Plot 3: Average power
-    axes[1, 0].plot(cycles, list(energy_data['avg_power']), 'r-', linewidth=2)
-    axes[1, 0].set_xlabel('Cycle')
-    axes[1, 0].set_ylabel('Power (mW)')
-    axes[1, 0].set_title('Average Power Consumption')
-    axes[1, 0].grid(True, alpha=0.3)
-    
-    # Plot 4: Time breakdown
-    axes[1, 1].plot(cycles, list(energy_data['sensor_time']), 'b-', label='Sensor Read', linewidth=2)
-    axes[1, 1].plot(cycles, list(energy_data['mqtt_time']), 'r-', label='MQTT Publish', linewidth=2)
-    axes[1, 1].set_xlabel('Cycle')
-    axes[1, 1].set_ylabel('Time (μs)')
-    axes[1, 1].set_title('Execution Time Breakdown')
-    axes[1, 1].legend()
-    axes[1, 1].grid(True, alpha=0.3)
-    
-    plt.tight_layout()
+    # Downsample (LTTB) supaya waktu plot konstan walaupun data jutaan cycle
+    series = plotting.downsample_energy(energy_data.view())
     
     # Save plot
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     filename = f"energy_analysis_{timestamp}.png"
-    plt.savefig(filename, dpi=300)
+    plotting.render_energy_plots(series, filename, dpi=plotting.PLOT_DPI, show=not headless)
     print(f"✅ Plot saved as: {filename}")
-    
-    plt.show()
+
+def maybe_snapshot(now):
+    """Render snapshot plot periodik di background process (tidak memblokir MQTT loop)"""
+    global last_snapshot, renderer
+    if SNAPSHOT_INTERVAL <= 0 or now - last_snapshot < SNAPSHOT_INTERVAL or len(energy_data) < 2:
+        return
+    last_snapshot = now
+    if renderer is None:
+        import plotting
+        renderer = plotting.PlotRenderer()
+    # segments(): zero-copy, penggabungan + LTTB dikerjakan child process
+    if renderer.submit(energy_data.segments(), SNAPSHOT_FILE, title_suffix=f" (live, {len(energy_data):,} cycles)"):
+        print(f"🖼️  Snapshot rendering in background → {SNAPSHOT_FILE}")
 
 def save_report():
     """Save energy report to file"""
@@ -173,7 +192,7 @@ def save_report():
         f.write(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
         f.write("="*70 + "\n\n")
         
-        runtime = time.time() - stats['start_time']
+        runtime = (stats.get('end_time') or time.time()) - stats['start_time']
         f.write(f"Runtime: {runtime:.2f} seconds\n")
         f.write(f"Total Cycles: {stats['total_cycles']}\n\n")
         
@@ -190,32 +209,155 @@ def save_report():
             energy_per_cycle = stats['total_energy_mj'] / stats['total_cycles']
             f.write(f"ENERGY PER CYCLE: {energy_per_cycle:.3f} mJ\n\n")
         
+        # Statistik per field (dihitung tervektorisasi dari ring buffer)
+        if len(energy_data) > 0:
+            f.write(f"FIELD STATISTICS ({len(energy_data)} cycles stored):\n")
+            f.write("-"*70 + "\n")
+            f.write("Field        |       Min |      Mean |       Std |       p50 |       p99 |       Max\n")
+            f.write("-"*70 + "\n")
+            for name in ('sensor_time', 'mqtt_time', 'total_energy', 'avg_power'):
+                st = energy_data.stats(name)
+                f.write(f"{name:<12} | {st['min']:9.2f} | {st['mean']:9.2f} | {st['std']:9.2f} | "
+                        f"{st['p50']:9.2f} | {st['p99']:9.2f} | {st['max']:9.2f}\n")
+            f.write("\n")
+        
         # Detailed cycle data
         f.write("\nDETAILED CYCLE DATA:\n")
         f.write("-"*70 + "\n")
         f.write("Cycle | Sensor(μs) | MQTT(μs) | Energy(mJ) | Power(mW)\n")
         f.write("-"*70 + "\n")
         
-        for i in range(min(len(energy_data['cycles']), 50)):  # First 50 cycles
-            f.write(f"{energy_data['cycles'][i]:5d} | "
-                   f"{energy_data['sensor_time'][i]:10d} | "
-                   f"{energy_data['mqtt_time'][i]:8d} | "
-                   f"{energy_data['total_energy'][i]:10.3f} | "
-                   f"{energy_data['avg_power'][i]:8.2f}\n")
+        for row in energy_data.first(50):  # First 50 cycles
+            f.write(f"{int(row['cycle']):5d} | "
+                   f"{int(row['sensor_time']):10d} | "
+                   f"{int(row['mqtt_time']):8d} | "
+                   f"{float(row['total_energy']):10.3f} | "
+                   f"{float(row['avg_power']):8.2f}\n")
         
         f.write("\n" + "="*70 + "\n")
     
     print(f"\n✅ Report saved as: {filename}")
 
+# ===== ANALISIS OFFLINE =====
+def analyze_offline(path, date=None):
+    """
+    Bangun ulang data analyzer dari rekaman (output energy_analyzer, Serial Monitor ESP32,
+    atau capture JSONL) per chunk, lalu hasilkan laporan yang sama dengan mode live.
+    """
+    import log_replay
+    
+    print(f"📂 Offline analysis: {path} ({log_replay.detect_format(path)})")
+    start = time.time()
+    rows = 0
+    first_time = None
+    last = None
+    
+    for chunk in log_replay.iter_energy_chunks(path, date):
+        energy_data.extend(chunk)
+        sketches.add_many('energy_mj', chunk['total_energy'])
+        sketches.add_many('power_mw', chunk['avg_power'])
+        sketches.add_many('sensor_us', chunk['sensor_time'])
+        sketches.add_many('mqtt_us', chunk['mqtt_time'])
+        
+        if ROLLUPS_ENABLED:
+            for t, energy, power, sensor, mqtt_us in zip(
+                    chunk['timestamp'].tolist(), chunk['total_energy'].tolist(),
+                    chunk['avg_power'].tolist(), chunk['sensor_time'].tolist(),
+                    chunk['mqtt_time'].tolist()):
+                rollups.add(DEFAULT_DEVICE, t, {
+                    'energy_mj': energy,
+                    'power_mw': power,
+                    'sensor_us': sensor,
+                    'mqtt_us': mqtt_us,
+                })
+        
+        if first_time is None:
+            first_time = float(chunk['timestamp'][0])
+        last = chunk[-1]
+        rows += len(chunk)
+    
+    if last is None:
+        print("⚠️  No energy records found")
+        return
+    
+    stats['total_cycles'] = int(last['cycle'])
+    stats['total_energy_mj'] = float(last['cumulative_energy'])
+    stats['start_time'] = first_time
+    stats['end_time'] = float(last['timestamp'])
+    print(f"✅ {rows:,} cycles parsed in {time.time() - start:.2f} s")
+
+# ===== STARTUP / SHUTDOWN (dipakai main dan gateway) =====
+def open_rollup_sink():
+    global rollup_sink
+    if ROLLUPS_ENABLED and rollup_sink is None:
+        rollup_sink = JsonlSink(ROLLUP_PATH)
+        rollups.sink = rollup_sink
+
+def shutdown(headless=False):
+    """Statistik akhir, simpan sketch/rollup/report dan (opsional) plot"""
+    print_statistics()
+    sketches.save(SKETCH_PATH)
+    print(f"📐 Percentile sketch saved to {SKETCH_PATH}")
+    if rollup_sink is not None:
+        rollups.flush()
+        rollup_sink.close()
+        print(f"📈 {rollups.closed_windows} closed windows saved to {ROLLUP_PATH}")
+        if rollups.late_samples:
+            print(f"   ⚠️  {rollups.late_samples} late samples skipped (window already closed)")
+    
+    # Generate report
+    save_report()
+    
+    # Ask if user wants plots
+    if headless:
+        generate_plots(headless=True)
+    else:
+        try:
+            choice = input("\n📈 Generate plots? (y/n): ").strip().lower()
+            if choice == 'y':
+                generate_plots()
+        except:
+            pass
+    if renderer is not None:
+        renderer.wait(timeout=30)
+
 # ===== MAIN =====
 def main():
+    global energy_data, SNAPSHOT_INTERVAL
+    
+    parser = argparse.ArgumentParser(description="ESP32 Energy Consumption Analyzer")
+    parser.add_argument("--capacity", type=int, default=ENERGY_CAPACITY,
+                        help="Jumlah cycle yang disimpan di ring buffer")
+    parser.add_argument("--headless", action="store_true",
+                        help="Tanpa display: plot (Agg) disimpan otomatis saat berhenti, tanpa prompt")
+    parser.add_argument("--snapshot-interval", type=float, default=SNAPSHOT_INTERVAL,
+                        help="Render snapshot plot setiap N detik selama berjalan (0 = nonaktif)")
+    parser.add_argument("--offline", metavar="FILE",
+                        help="Analisis rekaman (log analyzer / Serial Monitor / JSONL) tanpa broker")
+    parser.add_argument("--date", help="Tanggal rekaman (YYYY-MM-DD) untuk log yang hanya mencatat jam")
+    args = parser.parse_args()
+    SNAPSHOT_INTERVAL = args.snapshot_interval
+    
+    if args.capacity != energy_data.capacity:
+        energy_data = RingBuffer(ENERGY_DTYPE, args.capacity)
+    
+    open_rollup_sink()
+
+    if args.offline:
+        analyze_offline(args.offline, args.date)
+        shutdown(headless=True)
+        return
+
     print("="*70)
     print("⚡ ESP32 ENERGY CONSUMPTION ANALYZER")
     print("="*70)
     print(f"📡 Broker: {BROKER}:{PORT}")
     print(f"📥 Topic: {TOPIC_ENERGY}")
+    print(f"💾 Buffer: {energy_data.capacity:,} cycles ({energy_data.nbytes()/1e6:.1f} MB max)")
     print("="*70)
     
+    profiling.install("analyzer")
+    
     client = mqtt.Client(CLIENT_ID)
     client.on_connect = on_connect
     client.on_message = on_message
@@ -231,19 +373,7 @@ def main():
         
     except KeyboardInterrupt:
         print("\n\n🛑 Stopping analyzer...")
-        print_statistics()
-        
-        # Generate report
-        save_report()
-        
-        # Ask if user wants plots
-        try:
-            choice = input("\n📈 Generate plots? (y/n): ").strip().lower()
-            if choice == 'y':
-                generate_plots()
-        except:
-            pass
-        
+        shutdown(args.headless)
         client.disconnect()
         print("\n👋 Goodbye!")
         
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+IoT ASCON Gateway
+Satu proses dan satu koneksi MQTT untuk publisher (enkripsi), subscriber (dekripsi),
+attack monitor dan energy analyzer. Setiap payload di-decode sekali menjadi Record
+lalu dibagikan ke stage yang aktif lewat message bus.
+"""
+
+import time
+import argparse
+import importlib
+
+import paho.mqtt.client as mqtt
+from message_bus import MessageBus, Record
+from rate_limiter import RateLimiter, report_flood, report_recover, sender_key
+import profiling
+
+# ===== KONFIGURASI =====
+BROKER = "broker.hivemq.com"
+PORT = 1883
+CLIENT_ID = "IoT_ASCON_Gateway"
+
+# stage -> modul; topic diambil dari konfigurasi modul masing-masing
+STAGES = {
+    "publisher": "mqtt_publisher",
+    "subscriber": "mqtt_subscriber",
+    "monitor": "attack_monitor",
+    "analyzer": "energy_analyzer",
+}
+DEFAULT_STAGES = ["publisher", "subscriber", "monitor", "analyzer"]
+
+# Satu limiter per (topic, device) di depan bus (limiter per modul tidak dipakai di gateway):
+# device yang flood dibuang tanpa ikut membuang device lain di topic data bersama.
+RATE_LIMIT_ENABLED = True
+RATE_LIMIT = {"rate": 50, "burst": 200, "action": "drop"}
+
+def stage_topics(stage, module):
+    if stage == "publisher":
+        return [module.TOPIC_RAW]
+    if stage == "subscriber":
+        return [module.TOPIC_ENCRYPTED]
+    if stage == "monitor":
+        return [topic for topic, _ in module.TOPICS]
+    if stage == "analyzer":
+        return [module.TOPIC_ENERGY]
+    return []
+
+# ===== GATEWAY =====
+class Gateway:
+    def __init__(self, stages, headless=False):
+        self.bus = MessageBus()
+        self.modules = {}
+        self.headless = headless
+        self.limiter = RateLimiter(on_flood=report_flood, on_recover=report_recover, **RATE_LIMIT)
+        self.client = mqtt.Client(CLIENT_ID)
+        self.client.on_connect = self.on_connect
+        self.client.on_message = self.on_message
+        self.client.on_disconnect = self.on_disconnect
+
+        for stage in stages:
+            # Modul di-import hanya untuk stage yang aktif
+            module = importlib.import_module(STAGES[stage])
+            self.modules[stage] = module
+            handler = self._make_handler(module)
+            for topic in stage_topics(stage, module):
+                self.bus.subscribe(topic, handler, stage)
+
+        if "subscriber" in self.modules:
+            self.modules["subscriber"].open_store()
+        if "analyzer" in self.modules:
+            self.modules["analyzer"].open_rollup_sink()
+
+    def _make_handler(self, module):
+        client = self.client
+        return lambda record: module.handle_record(client, record)
+
+    def on_connect(self, client, userdata, flags, rc):
+        if rc == 0:
+            print("✅ Gateway connected to MQTT Broker!")
+            for topic in self.bus.topics():
+                client.subscribe(topic)
+                print(f"   → {topic}")
+        else:
+            print(f"❌ Failed to connect, code {rc}")
+
+    def on_message(self, client, userdata, msg):
+        if RATE_LIMIT_ENABLED and not self.limiter.allow(sender_key(msg.topic, msg.payload)):
+            return
+        self.bus.dispatch(Record.from_message(msg))
+
+    def on_disconnect(self, client, userdata, rc):
+        if rc != 0:
+            print(f"⚠️  Unexpected disconnection. Code: {rc}")
+
+    def run(self):
+        print(f"\n🔌 Connecting to {BROKER}:{PORT}...")
+        try:
+            self.client.connect(BROKER, PORT, 60)
+            self.client.loop_forever()
+        except KeyboardInterrupt:
+            print("\n\n🛑 Stopping gateway...")
+        except Exception as e:
+            print(f"❌ Error: {e}")
+        finally:
+            # Semua jalur keluar menutup stage (store subscriber di-flush, log alert ditutup)
+            self.client.disconnect()
+            self.shutdown()
+
+    def shutdown(self):
+        for stage, module in self.modules.items():
+            print(f"\n----- {stage} -----")
+            if stage == "analyzer":
+                module.shutdown(self.headless)
+            elif hasattr(module, "shutdown"):
+                module.shutdown()
+            else:
+                module.print_statistics()
+        self.bus.print_statistics()
+        if self.limiter.limited:
+            self.limiter.print_statistics()
+
+# ===== MAIN =====
+def main():
+    parser = argparse.ArgumentParser(description="Gateway IoT ASCON: semua stage dalam satu proses")
+    parser.add_argument("--stages", nargs="+", choices=list(STAGES), default=DEFAULT_STAGES,
+                        help="Stage yang dijalankan (default: semua)")
+    parser.add_argument("--disable", nargs="+", choices=list(STAGES), default=[],
+                        help="Nonaktifkan stage tertentu")
+    parser.add_argument("--headless", action="store_true",
+                        help="Analyzer: simpan plot saat berhenti tanpa prompt")
+    args = parser.parse_args()
+
+    stages = [s for s in args.stages if s not in args.disable]
+    if not stages:
+        parser.error("no stage enabled")
+
+    print("="*70)
+    print("🌐 IoT ASCON GATEWAY")
+    print("="*70)
+    print(f"📡 Broker: {BROKER}:{PORT}")
+    print(f"🧩 Stages: {', '.join(stages)}")
+    print("="*70)
+
+    start = time.time()
+    gateway = Gateway(stages, args.headless)
+    profiling.install("gateway")
+    print(f"⏱️  Stages loaded in {(time.time() - start) * 1000:.0f} ms")
+    gateway.run()
+    print("\n👋 Goodbye!")
+
+if __name__ == "__main__":
+    main()
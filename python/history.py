@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Compact History - Riwayat pesan berkapasitas tetap dengan record __slots__
+Setiap record hanya menyimpan waktu (float epoch), id topic (di-intern), payload bytes
+asli (tanpa salinan str) dan flag serangan. String waktu/topic dibuat saat ditampilkan.
+"""
+
+from collections import Counter, deque
+from datetime import datetime
+
+# ===== KONFIGURASI =====
+DEFAULT_CAPACITY = 1000
+
+# ===== TOPIC TABLE =====
+class TopicTable:
+    """Intern topic → id kecil; id → topic untuk tampilan"""
+
+    def __init__(self):
+        self.ids = {}
+        self.names = []
+
+    def intern(self, topic):
+        topic_id = self.ids.get(topic)
+        if topic_id is None:
+            topic_id = self.ids[topic] = len(self.names)
+            self.names.append(topic)
+        return topic_id
+
+    def name(self, topic_id):
+        return self.names[topic_id]
+
+# ===== RECORD =====
+class HistoryRecord:
+    __slots__ = ('t', 'topic_id', 'payload', 'is_attack')
+
+    def __init__(self, t, topic_id, payload, is_attack=False):
+        self.t = t
+        self.topic_id = topic_id
+        self.payload = payload
+        self.is_attack = is_attack
+
+    def clock(self, millis=True):
+        """Waktu terima sebagai HH:MM:SS(.mmm), diformat hanya saat ditampilkan"""
+        if millis:
+            return datetime.fromtimestamp(self.t).strftime('%H:%M:%S.%f')[:-3]
+        return datetime.fromtimestamp(self.t).strftime('%H:%M:%S')
+
+    def text(self):
+        return self.payload.decode('utf-8', errors='replace')
+
+# ===== HISTORY =====
+class History:
+    """
+    Ring (deque maxlen) record terbaru + hitungan per topic sepanjang sesi,
+    sehingga ringkasan tetap benar walau record lama sudah terbuang.
+    capacity=None berarti tanpa batas.
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, topics=None):
+        self.capacity = capacity
+        self.records = deque(maxlen=capacity)
+        self.topics = topics or TopicTable()
+        self.topic_counts = Counter()   # topic_id -> jumlah sepanjang sesi
+        self.total = 0
+
+    def append(self, t, topic, payload, is_attack=False):
+        if isinstance(payload, str):
+            payload = payload.encode('utf-8')
+        topic_id = self.topics.intern(topic)
+        record = HistoryRecord(t, topic_id, payload, is_attack)
+        self.records.append(record)
+        self.topic_counts[topic_id] += 1
+        self.total += 1
+        return record
+
+    def __len__(self):
+        return len(self.records)
+
+    def __iter__(self):
+        return iter(list(self.records))
+
+    def __bool__(self):
+        return bool(self.records)
+
+    def recent(self, n):
+        """n record terakhir; list(deque) disalin dalam satu operasi C (aman dibaca thread lain)"""
+        return list(self.records)[-n:]
+
+    def last(self, topic=None):
+        """Record terbaru (opsional untuk topic tertentu)"""
+        if topic is None:
+            return self.records[-1] if self.records else None
+        topic_id = self.topics.ids.get(topic)
+        for record in reversed(self.records):
+            if record.topic_id == topic_id:
+                return record
+        return None
+
+    def topic(self, record):
+        return self.topics.name(record.topic_id)
+
+    def count(self, topic):
+        topic_id = self.topics.ids.get(topic)
+        return self.topic_counts[topic_id] if topic_id is not None else 0
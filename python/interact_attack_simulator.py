@@ -11,6 +11,8 @@ from datetime import datetime
 import ascon
 import os
 import sys
+from key_store import KeyStore, DEFAULT_KEY_ID
+from history import History
 
 # ===== KONFIGURASI =====
 BROKER = "broker.hivemq.com"
@@ -24,9 +26,14 @@ WRONG_KEY = "wrongkeywrongkey".encode('utf-8')
 WRONG_NONCE = "wrongnoncewrong1".encode('utf-8')
 ASSOCIATED_DATA = b"ASCON"
 VARIANT = "Ascon-128"
+KEYS_FILE = "keys.json"  # Dipakai untuk verifikasi pesan yang membawa key_id (rotasi kunci)
+
+key_store = KeyStore(KEYS_FILE, default_key=CORRECT_KEY, variant=VARIANT)
+
+CAPTURE_CAPACITY = 1000  # Pesan tersadap yang disimpan (hitungan per topic tetap untuk seluruh sesi)
 
 # ===== STORAGE =====
-captured_messages = []
+captured_messages = History(CAPTURE_CAPACITY)
 attack_log = []
 
 # ===== UTILITY FUNCTIONS =====
@@ -78,8 +85,9 @@ class InteractivePassiveAttack:
             return
             
         self.captured_count += 1
+        received = time.time()
         payload = msg.payload.decode('utf-8')
-        timestamp = datetime.now().strftime('%H:%M:%S')
+        timestamp = datetime.fromtimestamp(received).strftime('%H:%M:%S')
         
         print(f"\n{'─'*70}")
         print(f"🎯 Message #{self.captured_count} intercepted at {timestamp}")
@@ -90,11 +98,7 @@ class InteractivePassiveAttack:
         elif msg.topic == TOPIC_ENCRYPTED:
             self.handle_encrypted_message(payload)
             
-        captured_messages.append({
-            'timestamp': timestamp,
-            'topic': msg.topic,
-            'payload': payload
-        })
+        captured_messages.append(received, msg.topic, msg.payload)
         
     def handle_raw_message(self, payload):
         """Handle raw unencrypted message"""
@@ -196,8 +200,8 @@ class InteractivePassiveAttack:
         
         print(f"\n📨 Total messages captured: {self.captured_count}")
         
-        raw_count = sum(1 for m in captured_messages if m['topic'] == TOPIC_RAW)
-        enc_count = sum(1 for m in captured_messages if m['topic'] == TOPIC_ENCRYPTED)
+        raw_count = captured_messages.count(TOPIC_RAW)
+        enc_count = captured_messages.count(TOPIC_ENCRYPTED)
         
         print(f"🔓 Unencrypted messages: {raw_count}")
         print(f"🔐 Encrypted messages: {enc_count}")
@@ -274,10 +278,11 @@ class InteractiveActiveAttack:
         print("2. 🔄 Replay Attack (Resend Old Message)")
         print("3. 🔨 Modify Ciphertext (Break Encryption?)")
         print("4. 💣 Denial of Service (Message Flooding)")
-        print("5. 📊 View Attack Statistics")
-        print("6. 🚪 Exit")
+        print("5. 🧬 Tamper Fuzz (Every Ciphertext Mutation)")
+        print("6. 📊 View Attack Statistics")
+        print("7. 🚪 Exit")
         
-        choice = input("\nEnter choice (1-6): ").strip()
+        choice = input("\nEnter choice (1-7): ").strip()
         
         if choice == "1":
             self.attack_modify_plaintext_interactive()
@@ -288,8 +293,10 @@ class InteractiveActiveAttack:
         elif choice == "4":
             self.attack_dos_interactive()
         elif choice == "5":
-            self.show_statistics()
+            self.attack_tamper_fuzz_interactive()
         elif choice == "6":
+            self.show_statistics()
+        elif choice == "7":
             raise KeyboardInterrupt
         else:
             print("❌ Invalid choice!")
@@ -517,8 +524,9 @@ class InteractiveActiveAttack:
                 # Try to decrypt
                 try:
                     modified_ciphertext = bytes(ciphertext_bytes)
+                    verify_key = key_store.get(data.get('key_id', DEFAULT_KEY_ID)) or CORRECT_KEY
                     plaintext = ascon.ascon_decrypt(
-                        CORRECT_KEY,
+                        verify_key,
                         CORRECT_NONCE,
                         ASSOCIATED_DATA,
                         modified_ciphertext,
@@ -552,6 +560,66 @@ class InteractiveActiveAttack:
         
         wait_for_enter()
     
+    def attack_tamper_fuzz_interactive(self):
+        """Semua mutasi satu ciphertext tertangkap, diverifikasi batch (lihat tamper_fuzz.py)"""
+        import tamper_fuzz
+        
+        clear_screen()
+        print_header("🧬 ATTACK: Tamper Fuzz (Every Mutation)")
+        
+        print("\n📖 Description:")
+        print("   Every single-bit flip, byte substitution, truncation and")
+        print("   tag mutation of ONE captured ciphertext is tried against ASCON.")
+        
+        print("\n⚠️  Target: Encrypted data")
+        print("🎯 Goal: Find ANY modification that passes tag verification\n")
+        
+        wait_for_enter("Press ENTER to capture encrypted message")
+        
+        print("📡 Waiting for encrypted message...")
+        self.waiting_for_message = True
+        self.current_message = None
+        
+        timeout = 10
+        for i in range(timeout):
+            if self.current_message and self.current_message['topic'] == TOPIC_ENCRYPTED:
+                break
+            time.sleep(1)
+            print(f"\r⏳ Waiting... {timeout-i}s", end="", flush=True)
+        
+        self.waiting_for_message = False
+        print("\r" + " "*50 + "\r", end="")
+        
+        if not self.current_message or self.current_message['topic'] != TOPIC_ENCRYPTED:
+            print("❌ No encrypted message captured!")
+            wait_for_enter()
+            return
+        
+        try:
+            key_id, ciphertext = tamper_fuzz.ciphertext_from_payload(self.current_message['payload'])
+            key = key_store.get(key_id) or CORRECT_KEY
+            expected = tamper_fuzz.count_mutations(len(ciphertext))
+            print(f"\n✅ Encrypted message captured! ({len(ciphertext)} bytes)")
+            print(f"🔨 Generating ~{expected:,} tampered variants...")
+            
+            fuzzer = tamper_fuzz.TamperFuzzer(key, key_id)
+            fuzzer.run(ciphertext, tamper_fuzz.progress_printer(expected))
+            print()
+            fuzzer.print_report()
+            self.attack_count += fuzzer.variants
+            
+            if not fuzzer.accepted:
+                print_box(
+                    "✅ ASCON REJECTED EVERY MUTATION!\n"
+                    f"{fuzzer.variants:,} tampered ciphertexts, 0 accepted.\n\n"
+                    "🛡️  A single flipped bit breaks the authentication tag!",
+                    "─"
+                )
+        except Exception as e:
+            print(f"❌ Error: {e}")
+        
+        wait_for_enter()
+    
     def attack_dos_interactive(self):
         """Interactive DoS attack"""
         clear_screen()
@@ -628,6 +696,8 @@ class InteractiveActiveAttack:
         print("   Status: ✅ Failed - ASCON detected tampering")
         print("\n4. DoS Attack: Floods system with messages")
         print("   Status: ⚠️  Can overwhelm without rate limiting")
+        print("\n5. Tamper Fuzz: Every mutation of one ciphertext")
+        print("   Status: ✅ Failed - every variant rejected by the tag check")
         print("="*70)
         
         wait_for_enter()
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Key Store - Rotasi kunci ASCON dengan key ID dan validity window
+Publisher memilih kunci aktif terbaru, subscriber mencari kunci lewat key_id (O(1))
+"""
+
+import os
+import json
+import time
+import argparse
+from datetime import datetime
+
+import ascon
+
+# ===== KONFIGURASI =====
+KEYS_FILE = "keys.json"
+DEFAULT_KEY_ID = "k0"            # ID untuk pesan lama yang belum membawa key_id
+LEGACY_KEY = "asconciphertest1".encode('utf-8')
+GRACE_PERIOD = 300               # Detik toleransi di luar validity window (clock skew / pesan tertunda)
+RELOAD_INTERVAL = 5              # Cek perubahan file setiap N detik
+FORCED_RELOAD_INTERVAL = 1       # key_id tak dikenal memaksa cek file paling sering tiap N detik
+ACTIVATION_DELAY = 2 * RELOAD_INTERVAL   # Default jeda generate → aktif, agar semua proses sempat reload
+KEY_SIZES = {"Ascon-128": (16,), "Ascon-128a": (16,), "Ascon-80pq": (16, 20)}
+
+# Format keys.json:
+# {"keys": [{"id": "k1", "key": "<hex>", "not_before": 1732500000, "not_after": 1735100000}, ...]}
+# not_before / not_after boleh epoch detik, ISO datetime, atau null (tanpa batas)
+
+# ===== KEY STORE =====
+class KeyStore:
+    def __init__(self, path=KEYS_FILE, default_key=LEGACY_KEY, variant="Ascon-128"):
+        self.path = path
+        self.default_key = default_key
+        self.variant = variant
+        self.keys = {}           # key_id -> (key, not_before, not_after)
+        self.mtime = None        # mtime file yang terakhir BERHASIL dimuat
+        self.failed_mtime = None # mtime file rusak terakhir (tidak dicoba ulang sampai berubah)
+        self.last_check = 0
+        self.last_forced = 0
+        try:
+            self.load()
+        except LOAD_ERRORS as e:
+            # File rusak tidak boleh mematikan entry point: jalan dengan kunci default
+            print(f"❌ Invalid key file {self.path}: {e} (using default key only)")
+            self.keys = {DEFAULT_KEY_ID: (default_key, None, None)} if default_key is not None else {}
+
+    def load(self):
+        """
+        Muat ulang semua kunci dari file (atau kunci default bila file tidak ada).
+        Semua kunci divalidasi dulu; self.keys / self.mtime hanya diganti bila berhasil.
+        """
+        keys = {}
+        if self.default_key is not None:
+            keys[DEFAULT_KEY_ID] = (self.default_key, None, None)
+
+        mtime = None
+        if self.path and os.path.exists(self.path):
+            mtime = os.path.getmtime(self.path)
+            try:
+                with open(self.path) as f:
+                    data = json.load(f)
+                for entry in data.get("keys", []):
+                    keys[entry["id"]] = (
+                        bytes.fromhex(entry["key"]),
+                        parse_time(entry.get("not_before")),
+                        parse_time(entry.get("not_after")),
+                    )
+                for key_id, (key, _, _) in keys.items():
+                    check_key(key_id, key, self.variant)
+            except LOAD_ERRORS:
+                self.failed_mtime = mtime
+                raise
+
+        # Pre-expand konteks kunci supaya pesan pertama tidak menanggung biayanya
+        for key, _, _ in keys.values():
+            ascon.ascon_key_context(key, self.variant)
+
+        self.keys = keys
+        self.mtime = mtime
+        self.failed_mtime = None
+
+    def reload_if_changed(self, force=False):
+        """
+        Reload file bila berubah; dipanggil per pesan tapi hanya stat() tiap RELOAD_INTERVAL.
+        force=True melewati RELOAD_INTERVAL (tetap dibatasi FORCED_RELOAD_INTERVAL).
+        """
+        now = time.time()
+        if force:
+            if now - self.last_forced < FORCED_RELOAD_INTERVAL:
+                return False
+            self.last_forced = now
+        elif now - self.last_check < RELOAD_INTERVAL:
+            return False
+        self.last_check = now
+        if not self.path or not os.path.exists(self.path):
+            return False
+        mtime = os.path.getmtime(self.path)
+        if mtime == self.mtime or mtime == self.failed_mtime:
+            return False
+        try:
+            self.load()
+        except LOAD_ERRORS as e:
+            print(f"❌ Failed to reload {self.path}: {e} (keeping previous keys)")
+            return False
+        print(f"🔑 Key store reloaded: {', '.join(sorted(self.keys))}")
+        return True
+
+    def lookup(self, key_id, now=None):
+        """
+        get() untuk sisi penerima: key_id yang belum dikenal memaksa cek file,
+        sehingga pesan dengan kunci baru tidak ditolak selama jeda RELOAD_INTERVAL.
+        """
+        self.reload_if_changed()
+        key = self.get(key_id, now)
+        if key is None and key_id not in self.keys and self.reload_if_changed(force=True):
+            key = self.get(key_id, now)
+        return key
+
+    def get(self, key_id, now=None):
+        """Cari kunci berdasarkan key_id; None bila tidak dikenal atau di luar validity window"""
+        entry = self.keys.get(key_id)
+        if entry is None:
+            return None
+        key, not_before, not_after = entry
+        now = time.time() if now is None else now
+        if not_before is not None and now < not_before - GRACE_PERIOD:
+            return None
+        if not_after is not None and now > not_after + GRACE_PERIOD:
+            return None
+        return key
+
+    def current(self, now=None):
+        """Kunci untuk enkripsi: kunci valid dengan not_before paling baru"""
+        now = time.time() if now is None else now
+        best_id, best_start = None, None
+        for key_id, (key, not_before, not_after) in self.keys.items():
+            if not_before is not None and now < not_before:
+                continue
+            if not_after is not None and now > not_after:
+                continue
+            start = not_before if not_before is not None else float('-inf')
+            if best_id is None or start > best_start:
+                best_id, best_start = key_id, start
+        if best_id is None:
+            return None, None
+        return best_id, self.keys[best_id][0]
+
+# ===== HELPERS =====
+LOAD_ERRORS = (OSError, ValueError, KeyError, TypeError, AttributeError)
+
+def check_key(key_id, key, variant):
+    sizes = KEY_SIZES.get(variant)
+    if sizes is None:
+        raise ValueError(f"unknown ASCON variant: {variant}")
+    if len(key) not in sizes:
+        raise ValueError(f"key {key_id} is {len(key)} bytes, {variant} needs "
+                         f"{' or '.join(str(size) for size in sizes)}")
+
+def parse_time(value):
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    return datetime.fromisoformat(value).timestamp()
+
+def format_time(epoch):
+    if epoch is None:
+        return "-"
+    return datetime.fromtimestamp(epoch).strftime('%Y-%m-%d %H:%M:%S')
+
+# ===== CLI =====
+def main():
+    parser = argparse.ArgumentParser(description="Kelola kunci ASCON untuk rotasi tanpa downtime")
+    parser.add_argument("--file", default=KEYS_FILE, help="Path file kunci")
+    parser.add_argument("--variant", default="Ascon-128", choices=sorted(KEY_SIZES),
+                        help="Varian ASCON yang dipakai publisher/subscriber")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("list", help="Tampilkan semua kunci")
+
+    p_gen = sub.add_parser("generate", help="Buat kunci baru dan tambahkan ke file")
+    p_gen.add_argument("--id", required=True, help="Key ID baru")
+    p_gen.add_argument("--start", help=f"Mulai berlaku (epoch / ISO, default: sekarang + {ACTIVATION_DELAY} detik)")
+    p_gen.add_argument("--days", type=float, default=30, help="Lama berlaku (hari)")
+    p_gen.add_argument("--size", type=int, default=16, choices=[16, 20],
+                       help="Ukuran kunci (byte, 20 hanya untuk Ascon-80pq)")
+
+    p_retire = sub.add_parser("retire", help="Akhiri masa berlaku sebuah kunci")
+    p_retire.add_argument("--id", required=True)
+    p_retire.add_argument("--at", help="Waktu berakhir (epoch / ISO, default: sekarang)")
+
+    args = parser.parse_args()
+
+    data = {"keys": []}
+    if os.path.exists(args.file):
+        with open(args.file) as f:
+            data = json.load(f)
+
+    if args.command == "list":
+        store = KeyStore(args.file, variant=args.variant)
+        current_id, _ = store.current()
+        print(f"{'ID':<10} | {'Not before':<19} | {'Not after':<19} |")
+        print("-"*60)
+        for key_id, (_, not_before, not_after) in store.keys.items():
+            marker = "← current" if key_id == current_id else ""
+            print(f"{key_id:<10} | {format_time(not_before):<19} | {format_time(not_after):<19} | {marker}")
+        return
+
+    if args.command == "generate":
+        if any(entry["id"] == args.id for entry in data["keys"]) or args.id == DEFAULT_KEY_ID:
+            print(f"❌ Key ID already exists: {args.id}")
+            return
+        if args.size not in KEY_SIZES[args.variant]:
+            print(f"❌ {args.variant} does not support {args.size}-byte keys")
+            return
+        # Default mulai berlaku setelah semua proses sempat reload (publisher tidak
+        # memakai kunci yang belum dimuat subscriber)
+        start = parse_time(args.start) if args.start else time.time() + ACTIVATION_DELAY
+        data["keys"].append({
+            "id": args.id,
+            "key": ascon.get_random_bytes(args.size).hex(),
+            "not_before": start,
+            "not_after": start + args.days * 86400,
+        })
+        print(f"✅ Key {args.id} valid from {format_time(start)} for {args.days:g} days")
+
+    elif args.command == "retire":
+        for entry in data["keys"]:
+            if entry["id"] == args.id:
+                entry["not_after"] = parse_time(args.at) if args.at else time.time()
+                print(f"✅ Key {args.id} retired at {format_time(entry['not_after'])}")
+                break
+        else:
+            if args.id != DEFAULT_KEY_ID:
+                print(f"❌ Unknown key ID: {args.id}")
+                return
+            # Kunci lama (hardcoded) belum ada di file: tambahkan agar bisa dipensiunkan
+            data["keys"].append({
+                "id": DEFAULT_KEY_ID,
+                "key": LEGACY_KEY.hex(),
+                "not_before": None,
+                "not_after": parse_time(args.at) if args.at else time.time(),
+            })
+            print(f"✅ Key {args.id} retired at {format_time(data['keys'][-1]['not_after'])}")
+
+    # Tulis atomik supaya proses yang sedang reload tidak membaca file setengah jadi
+    tmp_path = args.file + ".tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, args.file)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Offline Log Replay - Baca ulang output rekaman (Output Demo/, logs/, capture JSONL)
+Parsing streaming per chunk (generator) tanpa replay lewat broker
+"""
+
+import re
+import gzip
+import json
+import os
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from ring_buffer import ENERGY_DTYPE
+
+# ===== KONFIGURASI =====
+CHUNK_CHARS = 4 * 1024 * 1024   # Ukuran chunk teks yang diproses per iterasi
+CHUNK_ROWS = 50_000             # Ukuran chunk baris untuk capture JSONL
+MAX_CARRY = 64 * 1024           # Sisa teks maksimum yang dibawa ke chunk berikutnya
+
+# Blok output energy_analyzer.on_message
+ENERGY_BLOCK = re.compile(
+    r"Cycle #(\d+)[ \t]*\n"
+    r"\S+ Time: (\d{1,2}:\d{2}:\d{2})[ \t]*\n"
+    r"\S+\s+Sensor read time: (\d+) \S+[ \t]*\n"
+    r"\S+\s+MQTT publish time: (\d+) \S+[ \t]*\n"
+    r"\S+ Cycle energy: ([-\d.]+) mJ[ \t]*\n"
+    r"\S+ Cumulative energy: ([-\d.]+) mJ[^\n]*\n"
+    r"\S+ Average power: ([-\d.]+) mW"
+)
+
+# Baris tabel energi dari Serial Monitor ESP32 (printEnergyCycle)
+SERIAL_ENERGY_ROW = re.compile(
+    r"║\s*(\d+)\s*│\s*(\d+)\s*│\s*(\d+)\s*│\s*(\d+)\s*│\s*(\d+)\s*│\s*([-\d.]+)\s*│\s*([-\d.]+)\s*║"
+)
+
+# Blok output mqtt_subscriber.on_message (tidak boleh melewati awal blok berikutnya)
+SUBSCRIBER_BLOCK = re.compile(
+    r"Received encrypted message #(\d+)[ \t]*\n"
+    r"\S+ Time: ([\d\-]+ [\d:]+)[ \t]*\n"
+    r"(?:(?!\S+ Received encrypted)[^\n]*\n)*?"
+    r"\S+\s+Original encryption time: ([-\d.]+) ms[ \t]*\n"
+    r"(?:(?!\S+ Received encrypted)[^\n]*\n)*?"
+    r"(?:\S+ Decryption (FAILED)|\S+\s+Decryption time: ([-\d.]+) ms[ \t]*\n\S+ Decrypted data: ([^\n]*))"
+)
+
+# ===== READER =====
+def open_text(path):
+    """Buka file teks (boleh .gz); CRLF dari log Windows dinormalisasi jadi \\n"""
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", errors="replace")
+    return open(path, "r", encoding="utf-8", errors="replace")
+
+def iter_text_chunks(path, chunk_chars=CHUNK_CHARS):
+    with open_text(path) as f:
+        while True:
+            chunk = f.read(chunk_chars)
+            if not chunk:
+                return
+            yield chunk
+
+def iter_block_matches(path, pattern, chunk_chars=CHUNK_CHARS):
+    """
+    Generator list-of-match per chunk. Blok yang terpotong di akhir chunk
+    dibawa ke chunk berikutnya supaya tidak hilang.
+    """
+    carry = ""
+    for chunk in iter_text_chunks(path, chunk_chars):
+        text = carry + chunk
+        matches = list(pattern.finditer(text))
+        # Match terakhir yang barisnya belum berakhir bisa jadi terpotong: proses ulang nanti
+        if matches and text.find("\n", matches[-1].end()) == -1:
+            carry = text[matches[-1].start():]
+            matches = matches[:-1]
+        elif matches:
+            carry = text[matches[-1].end():]
+        else:
+            carry = text
+        carry = carry[-MAX_CARRY:]
+        if matches:
+            yield matches
+    if carry:
+        matches = list(pattern.finditer(carry))
+        if matches:
+            yield matches
+
+def detect_format(path):
+    """'jsonl', 'energy_log', 'serial_log' atau 'subscriber_log' dari beberapa KB pertama"""
+    with open_text(path) as f:
+        head = f.read(64 * 1024)
+    first = head.lstrip()[:1]
+    if first == "{":
+        return "jsonl"
+    if "Received encrypted message #" in head:
+        return "subscriber_log"
+    if ENERGY_BLOCK.search(head):
+        return "energy_log"
+    if SERIAL_ENERGY_ROW.search(head):
+        return "serial_log"
+    return "unknown"
+
+def base_date(path, date=None):
+    """Log teks hanya mencatat jam; tanggal diambil dari argumen atau mtime file"""
+    if date:
+        return datetime.fromisoformat(date)
+    return datetime.fromtimestamp(os.path.getmtime(path)).replace(hour=0, minute=0, second=0, microsecond=0)
+
+def clock_to_epoch(clock_strings, start_date):
+    """Konversi array 'HH:MM:SS' ke epoch (vektor), dengan deteksi lewat tengah malam"""
+    parts = np.char.split(np.asarray(clock_strings, dtype=str), ":")
+    seconds = np.array([int(h) * 3600 + int(m) * 60 + int(s) for h, m, s in parts], dtype=np.float64)
+    # Jam mundur berarti sudah lewat tengah malam
+    day_offset = np.concatenate(([0], np.cumsum(np.diff(seconds) < -43200)))
+    return start_date.timestamp() + seconds + day_offset * 86400.0, int(day_offset[-1]) if len(day_offset) else 0
+
+# ===== ENERGY =====
+def iter_energy_chunks(path, date=None):
+    """Generator structured array (ENERGY_DTYPE) per chunk dari log energi / serial / JSONL"""
+    fmt = detect_format(path)
+    if fmt == "energy_log":
+        yield from _energy_from_analyzer_log(path, date)
+    elif fmt == "serial_log":
+        yield from _energy_from_serial_log(path, date)
+    elif fmt == "jsonl":
+        yield from _energy_from_jsonl(path)
+    else:
+        raise ValueError(f"Unrecognized energy log format: {path}")
+
+def _energy_from_analyzer_log(path, date):
+    start_date = base_date(path, date)
+    days = 0
+    for matches in iter_block_matches(path, ENERGY_BLOCK):
+        cols = list(zip(*(m.groups() for m in matches)))
+        chunk = np.zeros(len(matches), dtype=ENERGY_DTYPE)
+        chunk['cycle'] = np.asarray(cols[0]).astype(np.uint32)
+        chunk['sensor_time'] = np.asarray(cols[2]).astype(np.uint32)
+        chunk['mqtt_time'] = np.asarray(cols[3]).astype(np.uint32)
+        chunk['total_energy'] = np.asarray(cols[4]).astype(np.float32)
+        chunk['cumulative_energy'] = np.asarray(cols[5]).astype(np.float64)
+        chunk['avg_power'] = np.asarray(cols[6]).astype(np.float32)
+        timestamps, rollover = clock_to_epoch(cols[1], start_date + timedelta(days=days))
+        chunk['timestamp'] = timestamps
+        days += rollover
+        yield chunk
+
+def _energy_from_serial_log(path, date):
+    # Serial Monitor tidak mencetak waktu per cycle: pakai waktu relatif dari jumlah waktu cycle
+    start = base_date(path, date).timestamp()
+    cumulative = 0.0
+    elapsed = 0.0
+    for matches in iter_block_matches(path, SERIAL_ENERGY_ROW):
+        cols = list(zip(*(m.groups() for m in matches)))
+        chunk = np.zeros(len(matches), dtype=ENERGY_DTYPE)
+        chunk['cycle'] = np.asarray(cols[0]).astype(np.uint32)
+        chunk['sensor_time'] = np.asarray(cols[1]).astype(np.uint32)
+        chunk['mqtt_time'] = np.asarray(cols[3]).astype(np.uint32)
+        energy = np.asarray(cols[5]).astype(np.float64)
+        chunk['total_energy'] = energy
+        chunk['cumulative_energy'] = cumulative + np.cumsum(energy)
+        chunk['avg_power'] = np.asarray(cols[6]).astype(np.float32)
+        cycle_seconds = np.asarray(cols[4]).astype(np.float64) / 1e6
+        chunk['timestamp'] = start + elapsed + np.cumsum(cycle_seconds)
+        cumulative = float(chunk['cumulative_energy'][-1])
+        elapsed += float(cycle_seconds.sum())
+        yield chunk
+
+def iter_jsonl(path):
+    """Generator (timestamp, topic, payload_dict) dari capture JSONL"""
+    with open_text(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(record, dict) and "payload" in record:
+                payload = record["payload"]
+                if isinstance(payload, str):
+                    try:
+                        payload = json.loads(payload)
+                    except json.JSONDecodeError:
+                        continue
+                yield record.get("t", record.get("time")), record.get("topic"), payload
+            else:
+                yield None, None, record
+
+def _energy_from_jsonl(path, chunk_rows=CHUNK_ROWS):
+    rows = []
+    for t, topic, data in iter_jsonl(path):
+        if topic is not None and not topic.endswith("energy"):
+            continue
+        if not isinstance(data, dict) or "cycle" not in data:
+            continue
+        rows.append((
+            data.get('cycle', 0),
+            data.get('sensor_time_us', 0),
+            data.get('mqtt_time_us', 0),
+            data.get('total_energy_mj', 0),
+            data.get('cumulative_energy_mj', 0),
+            data.get('avg_power_mw', 0),
+            t or 0.0,
+        ))
+        if len(rows) >= chunk_rows:
+            yield np.array(rows, dtype=ENERGY_DTYPE)
+            rows = []
+    if rows:
+        yield np.array(rows, dtype=ENERGY_DTYPE)
+
+# ===== SUBSCRIBER =====
+def iter_subscriber_records(path):
+    """
+    Generator dict per pesan dari log mqtt_subscriber:
+    {'receive_time', 'encryption_ms', 'decrypt_ms' (None bila gagal), 'sensor' (dict atau None)}
+    """
+    for matches in iter_block_matches(path, SUBSCRIBER_BLOCK):
+        for m in matches:
+            _, when, enc_ms, failed, dec_ms, decrypted = m.groups()
+            sensor = None
+            if decrypted:
+                try:
+                    sensor = json.loads(decrypted)
+                except json.JSONDecodeError:
+                    sensor = None
+            yield {
+                'receive_time': datetime.strptime(when.strip(), '%Y-%m-%d %H:%M:%S').timestamp(),
+                'encryption_ms': float(enc_ms),
+                'decrypt_ms': None if failed else float(dec_ms),
+                'sensor': sensor,
+            }
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Loopback MQTT Transport - Broker + client in-process dengan API mirip paho-mqtt
+Dipakai untuk benchmark dan replay tanpa jaringan: callback on_connect/on_message
+dari script yang ada bisa dipasang langsung tanpa perubahan
+"""
+
+import time
+import queue
+import threading
+
+# Kode hasil yang sama dengan paho (mqtt.MQTT_ERR_SUCCESS / MQTT_ERR_NO_CONN)
+MQTT_ERR_SUCCESS = 0
+MQTT_ERR_NO_CONN = 4
+
+# ===== TOPIC MATCHING =====
+def topic_matches(subscription, topic):
+    """Cocokkan topic dengan filter subscription MQTT (wildcard + dan #)"""
+    sub_parts = subscription.split("/")
+    topic_parts = topic.split("/")
+    for i, part in enumerate(sub_parts):
+        if part == "#":
+            return True
+        if i >= len(topic_parts):
+            return False
+        if part != "+" and part != topic_parts[i]:
+            return False
+    return len(sub_parts) == len(topic_parts)
+
+# ===== MESSAGE / RESULT =====
+class LoopbackMessage:
+    """Pengganti mqtt.MQTTMessage (topic, payload bytes, qos, retain, timestamp)"""
+    __slots__ = ('topic', 'payload', 'qos', 'retain', 'timestamp', 'mid')
+
+    def __init__(self, topic, payload, qos=0, retain=False, mid=0):
+        self.topic = topic
+        self.payload = payload
+        self.qos = qos
+        self.retain = retain
+        self.timestamp = time.monotonic()
+        self.mid = mid
+
+class LoopbackResult:
+    """Pengganti mqtt.MQTTMessageInfo (rc, mid)"""
+    __slots__ = ('rc', 'mid')
+
+    def __init__(self, rc, mid):
+        self.rc = rc
+        self.mid = mid
+
+    def wait_for_publish(self, timeout=None):
+        return
+
+    def is_published(self):
+        return self.rc == MQTT_ERR_SUCCESS
+
+# ===== BROKER =====
+class LoopbackBroker:
+    """
+    Broker in-process. Pesan dikirim ke setiap client yang subscribe:
+    langsung (sinkron, di thread publisher) atau lewat antrean client bila loop_start() aktif.
+    """
+
+    def __init__(self):
+        self.clients = []
+        self.lock = threading.Lock()
+        self.published = 0
+        self.delivered = 0
+
+    def attach(self, client):
+        with self.lock:
+            if client not in self.clients:
+                self.clients.append(client)
+
+    def detach(self, client):
+        with self.lock:
+            if client in self.clients:
+                self.clients.remove(client)
+
+    def publish(self, topic, payload, qos=0, retain=False):
+        if isinstance(payload, str):
+            payload = payload.encode('utf-8')
+        elif payload is None:
+            payload = b""
+        with self.lock:
+            self.published += 1
+            mid = self.published
+            targets = [c for c in self.clients if c.is_subscribed(topic)]
+        for client in targets:
+            client._deliver(LoopbackMessage(topic, payload, qos, retain, mid))
+            self.delivered += 1
+        return mid
+
+# ===== CLIENT =====
+class LoopbackClient:
+    """
+    Client dengan subset API paho 1.x yang dipakai project ini:
+    connect, subscribe, publish, loop_start/loop_stop/loop_forever, disconnect.
+    """
+
+    def __init__(self, broker, client_id="", userdata=None):
+        self.broker = broker
+        self.client_id = client_id
+        self.userdata = userdata
+        self.on_connect = None
+        self.on_message = None
+        self.on_disconnect = None
+        self.subscriptions = []
+        self.connected = False
+        self.inbox = None      # queue.Queue bila loop_start() dipakai
+        self.thread = None
+        self.errors = 0        # Exception dari on_message yang ditangkap thread loop
+        self.stopped = threading.Event()
+
+    def connect(self, host=None, port=None, keepalive=60):
+        self.broker.attach(self)
+        self.connected = True
+        if self.on_connect:
+            self.on_connect(self, self.userdata, {}, 0)
+        return MQTT_ERR_SUCCESS
+
+    def subscribe(self, topic, qos=0):
+        topics = topic if isinstance(topic, list) else [(topic, qos)]
+        for name, _ in topics:
+            if name not in self.subscriptions:
+                self.subscriptions.append(name)
+        return (MQTT_ERR_SUCCESS, len(self.subscriptions))
+
+    def unsubscribe(self, topic):
+        if topic in self.subscriptions:
+            self.subscriptions.remove(topic)
+        return (MQTT_ERR_SUCCESS, 0)
+
+    def is_subscribed(self, topic):
+        return any(topic_matches(sub, topic) for sub in self.subscriptions)
+
+    def publish(self, topic, payload=None, qos=0, retain=False):
+        if not self.connected:
+            return LoopbackResult(MQTT_ERR_NO_CONN, 0)
+        return LoopbackResult(MQTT_ERR_SUCCESS, self.broker.publish(topic, payload, qos, retain))
+
+    def _deliver(self, msg):
+        if self.inbox is not None:
+            self.inbox.put(msg)
+        elif self.on_message:
+            self.on_message(self, self.userdata, msg)
+
+    def _loop(self):
+        while not self.stopped.is_set():
+            try:
+                msg = self.inbox.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if msg is None:
+                break
+            if self.on_message:
+                try:
+                    self.on_message(self, self.userdata, msg)
+                except Exception as e:
+                    # Satu handler yang gagal tidak boleh menghentikan pengiriman pesan berikutnya
+                    self.errors += 1
+                    if self.errors == 1:
+                        print(f"⚠️  {self.client_id or 'loopback'}: on_message failed on {msg.topic}: {e!r}")
+
+    def loop_start(self):
+        self.inbox = queue.Queue()
+        self.stopped.clear()
+        self.thread = threading.Thread(target=self._loop, daemon=True)
+        self.thread.start()
+
+    def loop_stop(self):
+        if self.thread is not None:
+            self.stopped.set()
+            self.inbox.put(None)
+            self.thread.join()
+            self.thread = None
+        self.inbox = None
+
+    def loop_forever(self):
+        self.inbox = queue.Queue()
+        self.stopped.clear()
+        self._loop()
+
+    def pending(self):
+        return self.inbox.qsize() if self.inbox is not None else 0
+
+    def disconnect(self):
+        self.connected = False
+        self.broker.detach(self)
+        self.stopped.set()
+        if self.inbox is not None:
+            self.inbox.put(None)
+        if self.on_disconnect:
+            self.on_disconnect(self, self.userdata, 0)
+        return MQTT_ERR_SUCCESS
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Message Bus - Decode payload MQTT sekali menjadi Record immutable,
+lalu dispatch ke semua consumer in-process yang cocok dengan topic-nya
+"""
+
+import json
+import time
+from types import MappingProxyType
+
+from loopback import topic_matches
+
+# ===== RECORD =====
+class Record:
+    """
+    Satu pesan MQTT yang sudah di-decode: topic, payload (bytes), text (str),
+    data (hasil json.loads, read-only) dan receive_time. Dibagi ke semua stage,
+    jadi tidak boleh diubah.
+    """
+    __slots__ = ('topic', 'payload', 'text', 'data', 'error', 'receive_time')
+
+    def __init__(self, topic, payload, receive_time=None):
+        if isinstance(payload, str):
+            text = payload
+            payload = payload.encode('utf-8')
+        else:
+            text = payload.decode('utf-8', errors='replace')
+        try:
+            data = json.loads(text)
+            error = None
+        except ValueError as e:
+            data = None
+            error = e
+        if isinstance(data, dict):
+            data = MappingProxyType(data)
+        set_field = object.__setattr__
+        set_field(self, 'topic', topic)
+        set_field(self, 'payload', payload)
+        set_field(self, 'text', text)
+        set_field(self, 'data', data)
+        set_field(self, 'error', error)
+        set_field(self, 'receive_time', time.time() if receive_time is None else receive_time)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Record is immutable")
+
+    @classmethod
+    def from_message(cls, msg, receive_time=None):
+        return cls(msg.topic, msg.payload, receive_time)
+
+    def get(self, key, default=None):
+        """Field payload JSON (None bila payload bukan JSON object)"""
+        if isinstance(self.data, MappingProxyType):
+            return self.data.get(key, default)
+        return default
+
+# ===== BUS =====
+class StageStats:
+    __slots__ = ('messages', 'errors', 'busy_s')
+
+    def __init__(self):
+        self.messages = 0
+        self.errors = 0
+        self.busy_s = 0.0
+
+class MessageBus:
+    """Routing Record ke handler(record) berdasarkan filter topic MQTT (+ dan #)"""
+
+    def __init__(self):
+        self.routes = []   # (filter, stage, handler)
+        self.stats = {}
+
+    def subscribe(self, topic_filter, handler, stage):
+        self.routes.append((topic_filter, stage, handler))
+        self.stats.setdefault(stage, StageStats())
+
+    def topics(self):
+        """Filter topic unik untuk di-subscribe di koneksi MQTT bersama"""
+        seen = []
+        for topic_filter, _, _ in self.routes:
+            if topic_filter not in seen:
+                seen.append(topic_filter)
+        return seen
+
+    def dispatch(self, record):
+        delivered = set()
+        for topic_filter, stage, handler in self.routes:
+            if stage in delivered or not topic_matches(topic_filter, record.topic):
+                continue
+            delivered.add(stage)
+            stage_stats = self.stats[stage]
+            stage_stats.messages += 1
+            start = time.perf_counter()
+            try:
+                handler(record)
+            except Exception as e:
+                # Error di satu stage tidak boleh menghentikan stage lain
+                stage_stats.errors += 1
+                print(f"❌ [{stage}] {e}")
+            stage_stats.busy_s += time.perf_counter() - start
+        return len(delivered)
+
+    def print_statistics(self):
+        print("\n📬 MESSAGE BUS")
+        print(f"   {'Stage':<12} | {'Messages':>9} | {'Errors':>6} | {'Avg (ms)':>9}")
+        for stage, s in self.stats.items():
+            avg = s.busy_s * 1000 / s.messages if s.messages else 0.0
+            print(f"   {stage:<12} | {s.messages:9d} | {s.errors:6d} | {avg:9.3f}")
@@ -6,9 +6,14 @@ MQTT Publisher dengan ASCON Encryption + ThingSpeak Integration
 import paho.mqtt.client as mqtt
 import json
 import time
+from collections.abc import Mapping
 from datetime import datetime
 import ascon  
-import requests
+from key_store import KeyStore
+from message_bus import Record
+from tracing import publisher_trace
+from rate_limiter import RateLimiter, report_flood, report_recover, sender_key
+import profiling
 
 # ===== KONFIGURASI MQTT =====
 BROKER = "broker.hivemq.com"
@@ -17,13 +22,24 @@ TOPIC_RAW = "iot/sensor/distance/raw"
 TOPIC_ENCRYPTED = "iot/sensor/distance/enc"
 CLIENT_ID = "Python_Encryptor"
 THINGSPEAK_API = "ET2DBONJU765X8CC"
+THINGSPEAK_ENABLED = True
+TRACE_ENABLED = True   # Sertakan timestamp per tahap (trace) di payload terenkripsi
+
+# ===== KONFIGURASI RATE LIMIT (per device, sebelum decode) =====
+# Bucket per (topic, id device): device yang flood dibuang, device lain di TOPIC_RAW tetap lolos
+RATE_LIMIT_ENABLED = True
+RATE_LIMIT = {"rate": 50, "burst": 200, "action": "drop"}
 
 # ===== KONFIGURASI ASCON =====
-KEY = "asconciphertest1".encode('utf-8')      # 16 bytes
+KEY = "asconciphertest1".encode('utf-8')      # 16 bytes (kunci default, key_id "k0")
+KEYS_FILE = "keys.json"                       # Kunci tambahan untuk rotasi (lihat key_store.py)
 NONCE = "asconcipher1test".encode('utf-8')    # 16 bytes
 ASSOCIATED_DATA = b"ASCON"
 VARIANT = "Ascon-128"
 
+key_store = KeyStore(KEYS_FILE, default_key=KEY, variant=VARIANT)
+limiter = RateLimiter(on_flood=report_flood, on_recover=report_recover, **RATE_LIMIT)
+
 # ===== STATISTIK =====
 stats = {
     "total_messages": 0,
@@ -34,6 +50,10 @@ stats = {
 
 # ===== FUNGSI THINGSPEAK =====
 def send_to_thingspeak(distance, enc_time):
+    if not THINGSPEAK_ENABLED:
+        return
+    import requests  # Lazy: modul HTTP hanya dimuat bila ThingSpeak dipakai
+    
     url = (
         f"https://api.thingspeak.com/update?api_key={THINGSPEAK_API}"
         f"&field1={distance}&field2={enc_time}"
@@ -45,7 +65,7 @@ def send_to_thingspeak(distance, enc_time):
         print(f"❌ ThingSpeak Error: {e}")
 
 # ===== FUNGSI ENKRIPSI =====
-def encrypt_data(plaintext_data):
+def encrypt_data(plaintext_data, key=KEY):
     try:
         if isinstance(plaintext_data, dict):
             plaintext_data = json.dumps(plaintext_data)
@@ -53,7 +73,7 @@ def encrypt_data(plaintext_data):
         ciphertext = ascon.demo_aead_c(
             VARIANT,
             plaintext_data,
-            KEY,
+            key,
             NONCE,
             ASSOCIATED_DATA
         )
@@ -73,42 +93,62 @@ def on_connect(client, userdata, flags, rc):
 
 # ===== CALLBACK MESSAGE =====
 def on_message(client, userdata, msg):
+    if RATE_LIMIT_ENABLED and not limiter.allow(sender_key(msg.topic, msg.payload)):
+        return   # Flood dari device ini: dibuang sebelum decode/enkripsi
+    handle_record(client, Record.from_message(msg))
+
+def handle_record(client, record):
+    """Enkripsi satu pesan raw yang sudah di-decode (dipakai juga oleh gateway)"""
     try:
         stats["total_messages"] += 1
         
-        payload = msg.payload.decode('utf-8')
+        payload = record.text
         print("\n" + "="*60)
         print(f"📩 Message #{stats['total_messages']}")
         print(f"🕐 {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        print(f"📝 Topic: {msg.topic}")
+        print(f"📝 Topic: {record.topic}")
         print(f"📦 Raw: {payload}")
 
-        # Parsing JSON
-        try:
-            data = json.loads(payload)
-            distance = data.get("distance", None)
+        # Payload sudah di-parse sekali di Record
+        distance = record.get("distance")
+        if record.data is not None:
             print(f"📊 Distance: {distance} cm")
-        except:
-            data = payload
-            distance = None
 
+        # Pilih kunci aktif (rotasi kunci tanpa restart)
+        key_store.reload_if_changed()
+        key_id, key = key_store.current()
+        if key is None:
+            print("❌ No valid encryption key!")
+            stats["errors"] += 1
+            return
+        
         # Enkripsi
-        print("🔐 Encrypting with ASCON...")
+        print(f"🔐 Encrypting with ASCON (key {key_id})...")
         start_time = time.time()
-        encrypted_data = encrypt_data(payload)
-        encryption_time = round((time.time() - start_time) * 1000, 3)
+        encrypted_data = encrypt_data(payload, key)
+        end_time = time.time()
+        encryption_time = round((end_time - start_time) * 1000, 3)
 
         if encrypted_data:
             encrypted_hex = encrypted_data.hex()
 
+            # device_id di depan (cleartext, seperti key_id) supaya limiter subscriber
+            # bisa membedakan device dari prefix payload tanpa parse / dekripsi
+            device = record.get("id")
             encrypted_payload = {
+                "device_id": device if isinstance(device, str) else "unknown",
                 "encrypted_data": encrypted_hex,
+                "key_id": key_id,
                 "encryption_time_ms": encryption_time,
                 "algorithm": VARIANT,
                 "timestamp": datetime.now().isoformat(),
                 "original_size": len(payload),
                 "encrypted_size": len(encrypted_data)
             }
+            # Trace hanya untuk payload JSON object; [1,2] / 42 tetap dienkripsi tanpa trace
+            if TRACE_ENABLED and isinstance(record.data, Mapping):
+                encrypted_payload["trace"] = publisher_trace(
+                    record.data, record.receive_time, start_time, end_time, time.time())
 
             result = client.publish(TOPIC_ENCRYPTED, json.dumps(encrypted_payload))
 
@@ -151,6 +191,8 @@ def print_statistics():
     if stats["total_messages"] > 0:
         rate = (stats["encrypted_messages"] / stats["total_messages"]) * 100
         print(f"✅ Success Rate: {rate:.2f}%")
+    if limiter.limited:
+        limiter.print_statistics()
     print("="*60)
 
 # ===== MAIN =====
@@ -159,6 +201,8 @@ def main():
     print("🚀 MQTT ASCON Encryptor + ThingSpeak")
     print("="*60)
 
+    profiling.install("publisher")
+
     client = mqtt.Client(client_id=CLIENT_ID)
     client.on_connect = on_connect
     client.on_message = on_message
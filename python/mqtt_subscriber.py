@@ -7,8 +7,16 @@ Menerima data terenkripsi, dekripsi dengan ASCON, dan tampilkan hasil
 import paho.mqtt.client as mqtt
 import json
 import time
+import argparse
 from datetime import datetime
 import ascon  # Import modul ASCON yang sudah ada
+from quantile_sketch import SketchSet
+from key_store import KeyStore, DEFAULT_KEY_ID
+from message_bus import Record
+from tracing import Tracer, TRACE_PATH, trace_id, valid_trace
+from rate_limiter import RateLimiter, report_flood, report_recover, sender_key
+from replay_filter import ReplayFilter
+import profiling
 
 # ===== KONFIGURASI MQTT =====
 BROKER = "broker.hivemq.com"  # Ganti dengan broker Anda
@@ -18,28 +26,61 @@ CLIENT_ID = "Python_Decryptor"
 
 # ===== KONFIGURASI ASCON =====
 # Key dan nonce HARUS SAMA dengan yang digunakan untuk enkripsi
-KEY = "asconciphertest1".encode('utf-8')  # 16 bytes key
+KEY = "asconciphertest1".encode('utf-8')  # 16 bytes key (kunci default, key_id "k0")
+KEYS_FILE = "keys.json"  # Kunci tambahan untuk rotasi (lihat key_store.py)
 NONCE = "asconcipher1test".encode('utf-8')  # 16 bytes nonce
 ASSOCIATED_DATA = b"ASCON"
 VARIANT = "Ascon-128"
 
+key_store = KeyStore(KEYS_FILE, default_key=KEY, variant=VARIANT)
+
+# ===== KONFIGURASI PENYIMPANAN =====
+STORE_ENABLED = True
+STORE_PATH = "readings.db"
+store = None
+
 # ===== STATISTIK =====
 stats = {
     "total_messages": 0,
     "decrypted_messages": 0,
     "failed_decryptions": 0,
+    "replays_blocked": 0,
     "total_decryption_time": 0,
     "start_time": time.time()
 }
 
+# ===== PERSENTIL (t-digest) =====
+PERCENTILE_REPORT_EVERY = 100   # Laporan persentil setiap N pesan
+SKETCH_PATH = "sketch_subscriber.json"  # Disimpan saat shutdown (bisa di-merge antar worker)
+sketches = SketchSet(["decrypt_ms", "delivery_ms", "distance_cm"])
+SKETCH_UNITS = {"decrypt_ms": "ms", "delivery_ms": "ms", "distance_cm": "cm"}
+
+# ===== TRACING END-TO-END =====
+TRACE_ENABLED = True   # Gabungkan trace dari publisher menjadi span per tahap (lihat tracing.py)
+tracer = Tracer(TRACE_PATH)
+
+# ===== RATE LIMIT (per device, sebelum decode) =====
+# Bucket per (topic, device_id dari publisher): device yang flood dikarantina tanpa
+# menahan device lain di TOPIC_ENCRYPTED. Payload tanpa device_id berbagi satu bucket.
+RATE_LIMIT_ENABLED = True
+RATE_LIMIT = {"rate": 50, "burst": 200, "action": "quarantine", "quarantine_s": 10}
+limiter = RateLimiter(on_flood=report_flood, on_recover=report_recover, **RATE_LIMIT)
+
+# ===== REPLAY FILTER =====
+# Ciphertext identik dalam horizon filter dianggap replay dan tidak didekripsi (lihat replay_filter.py).
+# Hanya ciphertext yang lolos dekripsi (tag valid) yang dicatat: junk/forgery tidak bisa
+# memenuhi filter dan memaksa rotasi untuk "melupakan" ciphertext asli.
+REPLAY_FILTER_ENABLED = True
+replay_filter = ReplayFilter()
+
 # ===== FUNGSI DEKRIPSI =====
-def decrypt_data(ciphertext_bytes):
+def decrypt_data(ciphertext_bytes, key=KEY):
     """
     Dekripsi data menggunakan ASCON
     """
     try:
         # Dekripsi menggunakan ASCON
-        plaintext_bytes = ascon.demo_aead_p(VARIANT, ciphertext_bytes)
+        plaintext_bytes = ascon.ascon_decrypt(key, NONCE, ASSOCIATED_DATA, ciphertext_bytes, VARIANT)
         
         if plaintext_bytes is None:
             print("❌ Decryption failed: Authentication tag mismatch!")
@@ -64,23 +105,45 @@ def on_connect(client, userdata, flags, rc):
 
 # ===== CALLBACK SAAT MENERIMA PESAN =====
 def on_message(client, userdata, msg):
+    if RATE_LIMIT_ENABLED and not limiter.allow(sender_key(msg.topic, msg.payload)):
+        return   # Flood dari device ini: dibuang sebelum decode/dekripsi
+    handle_record(client, Record.from_message(msg))
+
+def handle_record(client, record):
+    """Entry point untuk Record yang sudah di-decode (dipakai juga oleh gateway)"""
+    process_message(record.topic, record.text, record.receive_time, record.data)
+
+def process_message(topic, payload, receive_time, encrypted_payload=None):
+    """Proses satu pesan terenkripsi (dipakai live dan saat replay offline)"""
     try:
         stats["total_messages"] += 1
         
         # Decode payload
-        payload = msg.payload.decode('utf-8')
+        if isinstance(payload, bytes):
+            payload = payload.decode('utf-8')
         
         print(f"\n{'='*60}")
         print(f"📩 Received encrypted message #{stats['total_messages']}")
-        print(f"🕐 Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        print(f"📝 Topic: {msg.topic}")
+        print(f"🕐 Time: {datetime.fromtimestamp(receive_time).strftime('%Y-%m-%d %H:%M:%S')}")
+        print(f"📝 Topic: {topic}")
         
-        # Parse JSON
+        # Parse JSON (kecuali sudah di-parse oleh Record)
         try:
-            encrypted_payload = json.loads(payload)
+            if encrypted_payload is None:
+                encrypted_payload = json.loads(payload)
             encrypted_hex = encrypted_payload.get("encrypted_data")
             original_encryption_time = encrypted_payload.get("encryption_time_ms", 0)
             
+            # Delay pengiriman: waktu terima - timestamp dari publisher (wall clock).
+            # Timestamp device adalah millis() sejak boot sehingga tidak bisa dikurangkan langsung.
+            published_at = encrypted_payload.get("timestamp")
+            if published_at:
+                try:
+                    delivery_ms = (receive_time - datetime.fromisoformat(published_at).timestamp()) * 1000
+                    sketches.add("delivery_ms", delivery_ms)
+                except ValueError:
+                    pass
+            
             print(f"🔢 Encrypted data (hex): {encrypted_hex[:32]}...")
             print(f"📏 Encrypted size: {encrypted_payload.get('encrypted_size', 'N/A')} bytes")
             print(f"⏱️  Original encryption time: {original_encryption_time} ms")
@@ -97,16 +160,34 @@ def on_message(client, userdata, msg):
             stats["failed_decryptions"] += 1
             return
         
+        if REPLAY_FILTER_ENABLED and replay_filter.seen(ciphertext_bytes):
+            stats["replays_blocked"] += 1
+            print("🔁 REPLAY BLOCKED: identical ciphertext already received")
+            return
+        
+        # Pilih kunci berdasarkan key_id (lookup langsung, tanpa mencoba semua kunci);
+        # key_id baru memaksa reload supaya rotasi tidak menolak pesan pertama
+        key_id = encrypted_payload.get("key_id", DEFAULT_KEY_ID)
+        key = key_store.lookup(key_id)
+        if key is None:
+            print(f"❌ Unknown or expired key ID: {key_id}")
+            stats["failed_decryptions"] += 1
+            return
+        
         # Dekripsi data
-        print("🔓 Decrypting with ASCON...")
+        print(f"🔓 Decrypting with ASCON (key {key_id})...")
         start_time = time.time()
         
-        decrypted_data = decrypt_data(ciphertext_bytes)
+        decrypted_data = decrypt_data(ciphertext_bytes, key)
         
-        decryption_time = (time.time() - start_time) * 1000  # Convert to ms
+        end_time = time.time()
+        decryption_time = (end_time - start_time) * 1000  # Convert to ms
         stats["total_decryption_time"] += decryption_time
+        sketches.add("decrypt_ms", decryption_time)
         
         if decrypted_data:
+            if REPLAY_FILTER_ENABLED:
+                replay_filter.check_and_add(ciphertext_bytes)
             stats["decrypted_messages"] += 1
             
             print(f"✅ Decryption successful!")
@@ -114,6 +195,7 @@ def on_message(client, userdata, msg):
             print(f"📦 Decrypted data: {decrypted_data}")
             
             # Parse decrypted JSON data
+            sensor_data = None
             try:
                 sensor_data = json.loads(decrypted_data)
                 print("\n📊 Sensor Information:")
@@ -123,6 +205,30 @@ def on_message(client, userdata, msg):
                 print(f"   ⏰ Device Timestamp: {sensor_data.get('timestamp', 'N/A')}")
             except:
                 print("   (Not JSON format)")
+            
+            if isinstance(sensor_data, dict) and isinstance(sensor_data.get('distance'), (int, float)):
+                sketches.add("distance_cm", sensor_data['distance'])
+            
+            # Simpan ke time-series store
+            if store is not None and isinstance(sensor_data, dict):
+                store.add(
+                    sensor_data.get('id', 'unknown'),
+                    sensor_data.get('count'),
+                    sensor_data.get('distance'),
+                    sensor_data.get('timestamp'),
+                    receive_time,
+                    decryption_time
+                )
+            
+            # Trace hanya dipakai bila valid dan ID-nya cocok dengan data yang terautentikasi;
+            # trace rusak tidak boleh membuat pesan yang sudah terdekripsi dihitung gagal
+            trace = encrypted_payload.get("trace")
+            if (TRACE_ENABLED and valid_trace(trace) and isinstance(sensor_data, dict)
+                    and trace["id"] == trace_id(sensor_data.get('id', 'unknown'), sensor_data.get('count'))):
+                try:
+                    tracer.record(trace, receive_time, start_time, end_time)
+                except (TypeError, ValueError, KeyError, OverflowError) as e:
+                    print(f"⚠️  Trace ignored: {e}")
                 
         else:
             stats["failed_decryptions"] += 1
@@ -131,6 +237,62 @@ def on_message(client, userdata, msg):
     except Exception as e:
         print(f"❌ Error processing message: {e}")
         stats["failed_decryptions"] += 1
+    
+    if stats["total_messages"] % PERCENTILE_REPORT_EVERY == 0:
+        sketches.print_report("PERCENTILES (live)", SKETCH_UNITS)
+
+# ===== ANALISIS OFFLINE =====
+def analyze_offline(path):
+    """
+    Hitung statistik yang sama dengan mode live dari rekaman:
+    log output subscriber (teks) atau capture JSONL berisi payload terenkripsi.
+    """
+    import io
+    import contextlib
+    import log_replay
+    
+    fmt = log_replay.detect_format(path)
+    print(f"📂 Offline analysis: {path} ({fmt})")
+    first_time = last_time = None
+    
+    if fmt == "subscriber_log":
+        # Log teks sudah berisi hasil dekripsi: cukup agregasi ulang
+        for record in log_replay.iter_subscriber_records(path):
+            stats["total_messages"] += 1
+            first_time = first_time or record['receive_time']
+            last_time = record['receive_time']
+            if record['decrypt_ms'] is None:
+                stats["failed_decryptions"] += 1
+                continue
+            stats["decrypted_messages"] += 1
+            stats["total_decryption_time"] += record['decrypt_ms']
+            sketches.add("decrypt_ms", record['decrypt_ms'])
+            sensor_data = record['sensor']
+            if isinstance(sensor_data, dict) and isinstance(sensor_data.get('distance'), (int, float)):
+                sketches.add("distance_cm", sensor_data['distance'])
+            if store is not None and isinstance(sensor_data, dict):
+                store.add(sensor_data.get('id', 'unknown'), sensor_data.get('count'),
+                          sensor_data.get('distance'), sensor_data.get('timestamp'),
+                          record['receive_time'], record['decrypt_ms'])
+    elif fmt == "jsonl":
+        # Capture mentah: dekripsi ulang setiap payload, output per pesan dibuang
+        with contextlib.redirect_stdout(io.StringIO()) as sink:
+            for t, topic, data in log_replay.iter_jsonl(path):
+                if not isinstance(data, dict) or "encrypted_data" not in data:
+                    continue
+                t = t or time.time()
+                first_time = first_time or t
+                last_time = t
+                process_message(topic or TOPIC_ENCRYPTED, None, t, data)
+                sink.seek(0)
+                sink.truncate()
+    else:
+        print(f"❌ Unrecognized log format: {path}")
+        return
+    
+    if first_time is not None:
+        stats["start_time"] = first_time
+        stats["end_time"] = last_time
 
 # ===== CALLBACK DISCONNECT =====
 def on_disconnect(client, userdata, rc):
@@ -138,16 +300,64 @@ def on_disconnect(client, userdata, rc):
         print(f"⚠️  Unexpected disconnection. Code: {rc}")
         print("🔄 Attempting to reconnect...")
 
+# ===== STARTUP / SHUTDOWN (dipakai main dan gateway) =====
+def open_store():
+    global store
+    if STORE_ENABLED and store is None:
+        from reading_store import ReadingStore  # Lazy: sqlite3 hanya dimuat bila storage aktif
+        store = ReadingStore(STORE_PATH)
+
+def close_store():
+    """Flush baris yang masih di-buffer lalu tutup store (aman dipanggil berulang)"""
+    global store
+    if store is not None:
+        store.close()
+        print(f"💾 {store.rows_written} readings saved to {STORE_PATH}")
+        store = None
+
+def shutdown():
+    print_statistics()
+    if limiter.limited:
+        limiter.print_statistics()
+    sketches.save(SKETCH_PATH)
+    print(f"📐 Percentile sketch saved to {SKETCH_PATH}")
+    close_store()
+    if tracer.count:
+        tracer.close()
+        print(f"🧭 {tracer.count} traces saved to {TRACE_PATH}")
+
 # ===== MAIN PROGRAM =====
 def main():
+    parser = argparse.ArgumentParser(description="MQTT Subscriber with ASCON Decryption")
+    parser.add_argument("--offline", metavar="FILE",
+                        help="Analisis rekaman (log subscriber / capture JSONL) tanpa broker")
+    args = parser.parse_args()
+    
     print("="*60)
     print("🚀 MQTT Subscriber with ASCON Decryption")
     print("="*60)
     print(f"📡 Broker: {BROKER}:{PORT}")
     print(f"📥 Subscribe: {TOPIC_ENCRYPTED}")
     print(f"🔓 Algorithm: {VARIANT}")
+    if STORE_ENABLED:
+        print(f"💾 Storage: {STORE_PATH}")
     print("="*60)
     
+    open_store()
+    try:
+        run(args)
+    finally:
+        # Semua jalur keluar (termasuk error tak terduga) tetap menyimpan baris ter-buffer
+        close_store()
+
+def run(args):
+    if args.offline:
+        analyze_offline(args.offline)
+        shutdown()
+        return
+    
+    profiling.install("subscriber")
+    
     # Setup MQTT Client
     client = mqtt.Client(client_id=CLIENT_ID)
     client.on_connect = on_connect
@@ -167,15 +377,15 @@ def main():
         
     except KeyboardInterrupt:
         print("\n\n🛑 Stopping...")
-        print_statistics()
         client.disconnect()
+        shutdown()
         print("👋 Goodbye!")
     except Exception as e:
         print(f"❌ Error: {e}")
 
 # ===== FUNGSI STATISTIK =====
 def print_statistics():
-    runtime = time.time() - stats["start_time"]
+    runtime = (stats.get("end_time") or time.time()) - stats["start_time"]
     print("\n" + "="*60)
     print("📊 STATISTICS")
     print("="*60)
@@ -183,6 +393,8 @@ def print_statistics():
     print(f"📨 Total messages received: {stats['total_messages']}")
     print(f"🔓 Successfully decrypted: {stats['decrypted_messages']}")
     print(f"❌ Failed decryptions: {stats['failed_decryptions']}")
+    if stats['replays_blocked']:
+        print(f"🔁 Replays blocked: {stats['replays_blocked']}")
     
     if stats['total_messages'] > 0:
         success_rate = (stats['decrypted_messages'] / stats['total_messages']) * 100
@@ -192,6 +404,10 @@ def print_statistics():
         avg_time = stats['total_decryption_time'] / stats['decrypted_messages']
         print(f"⏱️  Average decryption time: {avg_time:.3f} ms")
     
+    sketches.print_report("PERCENTILES", SKETCH_UNITS)
+    if TRACE_ENABLED:
+        tracer.print_report()
+    
     print("="*60)
 
 if __name__ == "__main__":
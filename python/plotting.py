@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Energy Plotting - Plot ter-downsample (LTTB) dan render di background process
+Waktu plot tetap konstan walaupun jumlah cycle mencapai jutaan
+"""
+
+import multiprocessing
+import numpy as np
+
+# ===== KONFIGURASI =====
+PLOT_MAX_POINTS = 2000   # Titik per seri setelah downsampling
+PLOT_DPI = 300
+SNAPSHOT_DPI = 100
+
+# Field yang dibutuhkan untuk plot (subset dari ENERGY_DTYPE)
+PLOT_FIELDS = ('cycle', 'total_energy', 'cumulative_energy', 'avg_power', 'sensor_time', 'mqtt_time')
+
+# ===== LARGEST-TRIANGLE-THREE-BUCKETS =====
+def lttb(x, y, threshold=PLOT_MAX_POINTS):
+    """
+    Downsample seri (x, y) menjadi `threshold` titik dengan LTTB.
+    Titik pertama dan terakhir selalu dipertahankan; dari tiap bucket dipilih titik
+    yang membentuk segitiga terbesar dengan titik terpilih sebelumnya dan rata-rata bucket berikutnya,
+    sehingga puncak/lembah tetap terlihat.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.asarray(x), np.asarray(y)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    every = (n - 2) / (threshold - 2)
+
+    indices = np.empty(threshold, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = n - 1
+    a = 0
+    for i in range(threshold - 2):
+        avg_start = int((i + 1) * every) + 1
+        avg_end = min(int((i + 2) * every) + 1, n)
+        avg_x = x[avg_start:avg_end].mean()
+        avg_y = y[avg_start:avg_end].mean()
+
+        range_start = int(i * every) + 1
+        range_end = int((i + 1) * every) + 1
+        area = np.abs(
+            (x[a] - avg_x) * (y[range_start:range_end] - y[a])
+            - (x[a] - x[range_start:range_end]) * (avg_y - y[a])
+        )
+        a = range_start + int(area.argmax())
+        indices[i + 1] = a
+
+    return x[indices], y[indices]
+
+def downsample_energy(data, max_points=PLOT_MAX_POINTS):
+    """
+    Downsample semua seri energi dari structured array / dict of arrays.
+    Mengembalikan dict {field: (x, y)} yang kecil dan murah untuk dikirim ke proses lain.
+    """
+    cycles = data['cycle']
+    return {
+        name: lttb(cycles, data[name], max_points)
+        for name in PLOT_FIELDS if name != 'cycle'
+    }
+
+# ===== RENDER =====
+def render_energy_plots(series, filename=None, dpi=PLOT_DPI, show=False, title_suffix=""):
+    """
+    Gambar 4 panel plot energi dari seri yang sudah di-downsample.
+    show=False memakai backend Agg (tanpa display), cocok untuk headless/background.
+    """
+    import matplotlib
+    if not show:
+        matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    fig, axes = plt.subplots(2, 2, figsize=(14, 10))
+    fig.suptitle('ESP32 Energy Consumption Analysis' + title_suffix, fontsize=16)
+
+    # Plot 1: Energy per cycle
+    axes[0, 0].plot(*series['total_energy'], 'b-', linewidth=2)
+    axes[0, 0].set_xlabel('Cycle')
+    axes[0, 0].set_ylabel('Energy (mJ)')
+    axes[0, 0].set_title('Energy Consumption per Cycle')
+    axes[0, 0].grid(True, alpha=0.3)
+
+    # Plot 2: Cumulative energy
+    axes[0, 1].plot(*series['cumulative_energy'], 'g-', linewidth=2)
+    axes[0, 1].set_xlabel('Cycle')
+    axes[0, 1].set_ylabel('Cumulative Energy (mJ)')
+    axes[0, 1].set_title('Cumulative Energy Consumption')
+    axes[0, 1].grid(True, alpha=0.3)
+
+    # Plot 3: Average power
+    axes[1, 0].plot(*series['avg_power'], 'r-', linewidth=2)
+    axes[1, 0].set_xlabel('Cycle')
+    axes[1, 0].set_ylabel('Power (mW)')
+    axes[1, 0].set_title('Average Power Consumption')
+    axes[1, 0].grid(True, alpha=0.3)
+
+    # Plot 4: Time breakdown
+    axes[1, 1].plot(*series['sensor_time'], 'b-', label='Sensor Read', linewidth=2)
+    axes[1, 1].plot(*series['mqtt_time'], 'r-', label='MQTT Publish', linewidth=2)
+    axes[1, 1].set_xlabel('Cycle')
+    axes[1, 1].set_ylabel('Time (μs)')
+    axes[1, 1].set_title('Execution Time Breakdown')
+    axes[1, 1].legend()
+    axes[1, 1].grid(True, alpha=0.3)
+
+    plt.tight_layout()
+
+    if filename:
+        plt.savefig(filename, dpi=dpi)
+
+    if show:
+        plt.show()
+    plt.close(fig)
+    return filename
+
+def _render_worker(series, filename, dpi, title_suffix):
+    render_energy_plots(series, filename, dpi=dpi, show=False, title_suffix=title_suffix)
+
+def _downsample_render_worker(segments, filename, dpi, title_suffix, max_points):
+    """Gabung segmen ring buffer + LTTB di child process, bukan di thread MQTT"""
+    data = segments[0] if len(segments) == 1 else np.concatenate(segments)
+    _render_worker(downsample_energy(data, max_points), filename, dpi, title_suffix)
+
+def _fork_context():
+    try:
+        return multiprocessing.get_context("fork")
+    except ValueError:
+        return None   # Windows: tidak ada fork
+
+# ===== BACKGROUND RENDERER =====
+class PlotRenderer:
+    """
+    Render plot di process terpisah supaya thread MQTT tidak ikut menunggu matplotlib.
+    Bila render sebelumnya belum selesai, snapshot baru dilewati (coalesce) agar antrean tidak menumpuk.
+    Dengan fork, buffer mentah diwarisi child (copy-on-write, tanpa salinan/pickle) sehingga
+    penggabungan segmen dan LTTB juga berjalan di child; tanpa fork (Windows) downsampling
+    tetap di parent supaya yang di-pickle hanya seri kecil.
+    """
+
+    def __init__(self):
+        self.process = None
+        self.skipped = 0
+        self.context = _fork_context()
+
+    def busy(self):
+        return self.process is not None and self.process.is_alive()
+
+    def submit(self, data, filename, dpi=SNAPSHOT_DPI, title_suffix="", max_points=PLOT_MAX_POINTS):
+        """data: structured array atau tuple segmen (RingBuffer.segments(), zero-copy)"""
+        if self.busy():
+            self.skipped += 1
+            return False
+        segments = tuple(data) if isinstance(data, tuple) else (data,)
+        if self.context is not None:
+            self.process = self.context.Process(
+                target=_downsample_render_worker,
+                args=(segments, filename, dpi, title_suffix, max_points),
+                daemon=True,
+            )
+        else:
+            data = segments[0] if len(segments) == 1 else np.concatenate(segments)
+            self.process = multiprocessing.Process(
+                target=_render_worker,
+                args=(downsample_energy(data, max_points), filename, dpi, title_suffix),
+                daemon=True,
+            )
+        self.process.start()
+        return True
+
+    def wait(self, timeout=None):
+        if self.process is not None:
+            self.process.join(timeout)
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Profiling Hooks - Aktif/nonaktifkan profiler lewat sinyal tanpa restart service
+    kill -USR1 <pid>   → mulai capture
+    kill -USR1 <pid>   → berhenti dan dump ke file
+
+Mode:
+    cprofile : cProfile (deterministik) pada thread utama, dump .prof (buka dengan pstats/snakeviz)
+    sample   : stack sampling semua thread, dump .folded (format flamegraph.pl / speedscope)
+Counter ASCON (ascon.get_counters) selama capture ikut disimpan ke <file>.counters.json
+"""
+
+import os
+import sys
+import json
+import time
+import signal
+import threading
+from collections import Counter
+
+# ===== KONFIGURASI =====
+PROFILE_DIR = "profiles"
+DEFAULT_MODE = os.environ.get("IOT_PROFILE_MODE", "cprofile")   # "cprofile" atau "sample"
+SAMPLE_INTERVAL = 0.005   # Detik antar sampel stack
+TOP_N = 15
+
+# ===== STACK SAMPLER =====
+class StackSampler:
+    """Ambil stack semua thread setiap SAMPLE_INTERVAL dan hitung stack yang sama (collapsed)"""
+
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self.stopped.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+
+    def dump(self, path):
+        with open(path, 'w') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+    def print_top(self, top=TOP_N):
+        leaves = Counter()
+        for stack, count in self.stacks.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        total = sum(leaves.values()) or 1
+        print(f"   {'Samples':>8} | {'Share':>6} | Function")
+        for name, count in leaves.most_common(top):
+            print(f"   {count:8d} | {count / total * 100:5.1f}% | {name}")
+
+# ===== PROFILER TOGGLE =====
+class SignalProfiler:
+    """Satu capture aktif per proses; toggle() memulai atau menghentikan + dump"""
+
+    def __init__(self, name, mode=DEFAULT_MODE, directory=PROFILE_DIR):
+        self.name = name
+        self.mode = mode
+        self.directory = directory
+        self.active = None
+        self.started = 0
+        self.counters_start = None
+
+    def toggle(self, *_):
+        if self.active is None:
+            self.start()
+        else:
+            self.stop()
+
+    def start(self):
+        import ascon
+        if self.mode == "sample":
+            self.active = StackSampler()
+            self.active.start()
+        else:
+            import cProfile
+            self.active = cProfile.Profile()
+            self.active.enable()
+        self.started = time.time()
+        self.counters_start = ascon.get_counters()
+        print(f"\n🔬 Profiling started ({self.mode}); send SIGUSR1 again to stop")
+
+    def stop(self):
+        import ascon
+        profiler, self.active = self.active, None
+        duration = time.time() - self.started
+        os.makedirs(self.directory, exist_ok=True)
+        stamp = time.strftime("%Y%m%d_%H%M%S")
+        if self.mode == "sample":
+            profiler.stop()
+            path = os.path.join(self.directory, f"{self.name}_{stamp}.folded")
+            profiler.dump(path)
+        else:
+            profiler.disable()
+            path = os.path.join(self.directory, f"{self.name}_{stamp}.prof")
+            profiler.dump_stats(path)
+
+        counters = counters_delta(self.counters_start, ascon.get_counters())
+        counters["duration_s"] = duration
+        with open(path + ".counters.json", 'w') as f:
+            json.dump(counters, f, indent=2)
+
+        print(f"\n🔬 Profiling stopped after {duration:.1f} s → {path}")
+        if self.mode == "sample":
+            profiler.print_top()
+        else:
+            import pstats
+            pstats.Stats(profiler).sort_stats("cumulative").print_stats(TOP_N)
+        print(f"   ASCON: {counters['encryptions']} enc, {counters['decryptions']} dec, "
+              f"{counters['tag_failures']} tag failures, permutations {counters['permutation_calls']}")
+
+def counters_delta(before, after):
+    delta = {name: after[name] - before.get(name, 0)
+             for name in after if name != "permutation_calls"}
+    delta["permutation_calls"] = {
+        r: n - before["permutation_calls"].get(r, 0)
+        for r, n in after["permutation_calls"].items()
+        if n - before["permutation_calls"].get(r, 0)
+    }
+    return delta
+
+def install(name, mode=DEFAULT_MODE):
+    """
+    Pasang handler SIGUSR1 untuk entry point `name`. Mengembalikan SignalProfiler,
+    atau None bila platform tidak punya SIGUSR1 (Windows).
+    """
+    if not hasattr(signal, "SIGUSR1"):
+        return None
+    profiler = SignalProfiler(name, mode)
+    signal.signal(signal.SIGUSR1, profiler.toggle)
+    print(f"🔬 Profiling: kill -USR1 {os.getpid()} to start/stop ({mode})")
+    return profiler
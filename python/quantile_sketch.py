@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Streaming Quantile Sketch (t-digest)
+Estimasi persentil (p50/p90/p99/p99.9) dengan memori tetap dan bisa di-merge antar proses
+"""
+
+import json
+import math
+import argparse
+
+# ===== KONFIGURASI =====
+DEFAULT_COMPRESSION = 200
+DEFAULT_QUANTILES = (0.5, 0.9, 0.99, 0.999)
+
+# ===== T-DIGEST =====
+class TDigest:
+    """
+    Merging t-digest.
+    add() hanya append ke buffer (O(1)); buffer di-compress ke centroid
+    setelah penuh, sehingga ukuran memori tetap ~compression centroid.
+    """
+
+    def __init__(self, compression=DEFAULT_COMPRESSION):
+        self.compression = compression
+        self.buffer_size = int(compression * 5)
+        self.means = []
+        self.weights = []
+        self.buffer = []
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value, weight=1):
+        value = float(value)
+        self.buffer.append((value, weight))
+        self.count += weight
+        self.total += value * weight
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        if len(self.buffer) >= self.buffer_size:
+            self._compress()
+
+    def add_many(self, values):
+        """Tambah banyak sampel sekaligus (list / NumPy array), misal saat analisis offline"""
+        values = [float(v) for v in values]
+        if not values:
+            return
+        self.buffer.extend((v, 1) for v in values)
+        self.count += len(values)
+        self.total += sum(values)
+        self.min = min(self.min, min(values))
+        self.max = max(self.max, max(values))
+        if len(self.buffer) >= self.buffer_size:
+            self._compress()
+
+    def merge(self, other):
+        """Gabungkan digest lain (misal dari worker process lain) ke digest ini"""
+        other._compress()
+        for mean, weight in zip(other.means, other.weights):
+            self.buffer.append((mean, weight))
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+        return self
+
+    def _k(self, q):
+        # Scale function k1: centroid kecil di ekor distribusi, besar di tengah
+        return self.compression / (2 * math.pi) * math.asin(2 * q - 1)
+
+    def _compress(self):
+        if not self.buffer:
+            return
+        points = sorted(list(zip(self.means, self.weights)) + self.buffer)
+        self.buffer = []
+        total = sum(w for _, w in points)
+
+        means, weights = [], []
+        cur_mean, cur_weight = points[0]
+        done = 0.0
+        k_low = self._k(0.0)
+        for mean, weight in points[1:]:
+            q = (done + cur_weight + weight) / total
+            if self._k(min(q, 1.0)) - k_low <= 1.0:
+                cur_weight += weight
+                cur_mean += (mean - cur_mean) * weight / cur_weight
+            else:
+                means.append(cur_mean)
+                weights.append(cur_weight)
+                done += cur_weight
+                k_low = self._k(done / total)
+                cur_mean, cur_weight = mean, weight
+        means.append(cur_mean)
+        weights.append(cur_weight)
+
+        self.means = means
+        self.weights = weights
+
+    def quantile(self, q):
+        """Estimasi nilai pada kuantil q (0..1)"""
+        self._compress()
+        if not self.means:
+            return None
+        if len(self.means) == 1:
+            return self.means[0]
+
+        target = q * self.count
+        cumulative = 0.0
+        prev_center = None
+        prev_mean = None
+        for mean, weight in zip(self.means, self.weights):
+            center = cumulative + weight / 2
+            if target < center:
+                if prev_center is None:
+                    # Interpolasi antara nilai minimum dan centroid pertama
+                    if center <= 0:
+                        return mean
+                    return self.min + (mean - self.min) * target / center
+                frac = (target - prev_center) / (center - prev_center)
+                return prev_mean + (mean - prev_mean) * frac
+            prev_center, prev_mean = center, mean
+            cumulative += weight
+
+        # Interpolasi antara centroid terakhir dan nilai maksimum
+        tail = self.count - prev_center
+        if tail <= 0:
+            return self.max
+        return prev_mean + (self.max - prev_mean) * (target - prev_center) / tail
+
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+    def to_dict(self):
+        self._compress()
+        return {
+            "compression": self.compression,
+            "means": self.means,
+            "weights": self.weights,
+            "count": self.count,
+            "total": self.total,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        digest = cls(data.get("compression", DEFAULT_COMPRESSION))
+        digest.means = list(data["means"])
+        digest.weights = list(data["weights"])
+        digest.count = data["count"]
+        digest.total = data["total"]
+        if data["count"]:
+            digest.min = data["min"]
+            digest.max = data["max"]
+        return digest
+
+# ===== KUMPULAN SKETCH BERNAMA =====
+class SketchSet:
+    """Sekumpulan TDigest bernama, misal {'decrypt_ms': ..., 'delivery_ms': ...}"""
+
+    def __init__(self, names=(), compression=DEFAULT_COMPRESSION):
+        self.compression = compression
+        self.sketches = {name: TDigest(compression) for name in names}
+
+    def add(self, name, value):
+        sketch = self.sketches.get(name)
+        if sketch is None:
+            sketch = self.sketches[name] = TDigest(self.compression)
+        sketch.add(value)
+
+    def add_many(self, name, values):
+        sketch = self.sketches.get(name)
+        if sketch is None:
+            sketch = self.sketches[name] = TDigest(self.compression)
+        sketch.add_many(values)
+
+    def merge(self, other):
+        for name, sketch in other.sketches.items():
+            if name in self.sketches:
+                self.sketches[name].merge(sketch)
+            else:
+                self.sketches[name] = TDigest.from_dict(sketch.to_dict())
+        return self
+
+    def print_report(self, title="PERCENTILES", units=None, quantiles=DEFAULT_QUANTILES):
+        units = units or {}
+        header = " | ".join(f"p{q*100:g}".rjust(9) for q in quantiles)
+        print(f"\n📐 {title}")
+        print(f"   {'Metric':<14} | {'N':>7} | {'Mean':>9} | {header} | {'Max':>9}")
+        for name, sketch in self.sketches.items():
+            if not sketch.count:
+                continue
+            values = " | ".join(f"{sketch.quantile(q):9.3f}" for q in quantiles)
+            unit = units.get(name, "")
+            print(f"   {name:<14} | {sketch.count:7d} | {sketch.mean():9.3f} | {values} | "
+                  f"{sketch.max:9.3f} {unit}")
+
+    def summary(self, quantiles=DEFAULT_QUANTILES):
+        """Ringkasan {metric: {count, mean, pXX, max}} untuk laporan JSON"""
+        result = {}
+        for name, sketch in self.sketches.items():
+            if not sketch.count:
+                continue
+            entry = {'count': sketch.count, 'mean': sketch.mean()}
+            for q in quantiles:
+                entry[f"p{q*100:g}"] = sketch.quantile(q)
+            entry['max'] = sketch.max
+            result[name] = entry
+        return result
+
+    def save(self, path):
+        with open(path, 'w') as f:
+            json.dump({name: s.to_dict() for name, s in self.sketches.items()}, f)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            data = json.load(f)
+        sketch_set = cls()
+        sketch_set.sketches = {name: TDigest.from_dict(d) for name, d in data.items()}
+        return sketch_set
+
+# ===== CLI: MERGE SKETCH DARI BEBERAPA PROSES =====
+def main():
+    parser = argparse.ArgumentParser(description="Gabungkan file sketch dari beberapa worker dan tampilkan persentil")
+    parser.add_argument("files", nargs="+", help="File sketch JSON (hasil SketchSet.save)")
+    parser.add_argument("-o", "--output", help="Simpan hasil merge ke file ini")
+    args = parser.parse_args()
+
+    merged = SketchSet()
+    for path in args.files:
+        merged.merge(SketchSet.load(path))
+
+    merged.print_report(f"MERGED PERCENTILES ({len(args.files)} files)")
+    if args.output:
+        merged.save(args.output)
+        print(f"\n✅ Merged sketch saved as: {args.output}")
+
+if __name__ == "__main__":
+    main()
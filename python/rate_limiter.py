@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Rate Limiter - Token bucket + sliding window counter per key (topic + pengirim)
+Dipanggil di entry on_message SEBELUM payload di-decode, sehingga pesan flood yang
+ditolak hanya membayar satu regex di prefix payload, satu lookup dict dan beberapa
+operasi float, bukan parse + dekripsi.
+
+Aksi saat key melewati batas:
+    drop       : buang semua pesan yang melebihi batas
+    sample     : loloskan 1 dari setiap SAMPLE_EVERY pesan yang melebihi batas (tetap terlihat)
+    quarantine : buang semua pesan dari key tersebut selama QUARANTINE_S detik
+
+Topic data dipakai bersama seluruh fleet, jadi key = (topic, device): sender_key() mengambil
+"id" / "device_id" dari prefix payload tanpa json.loads. Satu device yang flood dibuang tanpa
+ikut membuang device lain di topic yang sama. Payload tanpa id berbagi bucket (topic, None).
+Id bisa dipalsukan; jumlah key dibatasi MAX_KEYS, pengirim baru di atasnya berbagi satu
+bucket OVERFLOW_KEY sehingga rotasi id acak tidak menghabiskan memori atau melewati limit.
+"""
+
+import re
+import time
+
+# ===== KONFIGURASI =====
+DEFAULT_RATE = 50.0         # Token per detik per pengirim; 100× rate device (1 pesan/2 s)
+DEFAULT_BURST = 200.0       # Kapasitas bucket
+MAX_KEYS = 10000            # Key aktif maksimum (sisanya berbagi OVERFLOW_KEY)
+ID_PREFIX_BYTES = 256       # Hanya prefix payload yang dipindai untuk id pengirim
+SAMPLE_EVERY = 50
+QUARANTINE_S = 30.0
+WINDOW_S = 1.0              # Lebar sliding window counter
+IDLE_TIMEOUT_S = 300.0      # Key tanpa pesan selama ini dihapus
+EVICT_INTERVAL_S = 30.0     # Seberapa sering sweep eviction berjalan
+
+DROP = "drop"
+SAMPLE = "sample"
+QUARANTINE = "quarantine"
+ACTIONS = (DROP, SAMPLE, QUARANTINE)
+OVERFLOW_KEY = ("*", "overflow")
+
+# "id" (firmware / raw) atau "device_id" (payload terenkripsi publisher); "key_id" tidak cocok
+ID_PATTERN = re.compile(rb'"(?:device_)?id"\s*:\s*"([^"\\]{1,64})"')
+
+def sender_key(topic, payload):
+    """Key limiter (topic, device id atau None) dari prefix payload, tanpa parse JSON"""
+    prefix = payload[:ID_PREFIX_BYTES]
+    if isinstance(prefix, str):
+        prefix = prefix.encode('utf-8', errors='replace')
+    match = ID_PATTERN.search(prefix)
+    return (topic, match.group(1).decode('utf-8', errors='replace') if match else None)
+
+def describe(key):
+    """Teks key untuk log: 'topic [device]'"""
+    if isinstance(key, tuple):
+        topic, device = key
+        return f"{topic} [{device}]" if device is not None else f"{topic} [no id]"
+    return str(key)
+
+# ===== STATE PER KEY =====
+class _KeyState:
+    """Token bucket + dua bucket sliding window (window sekarang dan sebelumnya)"""
+    __slots__ = ('tokens', 'last', 'window_start', 'window_count', 'previous_count',
+                 'allowed', 'limited', 'over', 'quarantined_until', 'flooding', 'calm_since')
+
+    def __init__(self, burst, now):
+        self.tokens = burst
+        self.last = now
+        self.window_start = now
+        self.window_count = 0
+        self.previous_count = 0
+        self.allowed = 0
+        self.limited = 0
+        self.over = 0                   # Pesan di atas batas sejak episode flood dimulai
+        self.quarantined_until = 0.0
+        self.flooding = False
+        self.calm_since = None          # Awal periode di bawah batas selama episode flood
+
+def report_flood(key, rate):
+    print(f"\n🚦 Flood detected on {describe(key)}: ~{rate:.0f} msg/s")
+
+def report_recover(key, limited):
+    print(f"\n🚦 {describe(key)} back under the rate limit ({limited} messages over the limit)")
+
+# ===== LIMITER =====
+class RateLimiter:
+    """
+    allow(key) → True bila pesan boleh diproses. on_flood(key, rate) dipanggil sekali per
+    episode flood; on_recover(key, over) baru dipanggil setelah rate sliding window berada
+    di bawah batas selama satu window penuh (hysteresis, bukan saat satu token terisi ulang).
+    """
+
+    def __init__(self, rate=DEFAULT_RATE, burst=DEFAULT_BURST, action=DROP,
+                 sample_every=SAMPLE_EVERY, quarantine_s=QUARANTINE_S, window_s=WINDOW_S,
+                 idle_timeout=IDLE_TIMEOUT_S, on_flood=None, on_recover=None, clock=time.monotonic,
+                 max_keys=MAX_KEYS):
+        if action not in ACTIONS:
+            raise ValueError(f"Unknown action {action!r}, expected one of {ACTIONS}")
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.action = action
+        self.sample_every = sample_every
+        self.quarantine_s = quarantine_s
+        self.window_s = window_s
+        self.idle_timeout = idle_timeout
+        self.on_flood = on_flood
+        self.on_recover = on_recover
+        self.clock = clock
+        self.max_keys = max_keys
+        self.keys = {}
+        self.next_evict = clock() + EVICT_INTERVAL_S
+        self.allowed = 0
+        self.limited = 0
+        self.evicted = 0
+        self.overflowed = 0      # Pesan dari pengirim baru saat tabel key penuh
+
+    def allow(self, key):
+        now = self.clock()
+        state = self.keys.get(key)
+        if state is None:
+            if now >= self.next_evict:
+                self.evict(now)   # Paling sering tiap EVICT_INTERVAL_S, juga saat tabel penuh
+            if len(self.keys) >= self.max_keys:
+                key = OVERFLOW_KEY
+                self.overflowed += 1
+                state = self.keys.get(key)
+            if state is None:
+                state = self.keys[key] = _KeyState(self.burst, now)
+
+        # Sliding window counter (dua window, interpolasi linear)
+        elapsed = now - state.window_start
+        if elapsed >= self.window_s:
+            state.previous_count = state.window_count if elapsed < 2 * self.window_s else 0
+            state.window_count = 0
+            state.window_start = now - (elapsed % self.window_s)
+        state.window_count += 1
+
+        if state.quarantined_until:
+            # Key sedang dikarantina
+            if now < state.quarantined_until:
+                state.over += 1
+                state.limited += 1
+                self.limited += 1
+                return False
+            state.quarantined_until = 0.0
+
+        # Token bucket
+        idle = now - state.last
+        tokens = state.tokens + idle * self.rate
+        state.last = now
+        if tokens > self.burst:
+            tokens = self.burst
+        if tokens >= 1.0:
+            state.tokens = tokens - 1.0
+            if state.flooding:
+                self._maybe_recover(key, state, now, idle)
+            state.allowed += 1
+            self.allowed += 1
+            return True
+        state.tokens = tokens
+        return self._over_limit(key, state, now)
+
+    def _over_limit(self, key, state, now):
+        state.calm_since = None
+        if not state.flooding:
+            state.flooding = True
+            state.over = 0
+            if self.on_flood is not None:
+                self.on_flood(key, self.window_rate(key, now))
+        state.over += 1
+        if self.action == SAMPLE and state.over % self.sample_every == 1:
+            state.allowed += 1
+            self.allowed += 1
+            return True
+        if self.action == QUARANTINE:
+            state.quarantined_until = now + self.quarantine_s
+        state.limited += 1
+        self.limited += 1
+        return False
+
+    def _maybe_recover(self, key, state, now, idle=0.0):
+        """Episode selesai hanya bila rate tetap di bawah batas selama satu window penuh"""
+        if idle >= self.window_s:
+            state.calm_since = now - idle   # Tidak ada pesan sama sekali selama >= satu window
+        elif self.window_rate(key, now) > self.rate:
+            state.calm_since = None
+            return
+        if state.calm_since is None:
+            state.calm_since = now
+            return
+        if now - state.calm_since < self.window_s:
+            return
+        state.flooding = False
+        state.calm_since = None
+        if self.on_recover is not None:
+            self.on_recover(key, state.over)
+
+    def window_rate(self, key, now=None):
+        """Estimasi pesan/detik dari sliding window counter"""
+        state = self.keys.get(key)
+        if state is None:
+            return 0.0
+        now = self.clock() if now is None else now
+        elapsed = now - state.window_start
+        if elapsed >= 2 * self.window_s:
+            return 0.0
+        if elapsed >= self.window_s:
+            return state.window_count * (1 - (elapsed - self.window_s) / self.window_s) / self.window_s
+        weight = 1 - elapsed / self.window_s
+        return (state.previous_count * weight + state.window_count) / self.window_s
+
+    def evict(self, now=None):
+        """Hapus key yang idle (tidak dipanggil per pesan, hanya saat key baru muncul)"""
+        now = self.clock() if now is None else now
+        cutoff = now - self.idle_timeout
+        idle = [key for key, state in self.keys.items()
+                if state.last < cutoff and state.quarantined_until <= now]
+        for key in idle:
+            del self.keys[key]
+        self.evicted += len(idle)
+        self.next_evict = now + EVICT_INTERVAL_S
+        return len(idle)
+
+    def print_statistics(self, top=5):
+        total = self.allowed + self.limited
+        print(f"\n🚦 RATE LIMITER ({self.action}, {self.rate:g}/s burst {self.burst:g})")
+        print(f"   Allowed: {self.allowed} | Limited: {self.limited} | Keys: {len(self.keys)} | Evicted: {self.evicted}")
+        if self.overflowed:
+            print(f"   New senders over the key limit ({self.max_keys}, shared bucket): {self.overflowed}")
+        if total:
+            print(f"   Limited share: {self.limited / total * 100:.1f}%")
+        noisy = sorted(self.keys.items(), key=lambda item: item[1].limited, reverse=True)[:top]
+        for key, state in noisy:
+            if state.limited:
+                print(f"   • {describe(key)}: {state.limited} limited, {state.allowed} allowed")
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Reading Store - Penyimpanan time-series lokal (SQLite WAL)
+Menyimpan hasil dekripsi sensor secara durable dan menyediakan query API + CLI
+"""
+
+import sqlite3
+import time
+import argparse
+from datetime import datetime
+
+# ===== KONFIGURASI =====
+DB_PATH = "readings.db"
+BATCH_SIZE = 500          # Flush setelah sekian baris ...
+FLUSH_INTERVAL = 1.0      # ... atau setelah sekian detik
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS readings (
+    device_id        TEXT    NOT NULL,
+    count            INTEGER,
+    distance         REAL,
+    device_timestamp INTEGER,
+    receive_time     REAL    NOT NULL,
+    decrypt_ms       REAL
+);
+CREATE INDEX IF NOT EXISTS idx_readings_device_time ON readings (device_id, receive_time);
+CREATE INDEX IF NOT EXISTS idx_readings_time ON readings (receive_time);
+"""
+
+INSERT_SQL = (
+    "INSERT INTO readings (device_id, count, distance, device_timestamp, receive_time, decrypt_ms) "
+    "VALUES (?, ?, ?, ?, ?, ?)"
+)
+
+# ===== STORE =====
+class ReadingStore:
+    """
+    Sink untuk pembacaan sensor yang sudah didekripsi.
+    Baris ditampung di buffer lalu ditulis dengan satu executemany
+    di dalam satu transaksi (tidak ada commit per baris).
+    """
+
+    def __init__(self, path=DB_PATH, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.buffer = []
+        self.last_flush = time.time()
+        self.rows_written = 0
+
+        # isolation_level=None -> transaksi dikontrol manual (BEGIN/COMMIT)
+        self.conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def add(self, device_id, count, distance, device_timestamp, receive_time, decrypt_ms):
+        """Tambahkan satu pembacaan ke buffer (flush otomatis bila perlu)"""
+        self.buffer.append((device_id, count, distance, device_timestamp, receive_time, decrypt_ms))
+        if len(self.buffer) >= self.batch_size or time.time() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """Tulis semua baris di buffer dalam satu transaksi"""
+        self.last_flush = time.time()
+        if not self.buffer:
+            return 0
+        rows, self.buffer = self.buffer, []
+        self.conn.execute("BEGIN")
+        try:
+            self.conn.executemany(INSERT_SQL, rows)
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.rows_written += len(rows)
+        return len(rows)
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+    # ===== QUERY API =====
+    def devices(self):
+        """Daftar device yang pernah tersimpan"""
+        cur = self.conn.execute("SELECT DISTINCT device_id FROM readings ORDER BY device_id")
+        return [row[0] for row in cur]
+
+    def query_range(self, device_id=None, start=None, end=None, limit=None):
+        """
+        Range scan berdasarkan receive_time (epoch detik).
+        Mengembalikan list of tuple sesuai urutan kolom tabel.
+        """
+        sql = "SELECT device_id, count, distance, device_timestamp, receive_time, decrypt_ms FROM readings"
+        where, params = self._where(device_id, start, end)
+        sql += where + " ORDER BY receive_time"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        return self.conn.execute(sql, params).fetchall()
+
+    def query_aggregate(self, bucket_seconds, device_id=None, start=None, end=None):
+        """
+        Downsampled aggregate per bucket waktu.
+        Mengembalikan (device_id, bucket_start, n, min, avg, max distance, avg decrypt_ms).
+        """
+        bucket = float(bucket_seconds)
+        sql = (
+            "SELECT device_id, CAST(receive_time / ? AS INTEGER) * ? AS bucket, COUNT(*), "
+            "MIN(distance), AVG(distance), MAX(distance), AVG(decrypt_ms) FROM readings"
+        )
+        where, params = self._where(device_id, start, end)
+        sql += where + " GROUP BY device_id, bucket ORDER BY device_id, bucket"
+        return self.conn.execute(sql, [bucket, bucket] + params).fetchall()
+
+    def _where(self, device_id, start, end):
+        clauses, params = [], []
+        if device_id is not None:
+            clauses.append("device_id = ?")
+            params.append(device_id)
+        if start is not None:
+            clauses.append("receive_time >= ?")
+            params.append(float(start))
+        if end is not None:
+            clauses.append("receive_time < ?")
+            params.append(float(end))
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+# ===== CLI =====
+def parse_time(value):
+    """Terima epoch detik atau ISO datetime (2025-11-25T21:03:11)"""
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+def format_time(epoch):
+    return datetime.fromtimestamp(epoch).strftime('%Y-%m-%d %H:%M:%S')
+
+def main():
+    parser = argparse.ArgumentParser(description="Query penyimpanan pembacaan sensor (SQLite)")
+    parser.add_argument("--db", default=DB_PATH, help="Path database SQLite")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("devices", help="Tampilkan daftar device")
+
+    p_range = sub.add_parser("range", help="Range scan pembacaan mentah")
+    p_agg = sub.add_parser("agg", help="Agregat ter-downsample per bucket waktu")
+    p_agg.add_argument("--bucket", type=float, default=60, help="Ukuran bucket (detik)")
+    for p in (p_range, p_agg):
+        p.add_argument("--device", help="Filter device ID")
+        p.add_argument("--start", help="Waktu mulai (epoch atau ISO)")
+        p.add_argument("--end", help="Waktu akhir (epoch atau ISO)")
+    p_range.add_argument("--limit", type=int, default=100)
+
+    args = parser.parse_args()
+    store = ReadingStore(args.db)
+
+    try:
+        if args.command == "devices":
+            for device in store.devices():
+                print(device)
+        elif args.command == "range":
+            rows = store.query_range(args.device, parse_time(args.start), parse_time(args.end), args.limit)
+            print("Time                | Device                   | Count | Distance | Decrypt(ms)")
+            print("-"*80)
+            for device, count, distance, _, receive_time, decrypt_ms in rows:
+                print(f"{format_time(receive_time)} | {device:24.24} | {count or 0:5d} | "
+                      f"{distance if distance is not None else float('nan'):8.1f} | {decrypt_ms or 0:.3f}")
+        elif args.command == "agg":
+            rows = store.query_aggregate(args.bucket, args.device, parse_time(args.start), parse_time(args.end))
+            print("Bucket              | Device                   |     N |    Min |    Avg |    Max | Decrypt(ms)")
+            print("-"*95)
+            for device, bucket, n, dmin, davg, dmax, dec in rows:
+                print(f"{format_time(bucket)} | {device:24.24} | {n:5d} | {dmin or 0:6.1f} | "
+                      f"{davg or 0:6.1f} | {dmax or 0:6.1f} | {dec or 0:.3f}")
+    finally:
+        store.close()
+
+if __name__ == "__main__":
+    main()
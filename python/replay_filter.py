@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Replay Filter - Deteksi replay dengan sepasang Bloom filter yang berotasi
+Setiap ciphertext di-fingerprint dengan keyed BLAKE2b (terpotong 16 byte; kunci acak per
+proses supaya attacker tidak bisa menyusun tabrakan). Fingerprint dicek di filter
+'current' dan 'previous'; saat horizon habis (atau current penuh) previous dibuang dan
+current menjadi previous. Memori tetap (beberapa MB) berapapun jumlah pesan, tes O(1).
+
+Jaminan: duplikat dalam rentang horizon selalu terdeteksi, duplikat sampai 2x horizon
+mungkin terdeteksi; false positive (pesan baru dianggap replay) ≈ FP_RATE.
+"""
+
+import os
+import math
+import time
+import hashlib
+
+# ===== KONFIGURASI =====
+HORIZON_S = 3600             # Rentang waktu minimum replay yang pasti terdeteksi
+EXPECTED_RATE = 50           # Pesan/detik yang diperkirakan (menentukan ukuran filter)
+FP_RATE = 1e-6               # Target false positive gabungan dua filter
+DIGEST_SIZE = 16
+
+# ===== BLOOM FILTER =====
+class BloomFilter:
+    """Bit array + k posisi dari double hashing dua word 64-bit fingerprint"""
+    __slots__ = ('bits', 'size', 'hashes', 'count')
+
+    def __init__(self, size_bits, hashes):
+        self.size = size_bits
+        self.hashes = hashes
+        self.bits = bytearray((size_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, fingerprint):
+        size = self.size
+        pos = int.from_bytes(fingerprint[:8], 'little') % size
+        step = (int.from_bytes(fingerprint[8:16], 'little') | 1) % size or 1
+        for _ in range(self.hashes):
+            yield pos
+            pos += step
+            if pos >= size:
+                pos -= size
+
+    def __contains__(self, fingerprint):
+        bits = self.bits
+        for pos in self._positions(fingerprint):
+            if not bits[pos >> 3] & (1 << (pos & 7)):
+                return False
+        return True
+
+    def add(self, fingerprint):
+        """Tambahkan; kembalikan True bila semua bit sudah terpasang (kemungkinan duplikat)"""
+        bits = self.bits
+        present = True
+        for pos in self._positions(fingerprint):
+            mask = 1 << (pos & 7)
+            if not bits[pos >> 3] & mask:
+                bits[pos >> 3] |= mask
+                present = False
+        if not present:
+            self.count += 1
+        return present
+
+def bloom_parameters(capacity, fp_rate):
+    """Ukuran bit dan jumlah hash optimal untuk capacity item dengan false positive fp_rate"""
+    size = max(8, int(math.ceil(-capacity * math.log(fp_rate) / (math.log(2) ** 2))))
+    hashes = max(1, int(round(size / capacity * math.log(2))))
+    return size, hashes
+
+# ===== ROTATING FILTER =====
+class ReplayFilter:
+    def __init__(self, horizon_s=HORIZON_S, expected_rate=EXPECTED_RATE, fp_rate=FP_RATE,
+                 secret=None, clock=time.monotonic):
+        self.horizon_s = horizon_s
+        self.capacity = max(1, int(expected_rate * horizon_s))
+        # Dua filter dicek sekaligus → masing-masing memakai setengah anggaran FP
+        self.size_bits, self.hashes = bloom_parameters(self.capacity, fp_rate / 2)
+        self.secret = secret if secret is not None else os.urandom(16)
+        self.clock = clock
+        self.current = BloomFilter(self.size_bits, self.hashes)
+        self.previous = None
+        self.rotated_at = clock()
+        self.checked = 0
+        self.replays = 0
+        self.rotations = 0
+
+    def fingerprint(self, data):
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        return hashlib.blake2b(data, digest_size=DIGEST_SIZE, key=self.secret).digest()
+
+    def _maybe_rotate(self):
+        now = self.clock()
+        if now - self.rotated_at >= self.horizon_s or self.current.count >= self.capacity:
+            self.previous = self.current
+            self.current = BloomFilter(self.size_bits, self.hashes)
+            self.rotated_at = now
+            self.rotations += 1
+
+    def seen(self, data):
+        """Cek tanpa menambahkan"""
+        fingerprint = self.fingerprint(data)
+        return fingerprint in self.current or (self.previous is not None and fingerprint in self.previous)
+
+    def check_and_add(self, data):
+        """True bila data sudah pernah terlihat dalam horizon (replay); selalu dicatat"""
+        self._maybe_rotate()
+        self.checked += 1
+        fingerprint = self.fingerprint(data)
+        replay = self.current.add(fingerprint)
+        if not replay and self.previous is not None and fingerprint in self.previous:
+            replay = True
+        if replay:
+            self.replays += 1
+        return replay
+
+    @property
+    def memory_bytes(self):
+        return len(self.current.bits) * (2 if self.previous is not None else 1)
+
+    def print_report(self):
+        print(f"\n🔁 REPLAY FILTER (horizon {self.horizon_s:g} s, {self.hashes} hashes, "
+              f"{self.size_bits // 8 / 1024 / 1024 * 2:.1f} MB max)")
+        print(f"   Checked: {self.checked} | Replays: {self.replays} | Rotations: {self.rotations}")
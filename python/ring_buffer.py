@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Columnar Ring Buffer (NumPy structured array)
+Buffer melingkar berukuran tetap untuk data per-cycle, dengan statistik tervektorisasi
+"""
+
+import numpy as np
+
+# ===== DTYPE DATA ENERGI (36 byte per cycle) =====
+ENERGY_DTYPE = np.dtype([
+    ('cycle', np.uint32),
+    ('sensor_time', np.uint32),       # μs
+    ('mqtt_time', np.uint32),         # μs
+    ('total_energy', np.float32),     # mJ per cycle
+    ('cumulative_energy', np.float64),  # mJ (butuh presisi penuh, nilainya besar)
+    ('avg_power', np.float32),        # mW
+    ('timestamp', np.float64),        # epoch detik saat diterima
+])
+
+DEFAULT_PERCENTILES = (50, 90, 99)
+
+# ===== RING BUFFER =====
+class RingBuffer:
+    """
+    Preallocated structured array sebagai ring buffer.
+    append() menulis satu baris in-place tanpa alokasi objek Python per field.
+    view() mengembalikan data urut kronologis: zero-copy selama buffer belum
+    berputar (wrap), setelah itu satu salinan; segments() selalu zero-copy.
+    """
+
+    def __init__(self, dtype, capacity):
+        self.dtype = np.dtype(dtype)
+        self.capacity = int(capacity)
+        self.data = np.zeros(self.capacity, dtype=self.dtype)
+        self.head = 0        # posisi tulis berikutnya
+        self.size = 0
+        self.total_appended = 0
+
+    def __len__(self):
+        return self.size
+
+    def append(self, row):
+        """Tambahkan satu baris (tuple berurutan sesuai field dtype)"""
+        self.data[self.head] = row
+        self.head += 1
+        if self.head == self.capacity:
+            self.head = 0
+        if self.size < self.capacity:
+            self.size += 1
+        self.total_appended += 1
+
+    def extend(self, rows):
+        """Tambahkan banyak baris sekaligus (structured array dengan dtype yang sama)"""
+        rows = np.asarray(rows, dtype=self.dtype)
+        n = len(rows)
+        if n == 0:
+            return
+        if n >= self.capacity:
+            self.data[:] = rows[-self.capacity:]
+            self.head = 0
+            self.size = self.capacity
+        else:
+            first = min(n, self.capacity - self.head)
+            self.data[self.head:self.head + first] = rows[:first]
+            self.data[:n - first] = rows[first:]
+            self.head = (self.head + n) % self.capacity
+            self.size = min(self.capacity, self.size + n)
+        self.total_appended += n
+
+    def segments(self):
+        """Dua view zero-copy (lama, baru) yang jika digabung urut kronologis"""
+        if self.size < self.capacity:
+            return self.data[:self.size], self.data[:0]
+        return self.data[self.head:], self.data[:self.head]
+
+    def view(self):
+        """Seluruh isi buffer urut kronologis"""
+        older, newer = self.segments()
+        if len(newer) == 0:
+            return older
+        return np.concatenate((older, newer))
+
+    def field(self, name):
+        """Satu kolom urut kronologis: view zero-copy, setelah wrap hanya kolom ini yang disalin"""
+        older, newer = self.segments()
+        if len(newer) == 0:
+            return older[name]
+        return np.concatenate((older[name], newer[name]))
+
+    def first(self, n):
+        """n baris tertua (urut kronologis), tanpa menggabungkan seluruh buffer"""
+        older, newer = self.segments()
+        if n <= len(older):
+            return older[:n]
+        return np.concatenate((older, newer[:n - len(older)]))
+
+    def latest(self, n):
+        """n baris terakhir (urut kronologis)"""
+        n = min(n, self.size)
+        if n <= self.head:
+            return self.data[self.head - n:self.head]
+        return self.view()[-n:]
+
+    def stats(self, name, percentiles=DEFAULT_PERCENTILES):
+        """Statistik tervektorisasi untuk satu field: min/max/mean/std/persentil"""
+        if self.size == 0:
+            return None
+        values = self.field(name).astype(np.float64, copy=False)
+        result = {
+            'count': int(self.size),
+            'min': float(values.min()),
+            'max': float(values.max()),
+            'mean': float(values.mean()),
+            'std': float(values.std()),
+        }
+        for p, value in zip(percentiles, np.percentile(values, percentiles)):
+            result[f'p{p:g}'] = float(value)
+        return result
+
+    def nbytes(self):
+        return self.data.nbytes
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Streaming Rollups - Agregasi window (tumbling + sliding) dan EWMA per device
+Setiap sampel meng-update semua window secara O(1); window yang ditutup dikirim ke sink
+"""
+
+import json
+import math
+
+# ===== KONFIGURASI =====
+WINDOWS = (60, 300, 3600)    # 1 menit, 5 menit, 1 jam (detik)
+SLIDING_SLOTS = 60           # Resolusi sliding window (jumlah slot per window)
+EWMA_ALPHA = 0.1
+ROLLUP_PATH = "energy_rollups.jsonl"
+
+# ===== WELFORD =====
+class RunningStats:
+    """Running count/sum/min/max + variansi Welford"""
+    __slots__ = ('n', 'mean', 'm2', 'total', 'min', 'max')
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, x):
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (x - self.mean)
+        self.total += x
+        if x < self.min:
+            self.min = x
+        if x > self.max:
+            self.max = x
+
+    def std(self):
+        return math.sqrt(self.m2 / (self.n - 1)) if self.n > 1 else 0.0
+
+    def to_dict(self):
+        return {
+            'n': self.n,
+            'sum': self.total,
+            'mean': self.mean,
+            'std': self.std(),
+            'min': self.min if self.n else None,
+            'max': self.max if self.n else None,
+        }
+
+# ===== EWMA =====
+class Ewma:
+    """Exponentially weighted moving average + variansi"""
+    __slots__ = ('alpha', 'value', 'var', 'initialized')
+
+    def __init__(self, alpha=EWMA_ALPHA):
+        self.alpha = alpha
+        self.value = 0.0
+        self.var = 0.0
+        self.initialized = False
+
+    def add(self, x):
+        if not self.initialized:
+            self.value = x
+            self.initialized = True
+            return
+        diff = x - self.value
+        incr = self.alpha * diff
+        self.value += incr
+        self.var = (1 - self.alpha) * (self.var + diff * incr)
+
+# ===== TUMBLING WINDOW =====
+class TumblingWindow:
+    """
+    Window tetap yang sejajar jam (misal 12:00-12:01); ditutup saat sampel melewati batas.
+    Sampel terlambat (window-nya sudah ditutup) hanya dihitung di `late`, supaya window
+    yang sama tidak di-emit dua kali dengan hitungan terpecah.
+    """
+    __slots__ = ('size', 'start', 'stats', 'late')
+
+    def __init__(self, size, metrics):
+        self.size = size
+        self.start = None
+        self.stats = {m: RunningStats() for m in metrics}
+        self.late = 0
+
+    def add(self, t, values, emit, device):
+        """False bila sampel terlambat dan diabaikan"""
+        window_start = t - (t % self.size)
+        if self.start is None:
+            self.start = window_start
+        elif window_start < self.start:
+            self.late += 1
+            return False
+        elif window_start != self.start:
+            self.close(emit, device)
+            self.start = window_start
+        for name, value in values.items():
+            if value is None:
+                continue
+            self.stats[name].add(value)
+        return True
+
+    def close(self, emit, device):
+        if self.start is None or not any(s.n for s in self.stats.values()):
+            return
+        emit({
+            'device': device,
+            'window': self.size,
+            'start': self.start,
+            'end': self.start + self.size,
+            'metrics': {name: s.to_dict() for name, s in self.stats.items()},
+        })
+        for name in self.stats:
+            self.stats[name] = RunningStats()
+
+# ===== SLIDING WINDOW =====
+class SlidingWindow:
+    """
+    Window geser "N detik terakhir" dari slot-slot kecil (count, sum, sum²).
+    Total berjalan dikurangi slot yang kadaluarsa, jadi update O(1) amortized.
+    """
+    __slots__ = ('size', 'slot_seconds', 'metrics', 'slots', 'totals', 'current')
+
+    def __init__(self, size, metrics, slots=SLIDING_SLOTS):
+        self.size = size
+        self.slot_seconds = size / slots
+        self.metrics = tuple(metrics)
+        # slots[i][j] = [count, sum, sumsq] untuk metric j
+        self.slots = [[[0, 0.0, 0.0] for _ in self.metrics] for _ in range(slots)]
+        self.totals = [[0, 0.0, 0.0] for _ in self.metrics]
+        self.current = None
+
+    def _advance(self, slot_index):
+        if self.current is None:
+            self.current = slot_index
+            return
+        steps = min(slot_index - self.current, len(self.slots))
+        for step in range(1, steps + 1):
+            slot = self.slots[(self.current + step) % len(self.slots)]
+            for j, acc in enumerate(slot):
+                total = self.totals[j]
+                total[0] -= acc[0]
+                total[1] -= acc[1]
+                total[2] -= acc[2]
+                acc[0] = 0
+                acc[1] = 0.0
+                acc[2] = 0.0
+        if slot_index > self.current:
+            self.current = slot_index
+
+    def add(self, t, values):
+        slot_index = int(t // self.slot_seconds)
+        if self.current is not None and slot_index <= self.current - len(self.slots):
+            return  # Lebih tua dari window, abaikan
+        self._advance(slot_index)
+        slot = self.slots[slot_index % len(self.slots)]
+        for j, name in enumerate(self.metrics):
+            value = values.get(name)
+            if value is None:
+                continue
+            acc = slot[j]
+            total = self.totals[j]
+            acc[0] += 1
+            acc[1] += value
+            acc[2] += value * value
+            total[0] += 1
+            total[1] += value
+            total[2] += value * value
+
+    def summary(self, now=None):
+        if now is not None:
+            self._advance(int(now // self.slot_seconds))
+        result = {}
+        for j, name in enumerate(self.metrics):
+            n, s, sq = self.totals[j]
+            if n <= 0:
+                result[name] = {'n': 0, 'sum': 0.0, 'mean': None, 'std': None}
+                continue
+            mean = s / n
+            var = max(sq / n - mean * mean, 0.0)
+            result[name] = {'n': n, 'sum': s, 'mean': mean, 'std': math.sqrt(var)}
+        return result
+
+# ===== ENGINE =====
+class DeviceRollup:
+    __slots__ = ('tumbling', 'sliding', 'ewma')
+
+    def __init__(self, windows, metrics, alpha):
+        self.tumbling = [TumblingWindow(w, metrics) for w in windows]
+        self.sliding = [SlidingWindow(w, metrics) for w in windows]
+        self.ewma = {m: Ewma(alpha) for m in metrics}
+
+class RollupEngine:
+    def __init__(self, metrics, windows=WINDOWS, sink=None, alpha=EWMA_ALPHA):
+        self.metrics = tuple(metrics)
+        self.windows = tuple(windows)
+        self.alpha = alpha
+        self.sink = sink
+        self.devices = {}
+        self.closed_windows = 0
+        self.late_samples = 0    # (sampel, window tumbling) yang diabaikan karena terlambat
+
+    def _emit(self, record):
+        self.closed_windows += 1
+        if self.sink is not None:
+            self.sink(record)
+
+    def add(self, device, t, values):
+        rollup = self.devices.get(device)
+        if rollup is None:
+            rollup = self.devices[device] = DeviceRollup(self.windows, self.metrics, self.alpha)
+        for window in rollup.tumbling:
+            if not window.add(t, values, self._emit, device):
+                self.late_samples += 1
+        for window in rollup.sliding:
+            window.add(t, values)
+        for name, value in values.items():
+            if value is not None:
+                rollup.ewma[name].add(value)
+
+    def snapshot(self, device, now=None):
+        """Ringkasan sliding window + EWMA terkini untuk satu device"""
+        rollup = self.devices.get(device)
+        if rollup is None:
+            return None
+        return {
+            'sliding': {w.size: w.summary(now) for w in rollup.sliding},
+            'ewma': {name: e.value for name, e in rollup.ewma.items() if e.initialized},
+        }
+
+    def flush(self):
+        """Tutup semua window tumbling yang masih terbuka (misal saat shutdown)"""
+        for device, rollup in self.devices.items():
+            for window in rollup.tumbling:
+                window.close(self._emit, device)
+
+    def print_summary(self, units=None, now=None):
+        units = units or {}
+        for device in self.devices:
+            snap = self.snapshot(device, now)
+            print(f"\n📈 ROLLUPS [{device}]")
+            header = " | ".join(f"{format_window(w):>15}" for w in self.windows)
+            print(f"   {'Metric':<12} | {'EWMA':>10} | {header}")
+            for name in self.metrics:
+                cells = []
+                for w in self.windows:
+                    summary = snap['sliding'][w][name]
+                    if summary['n']:
+                        cells.append(f"{summary['mean']:>8.2f}±{summary['std']:<6.2f}")
+                    else:
+                        cells.append(f"{'-':>15}")
+                ewma = snap['ewma'].get(name)
+                ewma_text = f"{ewma:10.2f}" if ewma is not None else f"{'-':>10}"
+                print(f"   {name:<12} | {ewma_text} | {' | '.join(cells)} {units.get(name, '')}")
+
+# ===== SINK =====
+class JsonlSink:
+    """Tulis window yang sudah ditutup ke file JSON Lines (satu baris per window)"""
+
+    def __init__(self, path=ROLLUP_PATH):
+        self.path = path
+        self.file = open(path, 'a')
+
+    def __call__(self, record):
+        self.file.write(json.dumps(record) + "\n")
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+def format_window(seconds):
+    if seconds % 3600 == 0:
+        return f"{seconds // 3600}h"
+    if seconds % 60 == 0:
+        return f"{seconds // 60}m"
+    return f"{seconds}s"
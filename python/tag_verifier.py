@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Tag Verifier - Verifikasi tag ASCON secara batch untuk traffic terenkripsi yang ditangkap monitor
+Vonis keamanan diambil dari verifikasi sebenarnya, bukan dari nama topic:
+    verified  : tag valid, pesan baru
+    forged    : tag tidak valid (ciphertext/tag dimodifikasi atau kunci salah)
+    replayed  : tag valid tapi ciphertext / (device, count, timestamp) sudah pernah terlihat
+    malformed : payload tanpa ciphertext yang bisa di-decode, atau key_id tidak dikenal
+
+submit() hanya memasukkan pesan ke antrian (dipanggil dari thread network); thread worker
+mengambil batch dan memverifikasi di process pool (multi-core) atau inline bila PROCESSES = 0.
+Ciphertext identik (mis. flood replay) hanya diverifikasi sekali lewat cache vonis per digest.
+"""
+
+import os
+import json
+import time
+import queue
+import hashlib
+import threading
+from collections import Counter, OrderedDict
+
+import ascon
+from key_store import KeyStore, DEFAULT_KEY_ID
+from replay_filter import ReplayFilter
+
+# ===== KONFIGURASI =====
+KEY = "asconciphertest1".encode('utf-8')   # Kunci default (key_id "k0")
+KEYS_FILE = "keys.json"
+NONCE = "asconcipher1test".encode('utf-8')
+ASSOCIATED_DATA = b"ASCON"
+VARIANT = "Ascon-128"
+
+BATCH_SIZE = 64
+BATCH_WAIT = 0.05                          # Detik menunggu batch terisi
+QUEUE_LIMIT = 20000                        # Pesan di atas ini tidak diverifikasi (dihitung 'skipped')
+PROCESSES = max((os.cpu_count() or 1) - 1, 0)
+VERDICT_CACHE_SIZE = 8192                  # Digest ciphertext → vonis
+
+VERIFIED = "verified"
+FORGED = "forged"
+REPLAYED = "replayed"
+MALFORMED = "malformed"
+STATUSES = (VERIFIED, FORGED, REPLAYED, MALFORMED)
+
+def verify_batch(items, keys, nonce=NONCE, associated_data=ASSOCIATED_DATA, variant=VARIANT):
+    """
+    items: list (key_id, ciphertext). Mengembalikan list plaintext (bytes) atau None per item.
+    Fungsi top-level supaya bisa dijalankan di process pool.
+    """
+    results = []
+    for key_id, ciphertext in items:
+        key = keys.get(key_id)
+        if key is None or len(ciphertext) < 16:
+            results.append(None)
+            continue
+        results.append(ascon.ascon_decrypt(key, nonce, associated_data, ciphertext, variant))
+    return results
+
+# ===== VERIFIER =====
+class TagVerifier:
+    """
+    on_verdict(topic, status, t) dipanggil dari thread worker untuk setiap vonis
+    (harus thread-safe; mis. AlertLog.append).
+    """
+
+    def __init__(self, processes=PROCESSES, batch_size=BATCH_SIZE, key_store=None, on_verdict=None):
+        self.processes = processes
+        self.batch_size = batch_size
+        self.key_store = key_store or KeyStore(KEYS_FILE, default_key=KEY, variant=VARIANT)
+        self.on_verdict = on_verdict
+        self.queue = queue.Queue(QUEUE_LIMIT)
+        self.verdicts = OrderedDict()    # digest -> status (LRU)
+        self.seen = ReplayFilter()       # (device, count, timestamp) terverifikasi, memori tetap
+        self.counts = Counter()
+        self.by_topic = {}               # topic -> Counter(status)
+        self.cache_hits = 0
+        self.skipped = 0
+        self.batches = 0
+        self.busy_s = 0.0
+        self.lock = threading.Lock()
+        self.pool = None
+        self.thread = None
+        self.stopped = threading.Event()
+
+    # ----- input (thread network) -----
+    def submit(self, topic, data, t=None):
+        """
+        data: payload JSON terenkripsi yang sudah di-parse (dict / Record.data).
+        False bila antrian penuh (pesan tidak akan mendapat vonis).
+        """
+        if self.thread is None:
+            self.start()
+        try:
+            ciphertext = bytes.fromhex(data.get("encrypted_data") or "")
+        except (TypeError, ValueError, AttributeError):
+            ciphertext = b""
+        key_id = data.get("key_id", DEFAULT_KEY_ID) if len(ciphertext) >= 16 else None
+        if not isinstance(key_id, str):
+            self._record(topic, MALFORMED, t)
+            return True
+        try:
+            self.queue.put_nowait((topic, key_id, ciphertext,
+                                   time.time() if t is None else t))
+        except queue.Full:
+            self.skipped += 1
+            return False
+        return True
+
+    def start(self):
+        if self.processes:
+            from concurrent.futures import ProcessPoolExecutor
+            self.pool = ProcessPoolExecutor(self.processes)
+        self.thread = threading.Thread(target=self._run, name="tag-verifier", daemon=True)
+        self.thread.start()
+
+    # ----- worker -----
+    def _next_batch(self):
+        try:
+            batch = [self.queue.get(timeout=BATCH_WAIT)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + BATCH_WAIT
+        while len(batch) < self.batch_size * max(self.processes, 1):
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self.queue.get(timeout=remaining) if remaining > 0 else self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while not (self.stopped.is_set() and self.queue.empty()):
+            batch = self._next_batch()
+            if batch:
+                self.process(batch)
+
+    def process(self, batch):
+        """Verifikasi satu batch: cache vonis dulu, sisanya diverifikasi sekali per digest"""
+        start = time.perf_counter()
+        pending = OrderedDict()     # digest -> (key_id, ciphertext)
+        entries = []
+        for topic, key_id, ciphertext, t in batch:
+            digest = hashlib.blake2b(key_id.encode() + b"\0" + ciphertext, digest_size=16).digest()
+            entries.append((topic, t, digest))
+            if digest not in self.verdicts and digest not in pending:
+                pending[digest] = (key_id, ciphertext)
+
+        items = list(pending.values())
+        keys = {key_id: self.key_store.lookup(key_id) for key_id, _ in items}
+        keys = {key_id: key for key_id, key in keys.items() if key is not None}
+        plaintexts = self._verify(items, keys)
+        fresh = {}
+        for digest, (key_id, _), plaintext in zip(pending, items, plaintexts):
+            fresh[digest] = self._first_verdict(key_id in keys, plaintext)
+
+        for topic, t, digest in entries:
+            status = fresh.pop(digest, None)
+            if status is None:
+                # Ciphertext identik sudah pernah dinilai: valid → replay
+                self.cache_hits += 1
+                status = self.verdicts.get(digest, REPLAYED)
+                if status == VERIFIED:
+                    status = REPLAYED
+            else:
+                self.verdicts[digest] = status
+                if len(self.verdicts) > VERDICT_CACHE_SIZE:
+                    self.verdicts.popitem(last=False)
+            self._record(topic, status, t)
+        self.batches += 1
+        self.busy_s += time.perf_counter() - start
+
+    def _verify(self, items, keys):
+        if not items:
+            return []
+        if self.pool is None or len(items) < 2 * self.batch_size:
+            return verify_batch(items, keys)
+        chunks = [items[i:i + self.batch_size] for i in range(0, len(items), self.batch_size)]
+        results = []
+        for part in self.pool.map(verify_batch, chunks, [keys] * len(chunks)):
+            results.extend(part)
+        return results
+
+    def _first_verdict(self, known_key, plaintext):
+        if not known_key:
+            return MALFORMED
+        if plaintext is None:
+            return FORGED
+        # count di-reset saat device reboot, jadi (id, count) saja memberi replay palsu;
+        # timestamp device ikut jadi bagian identitas
+        try:
+            reading = json.loads(plaintext)
+            identity = (reading.get("id"), reading.get("count"), reading.get("timestamp"))
+        except (ValueError, AttributeError):
+            return VERIFIED
+        if identity[1] is None or identity[2] is None:
+            return VERIFIED
+        if self.seen.check_and_add("{}:{}:{}".format(*identity)):
+            return REPLAYED
+        return VERIFIED
+
+    def _record(self, topic, status, t):
+        with self.lock:
+            self.counts[status] += 1
+            self.by_topic.setdefault(topic, Counter())[status] += 1
+        if self.on_verdict is not None:
+            self.on_verdict(topic, status, t)
+
+    # ----- shutdown & laporan -----
+    def close(self, timeout=10.0):
+        """Selesaikan antrian (maksimal timeout detik) lalu hentikan worker"""
+        if self.thread is None:
+            return
+        self.stopped.set()
+        self.thread.join(timeout)
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+        self.skipped += self.queue.qsize()
+
+    def snapshot(self):
+        with self.lock:
+            return dict(self.counts)
+
+    def print_report(self):
+        total = sum(self.counts.values())
+        workers = f"{self.processes} processes" if self.processes else "inline"
+        print(f"\n🔏 TAG VERIFICATION ({total} messages, {self.batches} batches, {workers})")
+        if not total:
+            return
+        for status in STATUSES:
+            count = self.counts.get(status, 0)
+            print(f"   {status:<10} {count:8d}  ({count / total * 100:5.1f}%)")
+        rate = total / self.busy_s if self.busy_s else 0.0
+        print(f"   Throughput: {rate:,.0f} msg/s busy | cache hits: {self.cache_hits} | skipped: {self.skipped}")
+        for topic, counts in self.by_topic.items():
+            summary = ", ".join(f"{counts[s]} {s}" for s in STATUSES if counts[s])
+            print(f"   • {topic}: {summary}")
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Tamper Fuzz - Semua mutasi satu ciphertext ASCON, diverifikasi secara batch / multi-proses
+Dari satu ciphertext (ciphertext || tag 16 byte) dibuat:
+    bit_flip   : setiap flip satu bit (8 × panjang)
+    byte_sub   : setiap substitusi byte yang bukan flip satu bit (247 × panjang)
+    truncate   : setiap pemotongan ekor dan kepala
+    tag        : mutasi tag (nol, 0xFF, dibalik, dirotasi, acak, tag tanpa body, byte tambahan)
+Untuk ciphertext ~100 byte hasilnya puluhan ribu varian; semuanya HARUS ditolak.
+Varian dibuat lazy dan dikirim per batch ke tag_verifier.verify_batch, inline atau di
+process pool (satu proses per core), dengan jumlah batch in-flight yang dibatasi.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+from collections import Counter, deque
+
+import ascon
+from tag_verifier import verify_batch, KEY, NONCE, ASSOCIATED_DATA, VARIANT
+from key_store import DEFAULT_KEY_ID
+
+# ===== KONFIGURASI =====
+TAG_SIZE = 16
+BATCH_SIZE = 256                     # Varian per batch verify_batch
+PROCESSES = os.cpu_count() or 1      # Offline: semua core dipakai (1 = inline)
+IN_FLIGHT_PER_PROCESS = 4            # Batch yang boleh antre per proses
+RANDOM_TAGS = 256                    # Tag acak per pesan
+SAMPLE_READING = {"id": "fuzz", "count": 1, "distance": 123, "timestamp": 456789, "unit": "cm"}
+
+BIT_FLIP = "bit_flip"
+BYTE_SUB = "byte_sub"
+TRUNCATE = "truncate"
+TAG = "tag"
+KINDS = (BIT_FLIP, BYTE_SUB, TRUNCATE, TAG)
+
+# ===== MUTASI =====
+def mutations(ciphertext, random_tags=RANDOM_TAGS, seed=0):
+    """Generator (kind, varian) untuk semua mutasi ciphertext (tidak ada yang sama dengan asli)"""
+    length = len(ciphertext)
+    for i in range(length):
+        for bit in range(8):
+            variant = bytearray(ciphertext)
+            variant[i] ^= 1 << bit
+            yield BIT_FLIP, bytes(variant)
+    for i in range(length):
+        original = ciphertext[i]
+        for value in range(256):
+            diff = value ^ original
+            if diff == 0 or diff & (diff - 1) == 0:
+                continue   # Identik atau sudah dicakup bit_flip
+            variant = bytearray(ciphertext)
+            variant[i] = value
+            yield BYTE_SUB, bytes(variant)
+    for n in range(length):
+        yield TRUNCATE, ciphertext[:n]          # Ekor dipotong
+    for n in range(1, length):
+        yield TRUNCATE, ciphertext[n:]          # Kepala dipotong
+    yield from ((TAG, variant) for variant in tag_mutations(ciphertext, random_tags, seed))
+
+def tag_mutations(ciphertext, random_tags=RANDOM_TAGS, seed=0):
+    body, tag = ciphertext[:-TAG_SIZE], ciphertext[-TAG_SIZE:]
+    candidates = [bytes(TAG_SIZE), b"\xff" * TAG_SIZE, tag[::-1]]
+    candidates += [tag[r:] + tag[:r] for r in range(1, TAG_SIZE)]
+    rng = random.Random(seed)
+    candidates += [rng.getrandbits(8 * TAG_SIZE).to_bytes(TAG_SIZE, 'little') for _ in range(random_tags)]
+    seen = {ciphertext}
+    variants = [body + candidate for candidate in candidates]
+    variants += [tag, ciphertext + b"\x00", ciphertext + tag]   # Tanpa body, byte tambahan, tag ganda
+    for variant in variants:
+        if variant not in seen:
+            seen.add(variant)
+            yield variant
+
+def count_mutations(length, random_tags=RANDOM_TAGS):
+    """Perkiraan jumlah varian (tag bisa sedikit kurang karena duplikat dibuang)"""
+    return 8 * length + 247 * length + (2 * length - 1) + (TAG_SIZE + 2 + random_tags + 3)
+
+# ===== FUZZER =====
+class TamperFuzzer:
+    def __init__(self, key=KEY, key_id=DEFAULT_KEY_ID, processes=PROCESSES, batch_size=BATCH_SIZE,
+                 random_tags=RANDOM_TAGS):
+        self.key = key
+        self.key_id = key_id
+        self.processes = processes
+        self.batch_size = batch_size
+        self.random_tags = random_tags
+        self.total = Counter()
+        self.rejected = Counter()
+        self.accepted = []       # (kind, ciphertext hex) yang lolos verifikasi (seharusnya kosong)
+        self.elapsed = 0.0
+
+    def _batches(self, ciphertext):
+        kinds, items = [], []
+        for kind, variant in mutations(ciphertext, self.random_tags):
+            kinds.append(kind)
+            items.append((self.key_id, variant))
+            if len(items) == self.batch_size:
+                yield kinds, items
+                kinds, items = [], []
+        if items:
+            yield kinds, items
+
+    def _collect(self, kinds, items, plaintexts):
+        for kind, (_, variant), plaintext in zip(kinds, items, plaintexts):
+            self.total[kind] += 1
+            if plaintext is None:
+                self.rejected[kind] += 1
+            else:
+                self.accepted.append((kind, variant.hex()))
+
+    def run(self, ciphertext, progress=None):
+        """Verifikasi semua mutasi; progress(done) dipanggil setiap batch selesai"""
+        keys = {self.key_id: self.key}
+        if verify_batch([(self.key_id, ciphertext)], keys)[0] is None:
+            raise ValueError("Original ciphertext does not verify with this key (wrong key / not ASCON?)")
+        start = time.perf_counter()
+        if self.processes > 1:
+            from concurrent.futures import ProcessPoolExecutor
+            window = deque()
+            with ProcessPoolExecutor(self.processes) as pool:
+                for kinds, items in self._batches(ciphertext):
+                    window.append((kinds, items, pool.submit(verify_batch, items, keys)))
+                    if len(window) >= self.processes * IN_FLIGHT_PER_PROCESS:
+                        self._finish(window.popleft(), progress)
+                while window:
+                    self._finish(window.popleft(), progress)
+        else:
+            for kinds, items in self._batches(ciphertext):
+                self._collect(kinds, items, verify_batch(items, keys))
+                if progress:
+                    progress(sum(self.total.values()))
+        self.elapsed = time.perf_counter() - start
+        return self
+
+    def _finish(self, entry, progress):
+        kinds, items, future = entry
+        self._collect(kinds, items, future.result())
+        if progress:
+            progress(sum(self.total.values()))
+
+    @property
+    def variants(self):
+        return sum(self.total.values())
+
+    def report(self):
+        variants = self.variants
+        rejected = sum(self.rejected.values())
+        return {
+            'variants': variants,
+            'rejected': rejected,
+            'accepted': len(self.accepted),
+            'rejection_rate': rejected / variants if variants else 0.0,
+            'elapsed_s': self.elapsed,
+            'throughput': variants / self.elapsed if self.elapsed else 0.0,
+            'processes': self.processes,
+            'by_kind': {kind: {'variants': self.total[kind], 'rejected': self.rejected[kind]} for kind in KINDS},
+        }
+
+    def print_report(self):
+        report = self.report()
+        workers = f"{self.processes} processes" if self.processes > 1 else "inline"
+        print(f"\n🧬 TAMPER FUZZ ({report['variants']:,} variants, {workers}, batch {self.batch_size})")
+        print(f"{'Mutation':<10} {'Variants':>10} {'Rejected':>10} {'Rate':>8}")
+        for kind in KINDS:
+            total, rejected = self.total[kind], self.rejected[kind]
+            rate = rejected / total * 100 if total else 0.0
+            print(f"{kind:<10} {total:>10,} {rejected:>10,} {rate:>7.2f}%")
+        print(f"   Rejection rate: {report['rejection_rate'] * 100:.4f}% | "
+              f"Throughput: {report['throughput']:,.0f} verifications/s | Time: {report['elapsed_s']:.1f} s")
+        if self.accepted:
+            print(f"   ⚠️  {len(self.accepted)} tampered variants ACCEPTED:")
+            for kind, variant in self.accepted[:10]:
+                print(f"      • {kind}: {variant[:64]}...")
+        else:
+            print("   ✅ Every tampered variant was rejected by the ASCON tag check")
+
+# ===== INPUT =====
+def sample_ciphertext(key=KEY, reading=SAMPLE_READING):
+    """Ciphertext lokal dari pembacaan contoh (tanpa broker)"""
+    return ascon.ascon_encrypt(key, NONCE, ASSOCIATED_DATA, json.dumps(reading).encode('utf-8'), VARIANT)
+
+def ciphertext_from_payload(payload):
+    """(key_id, ciphertext) dari payload JSON terenkripsi publisher"""
+    data = json.loads(payload)
+    return data.get('key_id', DEFAULT_KEY_ID), bytes.fromhex(data['encrypted_data'])
+
+def capture_ciphertext(timeout=10.0):
+    """Tunggu satu pesan terenkripsi di broker (event, bukan polling)"""
+    from attack_campaign import Capture, TOPIC_ENCRYPTED, make_client, connect
+
+    capture = Capture()
+    client = make_client("Tamper_Fuzzer")
+    client.on_message = capture.on_message
+    connect(client, {})
+    client.subscribe(TOPIC_ENCRYPTED)
+    payload = capture.wait(TOPIC_ENCRYPTED, timeout)
+    client.loop_stop()
+    client.disconnect()
+    return payload
+
+def progress_printer(expected, interval=0.5):
+    last = [0.0]
+
+    def progress(done):
+        now = time.monotonic()
+        if now - last[0] >= interval or done >= expected:
+            last[0] = now
+            print(f"\r🔨 Verified: {done:,}/~{expected:,}", end="", flush=True)
+    return progress
+
+# ===== CLI =====
+def main():
+    parser = argparse.ArgumentParser(description="Fuzz semua mutasi ciphertext ASCON dan ukur penolakan")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--hex", help="Ciphertext+tag (hex)")
+    source.add_argument("--payload", help="File berisi payload JSON terenkripsi")
+    source.add_argument("--capture", action="store_true", help="Tangkap satu pesan dari broker")
+    parser.add_argument("--key-id", help="key_id untuk --hex (default k0)")
+    parser.add_argument("--processes", type=int, default=PROCESSES)
+    parser.add_argument("--batch", type=int, default=BATCH_SIZE)
+    parser.add_argument("--random-tags", type=int, default=RANDOM_TAGS)
+    parser.add_argument("--output", help="Simpan laporan sebagai JSON")
+    args = parser.parse_args()
+
+    from key_store import KeyStore
+    from tag_verifier import KEYS_FILE
+    key_store = KeyStore(KEYS_FILE, default_key=KEY, variant=VARIANT)
+
+    key_id = args.key_id or DEFAULT_KEY_ID
+    if args.hex:
+        ciphertext = bytes.fromhex(args.hex)
+    elif args.payload:
+        with open(args.payload) as f:
+            key_id, ciphertext = ciphertext_from_payload(f.read())
+    elif args.capture:
+        print("📡 Waiting for encrypted message...")
+        payload = capture_ciphertext()
+        if payload is None:
+            print("❌ No encrypted message captured!")
+            sys.exit(1)
+        key_id, ciphertext = ciphertext_from_payload(payload)
+    else:
+        ciphertext = sample_ciphertext()
+        print("📦 Using locally encrypted sample reading")
+
+    key = key_store.get(key_id)
+    if key is None:
+        print(f"❌ Unknown key_id: {key_id}")
+        sys.exit(1)
+
+    expected = count_mutations(len(ciphertext), args.random_tags)
+    print(f"🎯 Ciphertext: {len(ciphertext)} bytes → ~{expected:,} variants")
+    fuzzer = TamperFuzzer(key, key_id, args.processes, args.batch, args.random_tags)
+    try:
+        fuzzer.run(ciphertext, progress_printer(expected))
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    print()
+    fuzzer.print_report()
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(dict(fuzzer.report(), ciphertext=ciphertext.hex(), key_id=key_id), f, indent=2)
+        print(f"💾 Report saved to: {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Topic Router - Filter topic MQTT (termasuk wildcard + dan #) dikompilasi menjadi trie,
+jadi lookup satu topic cukup O(panjang topic) berapapun jumlah filter yang terdaftar.
+Hasil lookup per topic di-cache karena jumlah topic unik biasanya kecil dan stabil.
+"""
+
+# ===== KONFIGURASI =====
+CACHE_SIZE = 4096   # Topic unik yang diingat sebelum cache dikosongkan
+
+# ===== TRIE =====
+class _Node:
+    __slots__ = ('children', 'plus', 'hash_values', 'values')
+
+    def __init__(self):
+        self.children = {}      # level literal -> _Node
+        self.plus = None        # child untuk '+'
+        self.hash_values = []   # nilai untuk '#' di level ini
+        self.values = []        # nilai untuk filter yang berakhir tepat di node ini
+
+class TopicRouter:
+    """
+    Peta filter topic -> nilai (handler, klasifikasi, ...).
+    match(topic) mengembalikan semua nilai yang cocok sesuai urutan registrasi,
+    lookup(topic) hanya nilai pertama (atau default).
+    """
+
+    def __init__(self, cache_size=CACHE_SIZE):
+        self.root = _Node()
+        self.filters = []
+        self.cache = {}
+        self.cache_size = cache_size
+        self.hits = 0
+        self.misses = 0
+
+    def add(self, topic_filter, value):
+        levels = topic_filter.split("/")
+        for i, level in enumerate(levels):
+            if level == "#" and i != len(levels) - 1:
+                raise ValueError(f"'#' must be the last level: {topic_filter}")
+            if level not in ("+", "#") and ("+" in level or "#" in level):
+                raise ValueError(f"Wildcard must occupy a whole level: {topic_filter}")
+
+        order = len(self.filters)
+        node = self.root
+        for level in levels:
+            if level == "#":
+                node.hash_values.append((order, value))
+                break
+            if level == "+":
+                if node.plus is None:
+                    node.plus = _Node()
+                node = node.plus
+            else:
+                node = node.children.setdefault(level, _Node())
+        else:
+            node.values.append((order, value))
+        self.filters.append(topic_filter)
+        self.cache.clear()
+
+    def _walk(self, levels):
+        found = []
+        nodes = [self.root]
+        for level in levels:
+            next_nodes = []
+            for node in nodes:
+                found.extend(node.hash_values)
+                child = node.children.get(level)
+                if child is not None:
+                    next_nodes.append(child)
+                if node.plus is not None:
+                    next_nodes.append(node.plus)
+            if not next_nodes:
+                return found
+            nodes = next_nodes
+        for node in nodes:
+            # "a/#" juga cocok dengan "a" (spesifikasi MQTT)
+            found.extend(node.values)
+            found.extend(node.hash_values)
+        return found
+
+    def match(self, topic):
+        values = self.cache.get(topic)
+        if values is not None:
+            self.hits += 1
+            return values
+        self.misses += 1
+        values = tuple(value for _, value in sorted(self._walk(topic.split("/")), key=lambda item: item[0]))
+        if len(self.cache) >= self.cache_size:
+            self.cache.clear()
+        self.cache[topic] = values
+        return values
+
+    def lookup(self, topic, default=None):
+        values = self.match(topic)
+        return values[0] if values else default
+
+    def __len__(self):
+        return len(self.filters)
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+End-to-end Latency Tracing
+Trace ID = device_id:count. Publisher menitipkan timestamp tiap tahap di payload terenkripsi,
+subscriber melengkapi dengan waktu terima dan dekripsi, lalu span per tahap ditulis ke file
+JSONL dan diringkas (t-digest) supaya terlihat tahap mana yang menyumbang p99.
+
+Urutan tahap:
+  device → publisher receive → encrypt start → encrypt end → publish → subscriber receive
+  → decrypt start → decrypt end
+"""
+
+import sys
+import json
+import math
+import argparse
+
+from quantile_sketch import SketchSet
+
+# ===== KONFIGURASI =====
+TRACE_PATH = "traces.jsonl"
+TRACE_SUMMARY_PATH = "trace_summary.json"
+
+# Nama span (ms) sesuai urutan tahap; end_to_end = device → decrypt end
+SPANS = [
+    "device_to_publisher",
+    "publisher_queue",
+    "encrypt",
+    "publish",
+    "broker_transit",
+    "subscriber_queue",
+    "decrypt",
+]
+END_TO_END = "end_to_end"
+
+def trace_id(device_id, count):
+    return f"{device_id}:{count}"
+
+def valid_trace(trace):
+    """
+    Field 'trace' ada di luar ciphertext (tidak terautentikasi): harus dict dengan id str,
+    't' berisi 4 angka finite dan device_ms (opsional) angka finite
+    """
+    if not isinstance(trace, dict) or not isinstance(trace.get("id"), str):
+        return False
+    stamps = trace.get("t")
+    if not isinstance(stamps, (list, tuple)) or len(stamps) != 4:
+        return False
+    device_ms = trace.get("device_ms")
+    for value in list(stamps) + ([device_ms] if device_ms is not None else []):
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+            return False
+    return True
+
+def publisher_trace(data, received, encrypt_start, encrypt_end, published):
+    """Bagian trace yang dikirim publisher di payload terenkripsi (wall clock, detik)"""
+    return {
+        "id": trace_id(data.get("id", "unknown"), data.get("count")),
+        "device_ms": data.get("timestamp"),
+        "t": [received, encrypt_start, encrypt_end, published],
+    }
+
+# ===== CLOCK OFFSET =====
+class ClockOffsetEstimator:
+    """
+    Estimasi offset jam device (millis sejak boot) terhadap wall clock per device:
+    offset = min(waktu terima publisher - device_ms / 1000). Nilai minimum mendekati
+    offset sebenarnya + delay jaringan tercepat, jadi span device→publisher adalah
+    delay relatif terhadap pesan tercepat yang pernah terlihat. Reset saat device reboot
+    (millis mundur).
+    """
+
+    def __init__(self):
+        self.offsets = {}     # device -> offset detik
+        self.last_ms = {}
+
+    def update(self, device, device_ms, received):
+        last = self.last_ms.get(device)
+        if last is not None and device_ms < last:
+            self.offsets.pop(device, None)
+        self.last_ms[device] = device_ms
+        candidate = received - device_ms / 1000.0
+        current = self.offsets.get(device)
+        if current is None or candidate < current:
+            self.offsets[device] = candidate
+        return self.offsets[device]
+
+# ===== TRACER =====
+class Tracer:
+    """Gabungkan trace publisher + timestamp subscriber menjadi span, tulis ke JSONL"""
+
+    def __init__(self, path=TRACE_PATH):
+        self.path = path
+        self.file = None        # Dibuka saat trace pertama
+        self.clock = ClockOffsetEstimator()
+        self.sketches = SketchSet(SPANS + [END_TO_END])
+        self.count = 0
+
+    def record(self, trace, received, decrypt_start, decrypt_end):
+        """trace = dict 'trace' dari payload publisher; timestamp lain wall clock (detik)"""
+        pub_received, encrypt_start, encrypt_end, published = trace["t"]
+        stamps = [None, pub_received, encrypt_start, encrypt_end, published,
+                  received, decrypt_start, decrypt_end]
+
+        device = trace["id"].rsplit(":", 1)[0]
+        device_ms = trace.get("device_ms")
+        offset = None
+        if isinstance(device_ms, (int, float)):
+            offset = self.clock.update(device, device_ms, pub_received)
+            stamps[0] = device_ms / 1000.0 + offset
+
+        spans = {}
+        for name, start, end in zip(SPANS, stamps, stamps[1:]):
+            if start is None:
+                continue
+            spans[name] = (end - start) * 1000
+            self.sketches.add(name, spans[name])
+        first = stamps[0] if stamps[0] is not None else stamps[1]
+        spans[END_TO_END] = (decrypt_end - first) * 1000
+        self.sketches.add(END_TO_END, spans[END_TO_END])
+
+        self._write({"id": trace["id"], "t": decrypt_end, "clock_offset": offset, "spans_ms": spans})
+        self.count += 1
+        return spans
+
+    def _write(self, line):
+        if self.file is None:
+            self.file = open(self.path, 'a')
+        self.file.write(json.dumps(line) + "\n")
+
+    def print_report(self):
+        print_breakdown(self.sketches)
+
+    def close(self, summary_path=TRACE_SUMMARY_PATH):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+        if self.count:
+            with open(summary_path, 'w') as f:
+                json.dump(self.sketches.summary(), f, indent=2)
+
+# ===== RINGKASAN =====
+def print_breakdown(sketches):
+    """Breakdown latency per tahap: p50/p99 dan porsi dari rata-rata end-to-end"""
+    total = sketches.sketches.get(END_TO_END)
+    if total is None or not total.count:
+        print("\n🧭 No traces recorded")
+        return
+    total_mean = total.mean()
+    print(f"\n🧭 LATENCY BREAKDOWN (ms, {total.count} traces)")
+    print(f"   {'Stage':<20} | {'Mean':>9} | {'p50':>9} | {'p99':>9} | {'Share':>6}")
+    for name in SPANS + [END_TO_END]:
+        sketch = sketches.sketches.get(name)
+        if sketch is None or not sketch.count:
+            continue
+        share = sketch.mean() / total_mean * 100 if total_mean > 0 else 0.0
+        print(f"   {name:<20} | {sketch.mean():9.3f} | {sketch.quantile(0.5):9.3f} | "
+              f"{sketch.quantile(0.99):9.3f} | {share:5.1f}%")
+
+def load_traces(path):
+    sketches = SketchSet(SPANS + [END_TO_END])
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            for name, value in json.loads(line)["spans_ms"].items():
+                sketches.add(name, value)
+    return sketches
+
+# ===== CLI =====
+def main():
+    parser = argparse.ArgumentParser(description="Ringkas file trace latency end-to-end")
+    parser.add_argument("traces", nargs="*", default=[TRACE_PATH])
+    parser.add_argument("--json", help="Simpan ringkasan ke file JSON")
+    args = parser.parse_args()
+
+    sketches = SketchSet(SPANS + [END_TO_END])
+    for path in args.traces:
+        try:
+            sketches.merge(load_traces(path))
+        except FileNotFoundError:
+            print(f"❌ File not found: {path}")
+            sys.exit(1)
+    print_breakdown(sketches)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(sketches.summary(), f, indent=2)
+        print(f"\n✅ Summary saved as: {args.json}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+Traffic Recorder & Replayer
+Rekam semua pesan MQTT project ke log biner append-only, lalu putar ulang
+dengan kecepatan 1×, N× atau maksimum (pola inter-arrival dipertahankan),
+ke broker atau lewat transport loopback untuk benchmark yang bisa diulang
+"""
+
+import io
+import os
+import json
+import time
+import struct
+import argparse
+import contextlib
+
+# ===== KONFIGURASI =====
+BROKER = "broker.hivemq.com"
+PORT = 1883
+CLIENT_ID = "Traffic_Recorder"
+CAPTURE_FILE = "traffic_capture.bin"
+FLUSH_INTERVAL = 1.0   # Detik antar flush ke disk
+
+CAPTURE_TOPICS = [
+    ("iot/sensor/distance/raw", 0),
+    ("iot/sensor/distance/enc", 0),
+    ("iot/sensor/energy", 0),
+    ("iot/sensor/distance/raw/tampered", 0),
+    ("iot/sensor/distance/enc/tampered", 0),
+    ("iot/sensor/distance/enc/replayed", 0),
+    ("iot/sensor/distance/raw/dos", 0),
+]
+
+# Modul yang bisa dipasang ke transport loopback saat replay
+BENCH_MODULES = ["mqtt_publisher", "mqtt_subscriber", "attack_monitor", "energy_analyzer"]
+
+# ===== FORMAT FILE =====
+# Header: MAGIC
+# Record topic : b'T' | topic_id u16 | len u16 | topic utf-8
+# Record pesan : b'M' | t f64 (epoch) | topic_id u16 | len u32 | payload
+MAGIC = b"IOTCAP01"
+TOPIC_HEADER = struct.Struct("<HH")
+MESSAGE_HEADER = struct.Struct("<dHI")
+
+class CaptureWriter:
+    """Penulis log capture; topic disimpan sekali di tabel, pesan hanya membawa ID topic"""
+
+    def __init__(self, path=CAPTURE_FILE):
+        self.path = path
+        self.topics = {}
+        self.count = 0
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            # Lanjutkan file lama: bangun ulang tabel topic, lalu potong ekor yang robek
+            # (crash di tengah record) supaya record baru tidak ditulis setelah sampah
+            end = len(MAGIC)
+            for record_type, topic_id, topic, _, _, end in _iter_records(path):
+                if record_type == b'T':
+                    self.topics[topic] = topic_id
+            self.file = open(path, 'r+b')
+            self.file.truncate(end)
+            self.file.seek(end)
+        else:
+            self.file = open(path, 'wb')
+            self.file.write(MAGIC)
+        self.last_flush = time.time()
+
+    def write(self, t, topic, payload):
+        topic_id = self.topics.get(topic)
+        if topic_id is None:
+            topic_id = self.topics[topic] = len(self.topics)
+            encoded = topic.encode('utf-8')
+            self.file.write(b'T' + TOPIC_HEADER.pack(topic_id, len(encoded)) + encoded)
+        self.file.write(b'M' + MESSAGE_HEADER.pack(t, topic_id, len(payload)) + payload)
+        self.count += 1
+        if t - self.last_flush >= FLUSH_INTERVAL:
+            self.file.flush()
+            self.last_flush = t
+
+    def close(self):
+        self.file.flush()
+        self.file.close()
+
+def _iter_records(path):
+    """
+    Generator (type, topic_id, topic, t, payload, end) dengan end = offset akhir record;
+    berhenti rapi bila ekor file terpotong
+    """
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"Not a traffic capture: {path}")
+        topics = {}
+        while True:
+            record_type = f.read(1)
+            if not record_type:
+                return
+            if record_type == b'T':
+                header = f.read(TOPIC_HEADER.size)
+                if len(header) < TOPIC_HEADER.size:
+                    return
+                topic_id, length = TOPIC_HEADER.unpack(header)
+                encoded = f.read(length)
+                if len(encoded) < length:
+                    return
+                topic = encoded.decode('utf-8')
+                topics[topic_id] = topic
+                yield record_type, topic_id, topic, None, None, f.tell()
+            elif record_type == b'M':
+                header = f.read(MESSAGE_HEADER.size)
+                if len(header) < MESSAGE_HEADER.size:
+                    return
+                t, topic_id, length = MESSAGE_HEADER.unpack(header)
+                payload = f.read(length)
+                if len(payload) < length:
+                    return
+                yield record_type, topic_id, topics[topic_id], t, payload, f.tell()
+            else:
+                raise ValueError(f"Corrupt capture record at offset {f.tell() - 1}")
+
+def iter_capture(path, topics=None):
+    """Generator (t, topic, payload bytes) dari file capture, opsional difilter per topic"""
+    for record_type, _, topic, t, payload, _ in _iter_records(path):
+        if record_type == b'M' and (topics is None or topic in topics):
+            yield t, topic, payload
+
+# ===== RECORD =====
+def record(path, duration=None):
+    import paho.mqtt.client as mqtt
+
+    writer = CaptureWriter(path)
+
+    def on_connect(client, userdata, flags, rc):
+        if rc == 0:
+            print("✅ Connected to MQTT Broker!")
+            for topic, qos in CAPTURE_TOPICS:
+                client.subscribe(topic, qos)
+                print(f"   → {topic}")
+        else:
+            print(f"❌ Failed to connect, code {rc}")
+
+    def on_message(client, userdata, msg):
+        writer.write(time.time(), msg.topic, msg.payload)
+
+    client = mqtt.Client(CLIENT_ID)
+    client.on_connect = on_connect
+    client.on_message = on_message
+
+    print(f"🎙️  Recording to {path} (Ctrl+C to stop)")
+    client.connect(BROKER, PORT, 60)
+    client.loop_start()
+    start = time.time()
+    try:
+        while duration is None or time.time() - start < duration:
+            time.sleep(0.5)
+    except KeyboardInterrupt:
+        pass
+    client.loop_stop()
+    client.disconnect()
+    writer.close()
+    print(f"\n💾 {writer.count:,} messages recorded to {path}")
+
+# ===== REPLAY =====
+def replay(messages, publish, speed=1.0):
+    """
+    Publish ulang (t, topic, payload) dengan jarak antar pesan asli dibagi `speed`.
+    speed=0 berarti secepat mungkin. Mengembalikan ringkasan rate dan keterlambatan jadwal.
+    """
+    count = 0
+    max_lag = 0.0
+    first_t = None
+    start = time.perf_counter()
+    for t, topic, payload in messages:
+        if first_t is None:
+            first_t = t
+        if speed:
+            due = start + (t - first_t) / speed
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                max_lag = max(max_lag, -delay)
+        publish(topic, payload)
+        count += 1
+    elapsed = time.perf_counter() - start
+    return {
+        'messages': count,
+        'elapsed_s': elapsed,
+        'rate_msg_s': count / elapsed if elapsed > 0 else 0.0,
+        'max_lag_ms': max_lag * 1000,
+    }
+
+def attach_loopback(broker, module_names):
+    """
+    Pasang callback modul (on_connect/on_message) ke client loopback.
+    Waktu on_message diukur per modul ke dalam t-digest.
+    """
+    import importlib
+    from loopback import LoopbackClient
+    from quantile_sketch import SketchSet
+
+    sketches = SketchSet(module_names)
+    clients = []
+    for name in module_names:
+        module = importlib.import_module(name)
+        if name == "mqtt_publisher":
+            module.THINGSPEAK_ENABLED = False
+        # Replay dipercepat akan terlihat seperti flood; ukur handler tanpa rate limit
+        module.RATE_LIMIT_ENABLED = False
+
+        def timed(client, userdata, msg, handler=module.on_message, metric=name):
+            t0 = time.perf_counter()
+            handler(client, userdata, msg)
+            sketches.add(metric, (time.perf_counter() - t0) * 1e6)
+
+        client = LoopbackClient(broker, name)
+        client.on_connect = module.on_connect
+        client.on_message = timed
+        clients.append(client)
+    return clients, sketches
+
+def replay_loopback(path, module_names, speed=0, topics=None):
+    from loopback import LoopbackBroker, LoopbackClient
+
+    broker = LoopbackBroker()
+    clients, sketches = attach_loopback(broker, module_names)
+    source = LoopbackClient(broker, "replayer")
+    source.connect()
+
+    # Output per pesan dari modul dibuang supaya yang terukur adalah pemrosesan, bukan terminal
+    sink = io.StringIO()
+    with contextlib.redirect_stdout(sink):
+        for client in clients:
+            client.connect()
+        summary = replay(iter_capture(path, topics), source.publish, speed)
+        sink.seek(0)
+        sink.truncate()
+    summary['delivered'] = broker.delivered
+    return summary, sketches
+
+def replay_broker(path, speed=1.0, topics=None):
+    import paho.mqtt.client as mqtt
+
+    client = mqtt.Client("Traffic_Replayer")
+    client.connect(BROKER, PORT, 60)
+    client.loop_start()
+    summary = replay(iter_capture(path, topics), client.publish, speed)
+    client.loop_stop()
+    client.disconnect()
+    return summary
+
+# ===== INFO / EXPORT =====
+def capture_info(path):
+    per_topic = {}
+    first_t = last_t = None
+    for t, topic, payload in iter_capture(path):
+        count, size = per_topic.get(topic, (0, 0))
+        per_topic[topic] = (count + 1, size + len(payload))
+        first_t = t if first_t is None else first_t
+        last_t = t
+    return per_topic, first_t, last_t
+
+def export_jsonl(path, out_path):
+    """Ekspor ke JSONL (dibaca log_replay / energy_analyzer --offline)"""
+    count = 0
+    with open(out_path, 'w') as f:
+        for t, topic, payload in iter_capture(path):
+            f.write(json.dumps({"t": t, "topic": topic,
+                                "payload": payload.decode('utf-8', errors='replace')}) + "\n")
+            count += 1
+    return count
+
+def parse_speed(text):
+    return 0.0 if text in ("max", "0") else float(text.rstrip("x"))
+
+# ===== MAIN =====
+def main():
+    parser = argparse.ArgumentParser(description="Rekam dan putar ulang trafik MQTT IoT ASCON")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("record", help="Rekam trafik dari broker")
+    p.add_argument("-o", "--output", default=CAPTURE_FILE)
+    p.add_argument("--duration", type=float, help="Berhenti otomatis setelah N detik")
+
+    p = sub.add_parser("replay", help="Putar ulang capture")
+    p.add_argument("capture")
+    p.add_argument("--speed", default="1", help="1, 10 (atau 10x), max")
+    p.add_argument("--loopback", nargs="*", metavar="MODULE",
+                   help=f"Replay in-process ke modul ({', '.join(BENCH_MODULES)}) tanpa broker")
+    p.add_argument("--topic", action="append", help="Hanya topic ini (boleh berulang)")
+    p.add_argument("--json", help="Simpan ringkasan ke file JSON")
+
+    p = sub.add_parser("info", help="Ringkasan isi capture")
+    p.add_argument("capture")
+
+    p = sub.add_parser("export", help="Ekspor capture ke JSONL")
+    p.add_argument("capture")
+    p.add_argument("output")
+
+    args = parser.parse_args()
+
+    if args.command == "record":
+        record(args.output, args.duration)
+
+    elif args.command == "info":
+        per_topic, first_t, last_t = capture_info(args.capture)
+        total = sum(c for c, _ in per_topic.values())
+        duration = (last_t - first_t) if total else 0
+        print(f"📦 {args.capture}: {total:,} messages, {os.path.getsize(args.capture):,} bytes, {duration:.1f} s")
+        for topic, (count, size) in sorted(per_topic.items()):
+            print(f"   {topic:<40} {count:>8,} msgs  {size / max(count, 1):8.1f} B avg")
+        if duration > 0:
+            print(f"   Mean rate: {total / duration:.2f} msg/s")
+
+    elif args.command == "export":
+        count = export_jsonl(args.capture, args.output)
+        print(f"✅ {count:,} messages exported to {args.output}")
+
+    elif args.command == "replay":
+        speed = parse_speed(args.speed)
+        label = "max" if speed == 0 else f"{speed:g}×"
+        if args.loopback is not None:
+            modules = args.loopback or ["mqtt_subscriber", "attack_monitor"]
+            print(f"🔁 Loopback replay of {args.capture} at {label} → {', '.join(modules)}")
+            summary, sketches = replay_loopback(args.capture, modules, speed, args.topic)
+            sketches.print_report("ON_MESSAGE LATENCY (μs)", {name: "μs" for name in modules})
+            summary['on_message_us'] = sketches.summary()
+        else:
+            print(f"🔁 Replaying {args.capture} at {label} → {BROKER}:{PORT}")
+            summary = replay_broker(args.capture, speed, args.topic)
+
+        print(f"\n📨 {summary['messages']:,} messages in {summary['elapsed_s']:.2f} s "
+              f"({summary['rate_msg_s']:,.0f} msg/s, max schedule lag {summary['max_lag_ms']:.1f} ms)")
+        if args.json:
+            with open(args.json, 'w') as f:
+                json.dump(summary, f, indent=2)
+            print(f"✅ Summary saved as: {args.json}")
+
+if __name__ == "__main__":
+    main()